@@ -3,6 +3,7 @@ from neurogym.core import BaseEnv
 from neurogym.core import TrialEnv
 from neurogym.core import TrialEnv
 from neurogym.core import TrialWrapper
+from neurogym.core import StandardDecisionRule
 import neurogym.utils.spaces as spaces
 from neurogym.envs.registration import make
 from neurogym.envs.registration import register
@@ -2,11 +2,14 @@
 # -*- coding: utf-8 -*-
 
 
+import bisect
+import copy
+
 import numpy as np
 import gym
 import warnings
 
-from neurogym.utils.random import trunc_exp
+from neurogym.utils.random import Generator, compile_timing
 
 METADATA_DEF_KEYS = ['description', 'paper_name', 'paper_link', 'timing',
                      'tags']
@@ -83,11 +86,11 @@ class BaseEnv(gym.Env):
         self.tmax = 10000  # maximum time steps
         self.performance = 0
         self.rewards = {}
-        self.rng = np.random.RandomState()
+        self.rng = Generator()
 
     def seed(self, seed=None):
         """Set random seed."""
-        self.rng = np.random.RandomState(seed)
+        self.rng = Generator(seed)
         if self.action_space is not None:
             self.action_space.seed(seed)
         return [seed]
@@ -98,6 +101,107 @@ class BaseEnv(gym.Env):
     #     return self.step(self.action_space.sample())
 
 
+class StandardDecisionRule(object):
+    """Standard fixation/decision reward rule of trial-based tasks.
+
+    During the fixation period, any action other than fixating (0) is
+    rewarded rewards['abort'], and ends the trial if the abort attribute of
+    the task is True. During the decision period, the first action other
+    than fixating ends the trial, rewarded rewards['correct'] if it is the
+    ground truth, in which case performance is 1, and rewards['fail']
+    otherwise. rewards and abort are read from the task at each step, so
+    changing them applies to the next step.
+
+    Tasks opt into the rule by setting it as their rule attribute instead of
+    defining _step. TrialEnv then steps them from a table of the period and
+    ground truth of each time step, built once per trial, and
+    neurogym.vector steps many copies at once with evaluate.
+
+    Args:
+        fixation: str, name of the fixation period
+        decision: str, name of the decision period
+        fail: bool, if False, wrong decisions are rewarded 0 instead of
+            rewards['fail']
+    """
+
+    def __init__(self, fixation='fixation', decision='decision', fail=True):
+        self.fixation = fixation
+        self.decision = decision
+        self.fail = fail
+
+    def __eq__(self, other):
+        return (isinstance(other, StandardDecisionRule) and
+                vars(self) == vars(other))
+
+    def _fail_reward(self, env):
+        return env.rewards.get('fail', 0) if self.fail else 0
+
+    def trial_table(self, env):
+        """Period code (0: other, 1: fixation, 2: decision) and ground truth
+        of each time step of the current trial of env, as lists."""
+        t = np.arange(len(env.gt)) * env.dt
+        codes = np.zeros(len(t), dtype=int)
+        for code, period in [(2, self.decision), (1, self.fixation)]:
+            if period in env.start_t:
+                # Fixation takes precedence if periods overlap
+                codes[(env.start_t[period] <= t) & (t < env.end_t[period])] = \
+                    code
+        return codes.tolist(), env.gt.tolist()
+
+    def step(self, env, action):
+        """Step task env with action, see TrialEnv._step."""
+        table = env._rule_table
+        if table is None:
+            table = env._rule_table = self.trial_table(env)
+        codes, gts = table
+        code, gt = codes[env.t_ind], gts[env.t_ind]
+        new_trial = False
+        reward = 0
+        if action != 0:
+            if code == 1:
+                new_trial = env.abort
+                reward = env.rewards['abort']
+            elif code == 2:
+                new_trial = True
+                if action == gt:
+                    reward = env.rewards['correct']
+                    env.performance = 1
+                else:
+                    reward = self._fail_reward(env)
+        return OBNOW, reward, False, {'new_trial': new_trial, 'gt': gt}
+
+    def evaluate(self, env, action, gt, in_fixation, in_decision):
+        """Evaluate actions of many time steps of task env at once.
+
+        Args:
+            env: TrialEnv object, task providing rewards and abort
+            action: np array, actions
+            gt: np array, ground truth of the time steps
+            in_fixation: bool np array, True for time steps in the fixation
+                period
+            in_decision: bool np array, True for time steps in the decision
+                period
+
+        Returns:
+            reward: np array of floats
+            new_trial: bool np array, True if the action ends the trial
+            correct: bool np array, True if the action is a correct decision
+        """
+        action, gt, in_fixation, in_decision = np.broadcast_arrays(
+            action, gt, in_fixation, in_decision)
+        act = action != 0
+        fixation = in_fixation & act
+        decision = ~in_fixation & in_decision & act
+        correct = decision & (action == gt)
+
+        reward = np.zeros(action.shape)
+        reward[fixation] = env.rewards['abort']
+        reward[decision] = self._fail_reward(env)
+        reward[correct] = env.rewards['correct']
+        new_trial = decision | (fixation & bool(env.abort))
+        return reward, new_trial, correct
+
+
 class TrialEnv(BaseEnv):
     """The main Neurogym class for trial-based envs."""
 
@@ -112,14 +216,39 @@ class TrialEnv(BaseEnv):
         self._has_gt = False  # check if the task ever defined gt
 
         self._default_ob_value = None  # default to 0
+        self._ob_channels = 0  # channels added by wrappers, see add_ob_channels
+        self._ob_owners = dict()  # owner to (start, n) of its channels
 
         # For optional periods
         self.timing = {}
+        self._samplers = dict()  # period to (timing, compiled sampler)
         self.start_t = dict()
         self.end_t = dict()
         self.start_ind = dict()
         self.end_ind = dict()
         self._tmax = 0  # Length of each trial
+        # Period id of each time step of the trial, built lazily by in_period
+        self._period_ids = self._period_list = None
+        self._period_index = dict()  # period name to id, kept across trials
+        self._period_names = list()
+        # Reward rule used by _step if the task doesn't define it, and its
+        # table for the current trial
+        self.rule = None
+        self._rule_table = None
+
+        # Generators moved to the substream of each new trial
+        self._trial_rngs = [self.rng]
+        self._trial_index = 0  # index of the next trial since seeding
+        # Batches of new_trials since seeding, as runs of batches of equal
+        # size: first trial index of each run, and (size, number of batches)
+        self._batch_starts = list()
+        self._batch_runs = list()
+
+        self.info_mode = 'full'
+        self.copy_obs = False
+        self.reuse_buffers = True
+        self._buffers = dict()  # (name, shape, dtype) to trial buffer
+        self._ob_source = self._ob_readonly = None
 
         self._top = self
 
@@ -127,6 +256,12 @@ class TrialEnv(BaseEnv):
         """Information about task."""
         return env_string(self, short=True)
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Copies of a view are not views, so rebuild it when copied
+        state['_ob_source'] = state['_ob_readonly'] = None
+        return state
+
     def _new_trial(self, **kwargs):
         """Private interface for starting a new trial.
 
@@ -141,22 +276,91 @@ class TrialEnv(BaseEnv):
 
         Receives an action and returns a new state, a reward, a flag variable
         indicating whether the experiment has ended and a dictionary with
-        useful information
+        useful information. Tasks with a rule, e.g. StandardDecisionRule,
+        don't need to define it.
         """
-        raise NotImplementedError('_step is not defined by user.')
+        if self.rule is None:
+            raise NotImplementedError('_step is not defined by user.')
+        return self.rule.step(self, action)
 
-    def seed(self, seed=None):
-        """Set random seed."""
-        self.rng = np.random.RandomState(seed)
+    def seed(self, seed=None, bit_generator='Philox'):
+        """Set random seed.
+
+        Each trial is generated from its own substream of the seed, so the
+        i-th trial after seeding only depends on (seed, i) and on the state
+        of the task.
+
+        Args:
+            seed: None or int
+            bit_generator: str, 'Philox' or 'PCG64', see
+                neurogym.utils.random.Generator
+        """
+        seed_seq = np.random.SeedSequence(seed)
+        self.rng = Generator(seed_seq, bit_generator)
+        self._trial_rngs = [self.rng]
         if hasattr(self, 'action_space') and self.action_space is not None:
             self.action_space.seed(seed)
-        for key, val in self.timing.items():
+        # Random timings get their own, independent, streams
+        timing_seeds = seed_seq.spawn(len(self.timing))
+        for val, timing_seed in zip(self.timing.values(), timing_seeds):
             try:
-                val.seed(seed)
+                val.seed(timing_seed)
             except AttributeError:
-                pass
+                continue
+            if isinstance(getattr(val, 'rng', None), Generator):
+                self._trial_rngs.append(val.rng)
+        self._trial_index = 0
+        self._batch_starts = list()
+        self._batch_runs = list()
+        self._set_trial_rngs(0)
         return [seed]
 
+    def _set_trial_rngs(self, trial):
+        """Move random generators to the substream of trial."""
+        for rng in self._trial_rngs:
+            rng.set_trial(trial)
+
+    def set_info_mode(self, info_mode):
+        """Set the content of the info dict returned by step.
+
+        Args:
+            info_mode: str, one of
+                'full': new_trial, gt, and at the end of trials performance
+                    and trial, plus any key returned by _step or added by
+                    wrappers. Default
+                'minimal': new_trial, and at the end of trials performance
+                'none': only new_trial
+
+        In 'minimal' and 'none' modes, keys returned by _step are dropped
+        and wrappers don't add keys, so that info holds the same keys at
+        each step.
+        """
+        if info_mode not in ('full', 'minimal', 'none'):
+            raise ValueError('Unknown info_mode ' + str(info_mode))
+        self.info_mode = info_mode
+
+    def set_copy_obs(self, copy_obs=True):
+        """Set ownership of the observations returned by step and reset.
+
+        By default, step returns a read-only view of the trial observations,
+        and wrappers modifying observations return a read-only view of
+        their output buffer, only valid until the next step. Store a copy to
+        keep it. If copy_obs is True, step returns arrays owned by the
+        caller instead.
+        """
+        self.copy_obs = copy_obs
+
+    def set_reuse_buffers(self, reuse_buffers=True):
+        """Set whether trials reuse the memory of self.ob and self.gt.
+
+        By default, self.ob and self.gt are views of buffers kept across
+        trials and overwritten by the next trial. Set reuse_buffers to False
+        to keep references to self.ob or self.gt across trials.
+        """
+        self.reuse_buffers = reuse_buffers
+        if not reuse_buffers:
+            self._buffers = dict()
+
     def post_step(self, ob, reward, done, info):
         """
         Optional task-specific wrapper applied at the end of step.
@@ -175,22 +379,199 @@ class TrialEnv(BaseEnv):
         """
         # Reset for next trial
         self._tmax = 0  # reset, self.tmax not reset so it can be used in step
+        self._rule_table = None
         self._ob_built = False
         self._gt_built = False
+        self._set_trial_rngs(self._trial_index)
         trial = self._new_trial(**kwargs)
         self.trial = trial
         self.num_tr += 1  # Increment trial count
+        self._trial_index += 1
         self._has_gt = self._gt_built
         return trial
 
+    def _new_trials(self, batch, **kwargs):
+        """Private interface for generating a batch of trials at once.
+
+        Optional. Tasks implementing it fill batch using the batched period
+        and observation helpers of TrialBatch.
+
+        Args:
+            batch: TrialBatch object, to be filled with n trials
+
+        Returns:
+            trial: dict of np arrays, each with one entry per trial
+        """
+        raise NotImplementedError('_new_trials is not defined by user.')
+
+    def new_trials(self, n, **kwargs):
+        """Public interface for generating n new trials at once.
+
+        Trials are generated by the task's _new_trials if it is defined,
+        otherwise by calling new_trial n times. The trial counter is
+        advanced by n, but self.ob and self.gt are not guaranteed to refer to
+        any of the trials of the batch.
+
+        A batch of _new_trials takes the next n trial indices, but is drawn
+        at once from the substream of its first index, as drawing each trial
+        from its own substream would cost about as much as generating trials
+        one at a time. The env records the batches it generated since
+        seeding, so that trial_at regenerates the trials of a batch from
+        their index, by regenerating the whole batch with trials_at.
+
+        Args:
+            n: int, number of trials
+
+        Returns:
+            batch: TrialBatch object with padded ob, gt and trial lengths
+        """
+        if not _has_batched_trials(self):
+            return _stack_trials(self, n, **kwargs)
+
+        self._set_trial_rngs(self._trial_index)
+        batch = TrialBatch(self, n)
+        batch.trial = self._new_trials(batch, **kwargs)
+        batch.finalize()
+        self.num_tr += n
+        self._record_batch(n)
+        self._trial_index += n
+        return batch
+
+    def _record_batch(self, n):
+        """Record a batch of n trials starting at the current trial index."""
+        starts, runs = self._batch_starts, self._batch_runs
+        if runs and runs[-1][0] == n and \
+                starts[-1] + n * runs[-1][1] == self._trial_index:
+            runs[-1] = (n, runs[-1][1] + 1)  # continues the last run
+        else:
+            starts.append(self._trial_index)
+            runs.append((n, 1))
+
+    def _batch_of(self, index):
+        """First trial index and size of the batch of trial index, or None."""
+        i = bisect.bisect_right(self._batch_starts, index) - 1
+        if i < 0:
+            return None
+        start = self._batch_starts[i]
+        n, count = self._batch_runs[i]
+        if index >= start + n * count:
+            return None
+        return start + (index - start) // n * n, n
+
+    def trial_at(self, index, **kwargs):
+        """Regenerate the index-th trial since the env was seeded.
+
+        The trial is generated by the task, without wrappers, from its own
+        random substream, and the state of the env (current trial, random
+        generators, trial counters) is left unchanged. Tasks whose trials
+        depend on previous trials (e.g. blocks) use their current state.
+        Trials generated in a batch of new_trials since seeding are
+        regenerated with their batch, other indices as trials of new_trial.
+
+        Args:
+            index: int, index of the trial
+
+        Returns:
+            trial: dict of trial information
+            ob: np array (T, ob_space.shape...), observations of the trial,
+                or None if the task doesn't build them
+            gt: np array (T, action_space.shape...), ground truth, or None if
+                the task doesn't define it
+        """
+        batch = self._batch_of(index)
+        if batch is not None:
+            start, n = batch
+            return self.trials_at(start, n, **kwargs).get_trial(index - start)
+
+        def generate():
+            trial = self.new_trial(**kwargs)
+            ob = self.ob if self._ob_built else None
+            gt = self.gt if self._has_gt else None
+            return trial, ob, gt
+        return self._regenerate(index, generate)
+
+    def trials_at(self, index, n, **kwargs):
+        """Regenerate the batch of new_trials(n) starting at trial index.
+
+        As trial_at, the state of the env is left unchanged.
+
+        Args:
+            index: int, index of the first trial of the batch
+            n: int, number of trials of the batch
+
+        Returns:
+            batch: TrialBatch object
+        """
+        return self._regenerate(index, lambda: self.new_trials(n, **kwargs))
+
+    def _regenerate(self, index, generate):
+        """Call generate from trial index, then restore the env state."""
+        state = dict(self.__dict__)
+        # Restore mutable containers in place, as wrappers may hold them
+        contents = {key: copy.copy(val) for key, val in state.items()
+                    if type(val) in (dict, list)}
+        rngs = list(self._trial_rngs)
+        rngs += [val.rng for val in self.timing.values()
+                 if isinstance(getattr(val, 'rng', None), Generator)]
+        rng_states = [rng.bit_generator.state for rng in rngs]
+        try:
+            self.reuse_buffers = False  # keep the buffers of the current trial
+            self._trial_index = index
+            return generate()
+        finally:
+            self.__dict__.clear()
+            self.__dict__.update(state)
+            for key, val in contents.items():
+                if isinstance(val, dict):
+                    state[key].clear()
+                    state[key].update(val)
+                else:
+                    state[key][:] = val
+            for rng, rng_state in zip(rngs, rng_states):
+                rng.bit_generator.state = rng_state
+
+    def score_actions(self, actions, trials):
+        """Score actions on a batch of trials, without stepping the env.
+
+        Rewards, trial ends and performance are those of stepping the task
+        through each trial with actions, starting from its first time step,
+        computed for all trials at once by the StandardDecisionRule of the
+        task.
+
+        Args:
+            actions: array-like (n, T), actions of each trial, with T at
+                least the length of the longest trial, e.g. from the padded
+                trials of a PackedBatch with batch_first
+            trials: TrialBatch, e.g. from new_trials, or PackedBatch with
+                period times, e.g. from Dataset with mode='trial'
+
+        Returns:
+            reward: np array (n, T), reward of each time step, 0 after the
+                end of the trial
+            end_ind: np array (n,), index of the time step ending each
+                trial, by a decision, an abort or the end of the trial
+            performance: np array (n,), 1 for trials ended by a correct
+                decision, 0 otherwise
+        """
+        return _score_actions([self], actions, trials)
+
+    @property
+    def batched_trials(self):
+        """True if new_trials uses a batched generator of the task."""
+        return _has_batched_trials(self)
+
     def step(self, action):
         """Public interface for the environment."""
         ob, reward, done, info = self._step(action)
+        full = self.info_mode == 'full'
 
-        if 'new_trial' not in info:
+        if not full:
+            # Fresh dict without the keys of _step
+            info = {'new_trial': info.get('new_trial', False)}
+        elif 'new_trial' not in info:
             info['new_trial'] = False
 
-        if self._has_gt and 'gt' not in info:
+        if full and self._has_gt and 'gt' not in info:
             # If gt is built, default gt to gt_now
             # must run before incrementing t
             info['gt'] = self.gt_now
@@ -204,14 +585,23 @@ class TrialEnv(BaseEnv):
 
         # TODO: new_trial happens after step, so trial indx precedes obs change
         if info['new_trial']:
-            info['performance'] = self.performance
+            if self.info_mode != 'none':
+                info['performance'] = self.performance
             self.t = self.t_ind = 0  # Reset within trial time count
             trial = self._top.new_trial()
             self.performance = 0
-            info['trial'] = trial
+            if full:
+                info['trial'] = trial
         if ob is OBNOW:
-            ob = self.ob[self.t_ind]
-        return self.post_step(ob, reward, done, info)
+            if self.ob is not self._ob_source:
+                # Read-only view of the trial observations, made once per trial
+                self._ob_source = self.ob
+                self._ob_readonly = _readonly(self.ob)
+            ob = self._ob_readonly[self.t_ind]
+        ob, reward, done, info = self.post_step(ob, reward, done, info)
+        if self.copy_obs:
+            ob = np.array(ob)
+        return ob, reward, done, info
 
     def reset(self, seed=None, return_info=False, options=None, step_fn=None, no_step=False):
         """Reset the environment.
@@ -254,32 +644,45 @@ class TrialEnv(BaseEnv):
         """Set top to be wrapper."""
         self._top = wrapper
 
+    def timing_sampler(self, period):
+        """Return the sampler of the duration of period.
+
+        The timing of period is compiled into a Sampler object (see
+        neurogym.utils.random) the first time it is sampled, and again if
+        self.timing[period] is replaced.
+        """
+        timing = self.timing[period]
+        compiled = self._samplers.get(period)
+        if compiled is None or compiled[0] is not timing:
+            compiled = (timing, compile_timing(timing))
+            self._samplers[period] = compiled
+        return compiled[1]
+
     def sample_time(self, period):
         timing = self.timing[period]
         if isinstance(timing, (int, float)):
-            t = timing
-        elif callable(timing):
-            t = timing()
-        elif isinstance(timing[0], (int, float)):
-            # Expect list of int/float, and use random choice
-            t = self.rng.choice(timing)
+            t = timing  # constant, no need for a sampler
         else:
-            dist, args = timing
-            if dist == 'uniform':
-                t = self.rng.uniform(*args)
-            elif dist == 'choice':
-                t = self.rng.choice(args)
-            elif dist == 'truncated_exponential':
-                t = trunc_exp(self.rng, *args)
-            elif dist == 'constant':
-                t = args
-            elif dist == 'until':
-                # set period duration such that self.t_end[period] = args
-                t = args - self.tmax
-            else:
-                raise ValueError('Unknown dist:', str(dist))
+            t = self.timing_sampler(period)(self.rng, None, self.tmax)
         return (t // self.dt) * self.dt
 
+    def sample_times(self, period, n, tmax=None):
+        """Sample the duration of period for n trials at once.
+
+        Args:
+            period: string, name of the period
+            n: int, number of durations
+            tmax: np array (n,) or None, current end time of each trial,
+                only used by the 'until' distribution. Default self.tmax
+
+        Returns:
+            durations: np array (n,)
+        """
+        if tmax is None:
+            tmax = self.tmax
+        t = self.timing_sampler(period)(self.rng, n, tmax=tmax)
+        return (np.asarray(t, dtype=float) // self.dt) * self.dt
+
     def add_period(self, period, duration=None, before=None, after=None,
                    last_period=False):
         """Add an period.
@@ -329,39 +732,128 @@ class TrialEnv(BaseEnv):
 
         self.start_t[period] = start
         self.end_t[period] = start + duration
+        # Tables out of date
+        self._period_ids = self._period_list = self._rule_table = None
         self.start_ind[period] = int(start/self.dt)
         self.end_ind[period] = int((start + duration)/self.dt)
 
         self._tmax = max(self._tmax, start + duration)
         self.tmax = int(self._tmax/self.dt) * self.dt
 
+    def add_ob_channels(self, n, owner):
+        """Add n observation channels after the channels of the task.
+
+        Wrappers adding inputs to the observation register their channels
+        here, so that the trial observation is allocated once per trial with
+        all channels, and each wrapper writes into its own channels instead
+        of concatenating observations. observation_space and the
+        observation helpers of the task still refer to the task channels
+        only. Channels are used from the next trial on.
+
+        Channels are allocated once per owner: an owner registering again,
+        e.g. a wrapper of the same env instance passed twice to MultiEnvs,
+        gets the same channels. They are kept until remove_ob_channels.
+
+        Args:
+            n: int, number of channels
+            owner: object using the channels, usually the wrapper
+
+        Returns:
+            start: int, index of the first added channel
+        """
+        if len(self.observation_space.shape) != 1:
+            raise ValueError('Observation channels can only be added to 1-D '
+                             'observation spaces, got shape ' +
+                             str(self.observation_space.shape))
+        if owner in self._ob_owners:
+            start, n_owner = self._ob_owners[owner]
+            if n_owner != n:
+                raise ValueError('Owner already has {:d} channels, got '
+                                 '{:d}'.format(n_owner, n))
+            return start
+        start = self.observation_space.shape[0] + self._ob_channels
+        self._ob_channels += n
+        self._ob_owners[owner] = (start, n)
+        return start
+
+    def remove_ob_channels(self, owner):
+        """Release the observation channels of owner, see add_ob_channels.
+
+        Used when a wrapper is removed. The trial observation shrinks back
+        to the channels still owned, from the next trial on. Channels of
+        other owners keep their index, so released channels followed by
+        owned ones stay allocated, filled with zeros.
+        """
+        del self._ob_owners[owner]
+        ends = [start + n for start, n in self._ob_owners.values()]
+        self._ob_channels = max(ends, default=self.observation_space.shape[0]
+                                ) - self.observation_space.shape[0]
+
+    def _ob_shape(self):
+        """Shape of one time step of the trial observation."""
+        shape = list(self.observation_space.shape)
+        if self._ob_channels:
+            shape[-1] += self._ob_channels
+        return shape
+
+    def _task_ob(self, ob):
+        """View of the task channels of a trial observation."""
+        if self._ob_channels:
+            return ob[..., :self.observation_space.shape[-1]]
+        return ob
+
+    def _trial_buffer(self, name, shape, dtype, value=0):
+        """Array of shape filled with value, for one trial.
+
+        If self.reuse_buffers, the array is a view of a buffer kept across
+        trials, with capacity rounded up to a power of two time steps.
+        """
+        dtype = np.dtype(dtype)
+        if not self.reuse_buffers:
+            return np.full(shape, value, dtype=dtype)
+
+        key = (name, tuple(shape[1:]), dtype)
+        buffer = self._buffers.get(key)
+        if buffer is None or buffer.shape[0] < shape[0]:
+            capacity = 1 << max(int(shape[0]) - 1, 0).bit_length()
+            buffer = np.empty([capacity] + list(shape[1:]), dtype=dtype)
+            self._buffers[key] = buffer
+        array = buffer[:shape[0]]
+        array[...] = value
+        return array
+
     def _init_ob(self):
         """Initialize trial info with tmax, tind, ob"""
         tmax_ind = int(self._tmax/self.dt)
-        ob_shape = [tmax_ind] + list(self.observation_space.shape)
+        ob_shape = [tmax_ind] + self._ob_shape()
         if self._default_ob_value is None:
-            self.ob = np.zeros(ob_shape, dtype=self.observation_space.dtype)
+            self.ob = self._trial_buffer('ob', ob_shape,
+                                         self.observation_space.dtype)
         else:
-            self.ob = np.full(ob_shape, self._default_ob_value,
-                              dtype=self.observation_space.dtype)
+            self.ob = self._trial_buffer('ob', ob_shape,
+                                         self.observation_space.dtype,
+                                         self._default_ob_value)
+            self.ob[..., self.observation_space.shape[-1]:] = 0
         self._ob_built = True
 
     def _init_gt(self):
         """Initialize trial with ground_truth."""
         tmax_ind = int(self._tmax / self.dt)
-        self.gt = np.zeros([tmax_ind] + list(self.action_space.shape),
-                           dtype=self.action_space.dtype)
+        self.gt = self._trial_buffer(
+            'gt', [tmax_ind] + list(self.action_space.shape),
+            self.action_space.dtype)
         self._gt_built = True
 
     def view_ob(self, period=None):
-        """View observation of an period."""
+        """View observation of an period, task channels only."""
         if not self._ob_built:
             self._init_ob()
 
+        ob = self._task_ob(self.ob)
         if period is None:
-            return self.ob
+            return ob
         else:
-            return self.ob[self.start_ind[period]:self.end_ind[period]]
+            return ob[self.start_ind[period]:self.end_ind[period]]
 
     def _add_ob(self, value, period=None, where=None, reset=False):
         """Set observation in period to value.
@@ -450,12 +942,59 @@ class TrialEnv(BaseEnv):
             self._init_gt()
         return self.gt[self.start_ind[period]:self.end_ind[period]]
 
+    def _build_period_table(self):
+        """Build the period id of each time step of the current trial.
+
+        Time steps outside all periods have id -1. If periods overlap, a
+        time step can't be described by a single id, and the table is set to
+        False so that in_period compares times instead.
+        """
+        for period in self.start_t:
+            if period not in self._period_index:
+                self._period_index[period] = len(self._period_names)
+                self._period_names.append(period)
+        dtype = np.int8 if len(self._period_names) < 127 else np.int16
+
+        t = np.arange(int(self._tmax / self.dt)) * self.dt
+        period_ids = np.full(len(t), -1, dtype=dtype)
+        for period in self.start_t:
+            in_period = (self.start_t[period] <= t) & (t < self.end_t[period])
+            if np.any(period_ids[in_period] != -1):
+                self._period_ids = self._period_list = False
+                return
+            period_ids[in_period] = self._period_index[period]
+        self._period_ids = period_ids
+        # Indexing a list is much faster than indexing a numpy array
+        self._period_list = period_ids.tolist()
+
     def in_period(self, period, t=None):
         """Check if current time or time t is in period"""
         if t is None:
+            period_ids = self._period_list
+            if period_ids is None:
+                self._build_period_table()
+                period_ids = self._period_list
+            if period_ids is not False:
+                try:
+                    return period_ids[self.t_ind] == self._period_index[period]
+                except IndexError:  # after the end of the trial
+                    return False
             t = self.t  # Default
         return self.start_t[period] <= t < self.end_t[period]
 
+    @property
+    def current_period(self):
+        """Name of the period of the current time step, None if no period."""
+        if self._period_list is None:
+            self._build_period_table()
+        if self._period_list is False:
+            periods = [p for p in self.start_t if self.in_period(p, self.t)]
+            return periods[0] if periods else None
+        if self.t_ind >= len(self._period_list):
+            return None
+        period_id = self._period_list[self.t_ind]
+        return None if period_id < 0 else self._period_names[period_id]
+
     @property
     def ob_now(self):
         return OBNOW
@@ -465,6 +1004,575 @@ class TrialEnv(BaseEnv):
         return self.gt[self.t_ind]
 
 
+def _readonly(array):
+    """Return a read-only view of array."""
+    array = array.view()
+    array.flags.writeable = False
+    return array
+
+
+class _ObBuffer(object):
+    """Preallocated observation returned by wrappers modifying observations.
+
+    The wrapper fills array at each step and returns output(copy_obs).
+    """
+
+    def __init__(self, shape, dtype):
+        self.array = np.zeros(shape, dtype=dtype)
+        self._readonly = _readonly(self.array)
+
+    def output(self, copy_obs=False):
+        if copy_obs:
+            return self.array.copy()
+        return self._readonly
+
+    def __getstate__(self):
+        # Copies of a view are not views, so rebuild it when copied
+        return {'array': self.array}
+
+    def __setstate__(self, state):
+        self.array = state['array']
+        self._readonly = _readonly(self.array)
+
+
+# Wrappers from gym that do not change what step returns
+_PASSIVE_WRAPPERS = tuple(
+    getattr(gym.wrappers, name) for name in ['OrderEnforcing',
+                                              'PassiveEnvChecker']
+    if hasattr(gym.wrappers, name))
+
+
+def _stepped_tasks(env, ob_channels=False):
+    """Return the tasks stepped by env, or None if a wrapper modifies step.
+
+    Args:
+        env: gym.Env object
+        ob_channels: bool, if True, also accept wrappers that only write
+            into their channels of the trial observation
+    """
+    while isinstance(env, gym.Wrapper):
+        if isinstance(env, TrialWrapper) and hasattr(env, 'envs'):
+            # MultiEnvs, ScheduleEnvs
+            tasks = list()
+            for sub_env in env.envs:
+                sub_tasks = _stepped_tasks(sub_env, ob_channels)
+                if sub_tasks is None:
+                    return None
+                tasks += sub_tasks
+            return tasks
+        owner = _defining_class(type(env), 'step')
+        if not (owner is gym.Wrapper or owner in _PASSIVE_WRAPPERS or
+                (ob_channels and
+                 getattr(env, '_ob_channel', None) is not None)):
+            return None
+        env = env.env
+
+    if not isinstance(env, TrialEnv):
+        return None
+    return [env]
+
+
+def _defining_class(cls, name):
+    """Return the class in the MRO of cls that defines attribute name."""
+    for klass in cls.__mro__:
+        if name in vars(klass):
+            return klass
+    return None
+
+
+def _rule_stepped(task):
+    """Check if task is stepped by a StandardDecisionRule.
+
+    Subclasses overriding _step are not stepped by their rule.
+    """
+    return (_defining_class(type(task), '_step') is TrialEnv and
+            isinstance(task.rule, StandardDecisionRule))
+
+
+def _same_scoring(task, other):
+    """Check if tasks stepped by their rule reward actions alike."""
+    return (task.rule == other.rule and task.rewards == other.rewards and
+            task.abort == other.abort and task.r_tmax == other.r_tmax and
+            task.dt == other.dt)
+
+
+def _score_actions(tasks, actions, trials):
+    """Score actions on trials of tasks, see TrialEnv.score_actions.
+
+    Args:
+        tasks: list of TrialEnv objects stepped by a StandardDecisionRule.
+            If there are several, trial i is of tasks[trials.trial['i_env']
+            [i]]
+        actions: array-like (n, T), actions of each trial
+        trials: TrialBatch or PackedBatch with period times
+    """
+    for task in tasks:
+        if not _rule_stepped(task):
+            raise ValueError('score_actions requires tasks stepped by a '
+                             'StandardDecisionRule')
+    if not trials.start_t:
+        raise ValueError('trials have no period times')
+    lengths = trials.lengths
+    n = len(lengths)
+    t_max = lengths.max() if n > 0 else 0
+    actions = np.asarray(actions)
+    if actions.shape[0] != n or actions.shape[1] < t_max:
+        raise ValueError('actions of shape ' + str(actions.shape) +
+                         ' do not cover ' + str(n) + ' trials of up to ' +
+                         str(t_max) + ' time steps')
+    if len(tasks) == 1:
+        i_env = np.zeros(n, dtype=int)
+    elif 'i_env' in trials.trial:
+        i_env = np.asarray(trials.trial['i_env'], dtype=int)
+    else:
+        raise ValueError('trials of several tasks need trial[\'i_env\']')
+
+    t_ind = np.arange(actions.shape[1])
+    valid = t_ind < lengths[:, None]
+    gt = np.zeros(valid.shape, dtype=trials.gt.dtype)
+    if isinstance(trials, TrialBatch):
+        gt[:, :t_max] = trials.gt
+    else:  # PackedBatch, concatenated along time
+        gt[valid] = trials.gt
+
+    reward = np.zeros(actions.shape)
+    new_trial = np.zeros(actions.shape, dtype=bool)
+    correct = np.zeros(actions.shape, dtype=bool)
+    r_tmax = np.zeros(n)
+    for i, task in enumerate(tasks):
+        rows = np.flatnonzero(i_env == i)
+        if len(rows) == 0:
+            continue
+        rule = task.rule
+        t = t_ind * task.dt
+        in_period = dict()
+        for period in [rule.fixation, rule.decision]:
+            # Missing periods have nan times and contain no time step
+            start = trials.start_t.get(period, np.full(n, np.nan))[rows]
+            end = trials.end_t.get(period, np.full(n, np.nan))[rows]
+            in_period[period] = (start[:, None] <= t) & (t < end[:, None])
+        reward[rows], new_trial[rows], correct[rows] = rule.evaluate(
+            task, actions[rows], gt[rows], in_period[rule.fixation],
+            in_period[rule.decision])
+        r_tmax[rows] = task.r_tmax
+
+    new_trial &= valid
+    ended = new_trial.any(axis=1)
+    end_ind = np.where(ended, new_trial.argmax(axis=1), lengths - 1)
+    reward[t_ind > end_ind[:, None]] = 0
+    timeout = np.flatnonzero(~ended & (lengths > 0))
+    reward[timeout, end_ind[timeout]] += r_tmax[timeout]
+    performance = (ended & correct[np.arange(n), end_ind]).astype(float)
+    return reward, end_ind, performance
+
+
+def _has_batched_trials(env):
+    """Check if the task of env can generate its trials in batches.
+
+    _new_trials is only used if it is defined alongside or below the class
+    defining _new_trial, so that subclasses overriding _new_trial do not
+    silently inherit a batched generator for a different task.
+    """
+    cls = type(env)
+    batched = _defining_class(cls, '_new_trials')
+    if batched is None or batched is TrialEnv:
+        return False
+    return issubclass(batched, _defining_class(cls, '_new_trial'))
+
+
+def _stack_trial_info(trials):
+    """Convert a list of trial dicts into a dict of arrays."""
+    keys = list()
+    for trial in trials:
+        keys += [key for key in trial if key not in keys]
+    info = dict()
+    for key in keys:
+        values = [trial.get(key) for trial in trials]
+        try:
+            info[key] = np.array(values)
+        except ValueError:  # ragged values
+            info[key] = np.empty(len(values), dtype=object)
+            info[key][:] = values
+    return info
+
+
+def _stack_trials(env, n, **kwargs):
+    """Generate n trials one at a time and collect them in a TrialBatch."""
+    trials, obs, gts, starts, ends = list(), list(), list(), list(), list()
+    for _ in range(n):
+        trials.append(env.new_trial(**kwargs))
+        # Copy, as the next trial may reuse the buffers of env.ob and env.gt
+        obs.append(env.ob.copy())
+        gts.append(env.gt.copy() if env.unwrapped._has_gt else None)
+        starts.append(dict(env.unwrapped.start_t))
+        ends.append(dict(env.unwrapped.end_t))
+
+    batch = TrialBatch(env.unwrapped, n)
+    batch.lengths = np.array([ob.shape[0] for ob in obs], dtype=int)
+    batch._tmax = batch.lengths * batch.dt
+    for period in set().union(*starts):
+        # Periods missing from a trial are empty, never containing any t
+        start = np.array([s.get(period, np.nan) for s in starts], dtype=float)
+        end = np.array([e.get(period, np.nan) for e in ends], dtype=float)
+        batch.start_t[period], batch.end_t[period] = start, end
+        batch.start_ind[period] = np.where(
+            np.isnan(start), 0, start / batch.dt).astype(int)
+        batch.end_ind[period] = np.where(
+            np.isnan(end), 0, end / batch.dt).astype(int)
+    t_max = batch.lengths.max() if n > 0 else 0
+    batch.ob = np.zeros((n, t_max) + obs[0].shape[1:], dtype=obs[0].dtype)
+    batch._ob_built = True
+    for i, ob in enumerate(obs):
+        batch.ob[i, :ob.shape[0]] = ob
+    if any(gt is not None for gt in gts):
+        batch._init_gt()
+        for i, gt in enumerate(gts):
+            if gt is not None:
+                batch.gt[i, :gt.shape[0]] = gt
+    batch.trial = _stack_trial_info(trials)
+    return batch
+
+
+def _merge_batches(env, batches, index):
+    """Merge TrialBatch objects into one batch of trials of env.
+
+    Args:
+        env: TrialEnv or TrialWrapper object generating the merged trials
+        batches: list of TrialBatch objects
+        index: list of int arrays, positions of the trials of each batch in
+            the merged batch
+
+    Returns:
+        batch: TrialBatch object
+    """
+    n = sum(len(ind) for ind in index)
+    batch = TrialBatch(env.unwrapped, n)
+    parts = [(b, ind) for b, ind in zip(batches, index) if len(ind) > 0]
+    for b, ind in parts:
+        batch.lengths[ind] = b.lengths
+    batch._tmax = batch.lengths * batch.dt
+
+    for period in set().union(*[b.start_t for b, _ in parts]):
+        # Periods missing from a task are empty, never containing any t
+        start, end = np.full(n, np.nan), np.full(n, np.nan)
+        start_ind, end_ind = np.zeros(n, dtype=int), np.zeros(n, dtype=int)
+        for b, ind in parts:
+            if period in b.start_t:
+                start[ind], end[ind] = b.start_t[period], b.end_t[period]
+                start_ind[ind] = b.start_ind[period]
+                end_ind[ind] = b.end_ind[period]
+        batch.start_t[period], batch.end_t[period] = start, end
+        batch.start_ind[period], batch.end_ind[period] = start_ind, end_ind
+
+    t_max = batch.lengths.max() if n > 0 else 0
+    b0 = parts[0][0]
+    batch.ob = np.zeros((n, t_max) + b0.ob.shape[2:], dtype=b0.ob.dtype)
+    batch._ob_built = True
+    for b, ind in parts:
+        batch.ob[ind, :b.ob.shape[1]] = b.ob
+    if any(b._gt_built for b, _ in parts):
+        batch._init_gt()
+        for b, ind in parts:
+            if b._gt_built:
+                batch.gt[ind, :b.gt.shape[1]] = b.gt
+
+    keys = list()
+    for b, _ in parts:
+        keys += [key for key in b.trial if key not in keys]
+    for key in keys:
+        values = [np.asarray(b.trial[key]) for b, _ in parts
+                  if key in b.trial]
+        if len(values) == len(parts):
+            try:
+                # Same promotion as trial dicts stacked by _stack_trial_info
+                value = np.concatenate(values)
+            except ValueError:  # ragged values
+                value = None
+            if value is not None and value.dtype != object:
+                batch.trial[key] = np.empty_like(value)
+                batch.trial[key][np.concatenate([ind for _, ind in parts])] = \
+                    value
+                continue
+        batch.trial[key] = np.empty(n, dtype=object)
+        for b, ind in parts:
+            if key in b.trial:
+                for i, val in zip(ind, b.trial[key]):
+                    batch.trial[key][i] = val
+    return batch
+
+
+class TrialBatch(object):
+    """A batch of trials stored in zero-padded arrays.
+
+    Returned by TrialEnv.new_trials. It also provides batched versions of the
+    period, observation and ground truth helpers of TrialEnv, used by tasks
+    implementing _new_trials. Every period has one start and one end time per
+    trial, and values can be either shared by all trials or given per trial
+    along a leading axis of length n.
+
+    Args:
+        env: TrialEnv object generating the trials
+        n: int, number of trials
+
+    Attributes:
+        ob: np array (n, T_max, ob_space.shape...), observations
+        gt: np array (n, T_max, action_space.shape...), ground truth
+        lengths: np array (n,), number of time steps of each trial
+        trial: dict of np arrays, trial information with one entry per trial
+    """
+
+    def __init__(self, env, n):
+        self.env = env
+        self.n = n
+        self.dt = env.dt
+        self.trial = dict()
+        self.start_t = dict()
+        self.end_t = dict()
+        self.start_ind = dict()
+        self.end_ind = dict()
+        self._tmax = np.zeros(n)
+        self.lengths = np.zeros(n, dtype=int)
+        self.ob = None
+        self.gt = None
+        self._ob_built = False
+        self._gt_built = False
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def tmax(self):
+        return (self._tmax / self.dt).astype(int) * self.dt
+
+    def add_period(self, period, duration=None, before=None, after=None):
+        """Add a period to all trials.
+
+        Args:
+            period: string or list of strings, name of the period
+            duration: float, np array (n,) or None, duration of the period
+                if None, sampled from the env timing
+            before: (optional) str, name of period that this period is before
+            after: (optional) str, name of period that this period is after
+                or float or np array (n,), time of period start
+        """
+        assert not self._ob_built, 'Cannot add period after ob ' \
+                                   'is built, i.e. after running add_ob'
+        if not isinstance(period, str):
+            if duration is None:
+                duration = [None] * len(period)
+            else:
+                assert len(duration) == len(period),\
+                    'duration and period must have same length'
+
+            self.add_period(period[0], duration=duration[0], after=after)
+            for i in range(1, len(period)):
+                self.add_period(period[i], duration=duration[i],
+                                after=period[i - 1])
+            return
+
+        if duration is None:
+            duration = self.env.sample_times(period, self.n, tmax=self.tmax)
+        duration = np.broadcast_to(np.asarray(duration, dtype=float), self.n)
+
+        if after is not None:
+            if isinstance(after, str):
+                start = self.end_t[after]
+            else:
+                start = np.broadcast_to(np.asarray(after, dtype=float), self.n)
+        elif before is not None:
+            start = self.start_t[before] - duration
+        else:
+            start = np.zeros(self.n)
+
+        self.start_t[period] = start
+        self.end_t[period] = start + duration
+        self.start_ind[period] = (start / self.dt).astype(int)
+        self.end_ind[period] = ((start + duration) / self.dt).astype(int)
+        self._tmax = np.maximum(self._tmax, start + duration)
+        self.lengths = (self._tmax / self.dt).astype(int)
+
+    def _init_ob(self):
+        """Initialize the padded observation of all trials."""
+        space = self.env.observation_space
+        ob_shape = [self.n, self.lengths.max()] + self.env._ob_shape()
+        if self.env._default_ob_value is None:
+            self.ob = np.zeros(ob_shape, dtype=space.dtype)
+        else:
+            self.ob = np.full(ob_shape, self.env._default_ob_value,
+                              dtype=space.dtype)
+            self.ob[..., space.shape[-1]:] = 0
+        self._ob_built = True
+
+    def _init_gt(self):
+        """Initialize the padded ground truth of all trials."""
+        space = self.env.action_space
+        self.gt = np.zeros([self.n, self.lengths.max()] + list(space.shape),
+                           dtype=space.dtype)
+        self._gt_built = True
+
+    def period_mask(self, period=None):
+        """Boolean array (n, T_max), True for the time steps in period."""
+        t_ind = np.arange(self.lengths.max())
+        if period is None:
+            return t_ind < self.lengths[:, None]
+        return ((t_ind >= self.start_ind[period][:, None]) &
+                (t_ind < self.end_ind[period][:, None]))
+
+    def _where(self, where):
+        """Convert where into an index of the last axis of ob."""
+        if isinstance(where, str):
+            where = self.env.observation_space.name[where]
+        if isinstance(where, range) and where.step == 1:
+            where = slice(where.start, where.stop)  # view instead of copy
+        return where
+
+    def _broadcast(self, value, mask, target_ndim, dtype):
+        """Broadcast value, shared or per trial, to the time steps in mask.
+
+        Returns an array broadcastable to (n, T_max) + target shape that is
+        zero outside mask.
+        """
+        value = np.asarray(value, dtype=dtype)
+        if value.ndim > target_ndim:  # one value per trial
+            value = value.reshape((self.n, 1) + value.shape[1:])
+        mask = mask.reshape(mask.shape + (1,) * target_ndim)
+        return np.where(mask, value, 0).astype(dtype, copy=False)
+
+    def _add_ob(self, value, period=None, where=None, reset=False):
+        if not (isinstance(period, str) or period is None):
+            for p in period:
+                self._add_ob(value, p, where, reset=reset)
+            return
+
+        if not self._ob_built:
+            self._init_ob()
+        mask = self.period_mask(period)
+        index = (Ellipsis,) if where is None else (Ellipsis, self._where(where))
+        task_ob = self.env._task_ob(self.ob)
+        ob = task_ob[index]
+        target_ndim = ob.ndim - 2
+        if reset:
+            ob[mask] = 0
+        ob += self._broadcast(value, mask, target_ndim, self.ob.dtype)
+        if where is not None and not isinstance(index[1], (slice, int)):
+            task_ob[index] = ob  # fancy indexing returned a copy
+
+    def add_ob(self, value, period=None, where=None):
+        """Add value to observation of all trials.
+
+        Args:
+            value: array-like (ob_space.shape, ...), shared by all trials, or
+                (n, ob_space.shape, ...), one value per trial
+            period: string, must be name of an added period
+            where: string or np array, location of stimulus to be added
+        """
+        self._add_ob(value, period, where, reset=False)
+
+    def set_ob(self, value, period=None, where=None):
+        self._add_ob(value, period, where, reset=True)
+
+    def add_randn(self, mu=0, sigma=1, period=None, where=None):
+        """Add Gaussian noise to observation of all trials.
+
+        Args:
+            mu: float or np array (n,), mean of the noise of each trial
+            sigma: float or np array (n,), std of the noise of each trial
+            period: string, list of strings or None, name of the period
+            where: string or np array, location of the noise
+        """
+        if not (isinstance(period, str) or period is None):
+            for p in period:
+                self.add_randn(mu, sigma, p, where)
+            return
+
+        if not self._ob_built:
+            self._init_ob()
+        mask = self.period_mask(period)
+        index = (Ellipsis,) if where is None else (Ellipsis, self._where(where))
+        task_ob = self.env._task_ob(self.ob)
+        ob = task_ob[index]
+        noise = self.env.rng.randn(*((mask.sum(),) + ob.shape[2:]))
+        if np.ndim(mu) > 0 or np.ndim(sigma) > 0:
+            # One value per trial, repeated over its time steps in mask
+            counts = mask.sum(axis=1)
+            trailing = (1,) * (noise.ndim - 1)
+            mu = np.repeat(np.broadcast_to(mu, self.n), counts)
+            sigma = np.repeat(np.broadcast_to(sigma, self.n), counts)
+            mu = mu.reshape((-1,) + trailing)
+            sigma = sigma.reshape((-1,) + trailing)
+        ob[mask] += mu + noise * sigma
+        if where is not None and not isinstance(index[1], (slice, int)):
+            task_ob[index] = ob
+
+    def update_trial(self, trial, kwargs):
+        """Update trial with the kwargs of new_trials.
+
+        Scalars are shared by all trials, arrays have one entry per trial.
+
+        Args:
+            trial: dict of np arrays, each with one entry per trial
+            kwargs: dict, trial information given to new_trials
+        """
+        for key, val in kwargs.items():
+            val = np.asarray(val)
+            if val.ndim == 0:
+                val = np.full(self.n, val)
+            trial[key] = val
+        return trial
+
+    def set_groundtruth(self, value, period=None, where=None):
+        """Set groundtruth value of all trials.
+
+        Args:
+            value: scalar or array-like, shared by all trials, or np array
+                (n, ...), one value per trial
+            period: string, list of strings or None, name of the period
+            where: (optional) string, name of the action space dimension
+        """
+        if not self._gt_built:
+            self._init_gt()
+
+        if where is not None:
+            value = np.asarray(self.env.action_space.name[where])[value]
+        if not (isinstance(period, str) or period is None):
+            for p in period:
+                self.set_groundtruth(value, p)
+            return
+
+        mask = self.period_mask(period)
+        target_ndim = self.gt.ndim - 2
+        value = np.asarray(value, dtype=self.gt.dtype)
+        if value.ndim > target_ndim:
+            value = value.reshape((self.n, 1) + value.shape[1:])
+        value = np.broadcast_to(value, self.gt.shape)
+        self.gt[mask] = value[mask]
+
+    def finalize(self):
+        """Zero the padding of ob and build the trial arrays if missing."""
+        if not self._ob_built:
+            self._init_ob()
+        if self.env._default_ob_value is not None:
+            self.ob[~self.period_mask()] = 0
+
+    def concatenate(self):
+        """Concatenate the trials of the batch along time, without padding.
+
+        Returns:
+            ob: np array (sum(lengths), ob_space.shape...)
+            gt: np array (sum(lengths), action_space.shape...) or None
+        """
+        valid = self.period_mask()
+        gt = self.gt[valid] if self._gt_built else None
+        return self.ob[valid], gt
+
+    def get_trial(self, i):
+        """Return the trial dict, ob and gt of the i-th trial."""
+        length = self.lengths[i]
+        trial = {key: val[i] for key, val in self.trial.items()}
+        gt = self.gt[i, :length] if self._gt_built else None
+        return trial, self.ob[i, :length], gt
+
+
 class TrialWrapper(gym.Wrapper):
     """Base class for wrapping TrialEnv"""
 
@@ -483,3 +1591,52 @@ class TrialWrapper(gym.Wrapper):
 
     def new_trial(self, **kwargs):
         raise NotImplementedError
+
+    def new_trials(self, n, **kwargs):
+        """Generate n new trials, applying this wrapper to each of them.
+
+        Wrappers that do not modify new_trial can forward to
+        self.env.new_trials to keep the batched generator of the task.
+        """
+        return _stack_trials(self, n, **kwargs)
+
+    def score_actions(self, actions, trials):
+        """Score actions on a batch of trials of the wrapped task(s).
+
+        See TrialEnv.score_actions. Requires wrappers that don't modify
+        step. With several tasks, e.g. ScheduleEnvs, trial['i_env'] gives
+        the task of each trial.
+        """
+        if _stepped_tasks(self) is None:
+            raise ValueError('score_actions requires wrappers that do not '
+                             'modify step')
+        env = self
+        while not hasattr(env, 'envs') and isinstance(env, gym.Wrapper):
+            env = env.env
+        tasks = list()
+        for sub_env in getattr(env, 'envs', [env]):
+            # Tasks of a nested schedule are indistinguishable from trials,
+            # so they must be scored alike
+            sub_tasks = _stepped_tasks(sub_env)
+            if not all(_rule_stepped(task) for task in sub_tasks):
+                raise ValueError('score_actions requires tasks stepped by a '
+                                 'StandardDecisionRule')
+            if not all(_same_scoring(task, sub_tasks[0])
+                       for task in sub_tasks[1:]):
+                raise ValueError('score_actions requires the tasks of each '
+                                 'env to share their reward logic')
+            tasks.append(sub_tasks[0])
+        return _score_actions(tasks, actions, trials)
+
+    @property
+    def batched_trials(self):
+        """True if new_trials uses a batched generator of the task."""
+        return False
+
+    def add_ob_channels(self, n, owner):
+        """Add n observation channels to the task, see TrialEnv."""
+        return self.env.add_ob_channels(n, owner)
+
+    def remove_ob_channels(self, owner):
+        """Release the observation channels of owner, see TrialEnv."""
+        self.env.remove_ob_channels(owner)
@@ -4,6 +4,7 @@ import numpy as np
 
 import neurogym as ngym
 from neurogym import spaces
+from neurogym.utils import stimuli
 
 
 class AntiReach(ngym.TrialEnv):
@@ -45,6 +46,7 @@ class AntiReach(ngym.TrialEnv):
             self.timing.update(timing)
 
         self.abort = False
+        self.rule = ngym.StandardDecisionRule()
 
         # action and observation spaces
         self.dim_ring = dim_ring
@@ -77,31 +79,9 @@ class AntiReach(ngym.TrialEnv):
         self.add_period(periods)
 
         self.add_ob(1, period=['fixation', 'stimulus', 'delay'], where='fixation')
-        stim = np.cos(self.theta - stim_theta)
+        stim = stimuli.ring_stimulus(stim_theta, self.dim_ring)
         self.add_ob(stim, 'stimulus', where='stimulus')
 
         self.set_groundtruth(ground_truth, period='decision', where='choice')
 
         return trial
-
-    def _step(self, action):
-        new_trial = False
-        # rewards
-        reward = 0
-        gt = self.gt_now
-        # observations
-        if self.in_period('fixation'):
-            if action != 0:  # action = 0 means fixating
-                new_trial = self.abort
-                reward += self.rewards['abort']
-        elif self.in_period('decision'):
-            if action != 0:
-                new_trial = True
-                if action == gt:
-                    reward += self.rewards['correct']
-                    self.performance = 1
-                else:
-                    reward += self.rewards['fail']
-
-        return self.ob_now, reward, False, {'new_trial': new_trial, 'gt': gt}
-
@@ -25,8 +25,14 @@ def _collection_from_file(fname):
 
 
 def get_collection(collection):
+    from neurogym.envs.manifest import ENVS
+    envs = [env_id for env_id, spec in ENVS.items()
+            if spec['group'] == 'collections' and
+            env_id.startswith(collection + '.')]
     if collection == '':
         return []  # placeholder for named collections
+    elif envs:
+        return envs
     else:
         try:
             return _collection_from_file(collection)
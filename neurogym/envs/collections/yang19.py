@@ -6,19 +6,12 @@ import gym
 import neurogym as ngym
 from neurogym import spaces
 from neurogym.wrappers.block import ScheduleEnvs
-from neurogym.utils import scheduler
+from neurogym.utils import scheduler, stimuli
 from neurogym.core import TrialWrapper
 
 
-def _get_dist(original_dist):
-    '''Get the distance in periodic boundary conditions'''
-    return np.minimum(abs(original_dist), 2 * np.pi - abs(original_dist))
-
-
-def _gaussianbump(loc, theta, strength):
-    dist = _get_dist(loc - theta)  # periodic boundary
-    dist /= np.pi / 8
-    return 0.8 * np.exp(-dist ** 2 / 2) * strength
+def _gaussianbump(loc, dim_ring, strength):
+    return 0.8 * stimuli.ring_stimulus(loc, dim_ring, 'gaussian') * strength
 
 
 def _cosinebump(loc, theta, strength):
@@ -45,6 +38,14 @@ class _MultiModalityStimulus(TrialWrapper):
     def new_trial(self, **kwargs):
         return self.env.new_trial(**kwargs)
 
+    def new_trials(self, n, **kwargs):
+        # Trials are only moved by the observation space of the task
+        return self.env.new_trials(n, **kwargs)
+
+    @property
+    def batched_trials(self):
+        return self.env.batched_trials
+
 
 class _Reach(ngym.TrialEnv):
     """Anti-response task.
@@ -80,11 +81,16 @@ class _Reach(ngym.TrialEnv):
             self.timing.update(timing)
 
         self.abort = False
+        self.rule = ngym.StandardDecisionRule()
 
         # action and observation spaces
         self.dim_ring = dim_ring
         self.theta = np.arange(0, 2 * np.pi, 2 * np.pi / dim_ring)
         self.choices = np.arange(dim_ring)
+        # Stimulus of each ground truth, (dim_ring, dim_ring)
+        self._bumps = _gaussianbump(self.theta, dim_ring, 1)
+        self._bumps_anti = _gaussianbump(
+            np.mod(self.theta + np.pi, 2*np.pi), dim_ring, 1)
 
         name = {'fixation': 0, 'stimulus': range(1, dim_ring + 1)}
         self.observation_space = spaces.Box(
@@ -103,10 +109,9 @@ class _Reach(ngym.TrialEnv):
 
         ground_truth = trial['ground_truth']
         if trial['anti']:
-            stim_theta = np.mod(self.theta[ground_truth] + np.pi, 2*np.pi)
+            stim = self._bumps_anti[ground_truth]
         else:
-            stim_theta = self.theta[ground_truth]
-        stim = _gaussianbump(stim_theta, self.theta, 1)
+            stim = self._bumps[ground_truth]
 
         if not self.reaction:
             periods = ['fixation', 'stimulus', 'delay', 'decision']
@@ -125,26 +130,34 @@ class _Reach(ngym.TrialEnv):
 
         return trial
 
-    def _step(self, action):
-        new_trial = False
-        # rewards
-        reward = 0
-        gt = self.gt_now
-        # observations
-        if self.in_period('fixation'):
-            if action != 0:  # action = 0 means fixating
-                new_trial = self.abort
-                reward += self.rewards['abort']
-        elif self.in_period('decision'):
-            if action != 0:
-                new_trial = True
-                if action == gt:
-                    reward += self.rewards['correct']
-                    self.performance = 1
-                else:
-                    reward += self.rewards['fail']
-
-        return self.ob_now, reward, False, {'new_trial': new_trial, 'gt': gt}
+    def _new_trials(self, batch, **kwargs):
+        trial = {
+            'ground_truth': self.rng.choice(self.choices, batch.n),
+            'anti': np.full(batch.n, self.anti),
+        }
+        batch.update_trial(trial, kwargs)
+
+        ground_truth = trial['ground_truth']
+        stim = np.where(trial['anti'][:, None], self._bumps_anti[ground_truth],
+                        self._bumps[ground_truth])
+
+        if not self.reaction:
+            periods = ['fixation', 'stimulus', 'delay', 'decision']
+            batch.add_period(periods)
+
+            batch.add_ob(1, period=['fixation', 'stimulus', 'delay'],
+                         where='fixation')
+            batch.add_ob(stim, 'stimulus', where='stimulus')
+        else:
+            periods = ['fixation', 'decision']
+            batch.add_period(periods)
+
+            batch.add_ob(1, period='fixation', where='fixation')
+            batch.add_ob(stim, 'decision', where='stimulus')
+
+        batch.set_groundtruth(ground_truth, period='decision', where='choice')
+
+        return trial
 
 
 class _DMFamily(ngym.TrialEnv):
@@ -191,6 +204,7 @@ class _DMFamily(ngym.TrialEnv):
             self.timing.update(timing)
 
         self.abort = False
+        self.rule = ngym.StandardDecisionRule()
 
         # action and observation space
         self.theta = np.linspace(0, 2*np.pi, dim_ring+1)[:-1]
@@ -198,6 +212,8 @@ class _DMFamily(ngym.TrialEnv):
 
         if dim_ring < 2:
             raise ValueError('dim ring can not be smaller than 2')
+        # Stimulus of unit strength at each angle, (dim_ring, dim_ring)
+        self._bumps = _gaussianbump(self.theta, dim_ring, 1)
 
         name = {
             'fixation': 0,
@@ -225,10 +241,10 @@ class _DMFamily(ngym.TrialEnv):
             trial['coh2' + mod] = coh2 = 0.5 - coh / 2
 
         # stim = cosinebump(trial['theta1'], self.theta, coh1)
-        stim = _gaussianbump(trial['theta1'], self.theta, coh1)
+        stim = _gaussianbump(trial['theta1'], len(self.theta), coh1)
         self.add_ob(stim, period1, where='stimulus' + mod)
         # stim = cosinebump(trial['theta2'], self.theta, coh2)
-        stim = _gaussianbump(trial['theta2'], self.theta, coh2)
+        stim = _gaussianbump(trial['theta2'], len(self.theta), coh2)
         self.add_ob(stim, period2, where='stimulus' + mod)
 
     def _new_trial(self, **kwargs):
@@ -270,29 +286,69 @@ class _DMFamily(ngym.TrialEnv):
 
         return trial
 
-    def _step(self, action):
-        # ---------------------------------------------------------------------
-        # Reward and inputs
-        # ---------------------------------------------------------------------
-        new_trial = False
-        gt = self.gt_now
-        ob = self.ob_now
-        # rewards
-        reward = 0
-        if self.in_period('fixation'):
-            if action != 0:
-                new_trial = self.abort
-                reward = self.rewards['abort']
-        elif self.in_period('decision'):
-            if action != 0:
-                new_trial = True
-                if action == gt:
-                    reward = self.rewards['correct']
-                    self.performance = 1
-                else:
-                    reward = self.rewards['fail']
-
-        return ob, reward, False, {'new_trial': new_trial, 'gt': gt}
+    def _add_singlemod_batch(self, batch, trial, i_theta1, i_theta2, mod=1):
+        """Add stimulus to modality for all trials of batch."""
+        mod = '_mod' + str(mod)
+        n = batch.n
+
+        cohs = np.asarray(self.cohs)
+        if self.delaycomparison:
+            period1, period2 = 'stim1', 'stim2'
+            # Two different coherences, as choice(cohs, 2, replace=False)
+            i_coh1 = self.rng.integers(len(cohs), size=n)
+            i_coh2 = i_coh1 + self.rng.integers(1, len(cohs), size=n)
+            i_coh2 %= len(cohs)
+            coh1, coh2 = cohs[i_coh1], cohs[i_coh2]
+        else:
+            period1, period2 = 'stimulus', 'stimulus'
+            coh = self.rng.choice(cohs, n) * self.rng.choice([-1, +1], n)
+            coh1, coh2 = 0.5 + coh / 2, 0.5 - coh / 2
+        trial['coh1' + mod] = coh1
+        trial['coh2' + mod] = coh2
+
+        batch.add_ob(self._bumps[i_theta1] * coh1[:, None], period1,
+                     where='stimulus' + mod)
+        batch.add_ob(self._bumps[i_theta2] * coh2[:, None], period2,
+                     where='stimulus' + mod)
+
+    def _new_trials(self, batch, **kwargs):
+        n = batch.n
+        trial = {}
+        i_theta1 = self.rng.choice(self.choices, n)
+        # Uniform among the other angles
+        i_theta2 = (i_theta1 + self.rng.integers(1, len(self.choices), size=n)
+                    ) % len(self.choices)
+        trial['theta1'] = self.theta[i_theta1]
+        trial['theta2'] = self.theta[i_theta2]
+
+        if self.delaycomparison:
+            periods = ['fixation', 'stim1', 'delay', 'stim2', 'decision']
+        else:
+            periods = ['fixation', 'stimulus', 'decision']
+        batch.add_period(periods)
+
+        batch.add_ob(1, where='fixation')
+        batch.set_ob(0, 'decision')
+        if self.delaycomparison:
+            batch.add_randn(0, self.sigma, ['stim1', 'stim2'])
+        else:
+            batch.add_randn(0, self.sigma, ['stimulus'])
+
+        coh1, coh2 = np.zeros(n), np.zeros(n)
+        if self.stim_mod1:
+            self._add_singlemod_batch(batch, trial, i_theta1, i_theta2, mod=1)
+            coh1 += self.w_mod1 * trial['coh1_mod1']
+            coh2 += self.w_mod1 * trial['coh2_mod1']
+        if self.stim_mod2:
+            self._add_singlemod_batch(batch, trial, i_theta1, i_theta2, mod=2)
+            coh1 += self.w_mod2 * trial['coh1_mod2']
+            coh2 += self.w_mod2 * trial['coh2_mod2']
+
+        i_target = np.where(coh1 + self.rng.uniform(-1e-6, 1e-6, n) > coh2,
+                            i_theta1, i_theta2)
+        batch.set_groundtruth(i_target, period='decision', where='choice')
+
+        return trial
 
 
 class _DelayMatch1DResponse(ngym.TrialEnv):
@@ -340,12 +396,15 @@ class _DelayMatch1DResponse(ngym.TrialEnv):
             self.timing.update(timing)
 
         self.abort = False
+        self.rule = ngym.StandardDecisionRule()
 
         if np.mod(dim_ring, 2) != 0:
             raise ValueError('dim ring should be an even number')
         self.dim_ring = dim_ring
         self.half_ring = int(self.dim_ring/2)
         self.theta = np.linspace(0, 2 * np.pi, dim_ring + 1)[:-1]
+        # Stimulus at each angle, (dim_ring, dim_ring)
+        self._bumps = _gaussianbump(self.theta, dim_ring, 1)
 
         name = {'fixation': 0, 'stimulus': range(1, dim_ring + 1)}
         self.observation_space = spaces.Box(
@@ -381,8 +440,8 @@ class _DelayMatch1DResponse(ngym.TrialEnv):
         trial['sample_theta'] = sample_theta = self.theta[i_sample_theta]
         trial['test_theta'] = test_theta = self.theta[i_test_theta]
 
-        stim_sample = _gaussianbump(sample_theta, self.theta, 1)
-        stim_test = _gaussianbump(test_theta, self.theta, 1)
+        stim_sample = self._bumps[i_sample_theta]
+        stim_test = self._bumps[i_test_theta]
 
         # Periods
         self.add_period(['fixation', 'sample', 'delay', 'test', 'decision'])
@@ -401,27 +460,43 @@ class _DelayMatch1DResponse(ngym.TrialEnv):
 
         return trial
 
-    def _step(self, action, **kwargs):
-        new_trial = False
-
-        ob = self.ob_now
-        gt = self.gt_now
-
-        reward = 0
-        if self.in_period('fixation'):
-            if action != 0:
-                new_trial = self.abort
-                reward = self.rewards['abort']
-        elif self.in_period('decision'):
-            if action != 0:
-                new_trial = True
-                if action == gt:
-                    reward = self.rewards['correct']
-                    self.performance = 1
-                else:
-                    reward = self.rewards['fail']
-
-        return ob, reward, False, {'new_trial': new_trial, 'gt': gt}
+    def _new_trials(self, batch, **kwargs):
+        n = batch.n
+        trial = {
+            'ground_truth': self.rng.choice(self.choices, n),
+        }
+        batch.update_trial(trial, kwargs)
+
+        match = trial['ground_truth'] == 'match'
+        i_sample_theta = self.rng.choice(self.dim_ring, n)
+        if self.matchto == 'category':
+            sample_category = (i_sample_theta > self.half_ring) * 1
+            test_category = np.where(match, sample_category,
+                                     1 - sample_category)
+            i_test_theta = self.rng.choice(self.half_ring, n)
+            i_test_theta += test_category * self.half_ring
+        else:  # match to sample
+            i_test_theta = np.where(
+                match, i_sample_theta,
+                np.mod(i_sample_theta + self.half_ring, self.dim_ring))
+
+        trial['sample_theta'] = self.theta[i_sample_theta]
+        trial['test_theta'] = self.theta[i_test_theta]
+
+        batch.add_period(['fixation', 'sample', 'delay', 'test', 'decision'])
+
+        batch.add_ob(1, where='fixation')
+        batch.set_ob(0, 'decision', where='fixation')
+        batch.add_ob(self._bumps[i_sample_theta], 'sample', where='stimulus')
+        batch.add_ob(self._bumps[i_test_theta], 'test', where='stimulus')
+        batch.add_randn(0, self.sigma, ['sample', 'test'], where='stimulus')
+
+        # Go to the test stimulus, or keep fixating
+        choice = np.asarray(self.action_space.name['choice'])[i_test_theta]
+        go = match == self.matchgo
+        batch.set_groundtruth(np.where(go, choice, 0), period='decision')
+
+        return trial
 
 
 def _reach(**kwargs):
@@ -4,6 +4,7 @@ import numpy as np
 
 import neurogym as ngym
 from neurogym import spaces
+from neurogym.utils import stimuli
 
 
 class SingleContextDecisionMaking(ngym.TrialEnv):
@@ -54,6 +55,7 @@ class SingleContextDecisionMaking(ngym.TrialEnv):
             self.timing.update(timing)
 
         self.abort = False
+        self.rule = ngym.StandardDecisionRule(fail=False)
 
         # set action and observation space
         self.theta = np.linspace(0, 2 * np.pi, dim_ring + 1)[:-1]
@@ -87,8 +89,6 @@ class SingleContextDecisionMaking(ngym.TrialEnv):
             choice_1, choice_0 = choice_0, choice_1
         coh_0, coh_1 = trial['coh_0'], trial['coh_1']
 
-        stim_theta_0 = self.theta[choice_0]
-        stim_theta_1 = self.theta[choice_1]
         ground_truth = trial['ground_truth']
 
         # Periods
@@ -96,9 +96,10 @@ class SingleContextDecisionMaking(ngym.TrialEnv):
         self.add_period(periods)
 
         self.add_ob(1, where='fixation')
-        stim = np.cos(self.theta - stim_theta_0) * (coh_0 / 200) + 0.5
+        cos = stimuli.table(len(self.theta))
+        stim = cos[choice_0] * (coh_0 / 200) + 0.5
         self.add_ob(stim, 'stimulus', where='stimulus_mod1')
-        stim = np.cos(self.theta - stim_theta_1) * (coh_1 / 200) + 0.5
+        stim = cos[choice_1] * (coh_1 / 200) + 0.5
         self.add_ob(stim, 'stimulus', where='stimulus_mod2')
         self.add_randn(0, self.sigma, 'stimulus')
         self.set_ob(0, 'decision')
@@ -107,25 +108,6 @@ class SingleContextDecisionMaking(ngym.TrialEnv):
 
         return trial
 
-    def _step(self, action):
-        ob = self.ob_now
-        gt = self.gt_now
-
-        new_trial = False
-        reward = 0
-        if self.in_period('fixation'):
-            if action != 0:
-                new_trial = self.abort
-                reward = self.rewards['abort']
-        elif self.in_period('decision'):
-            if action != 0:  # broke fixation
-                new_trial = True
-                if action == gt:
-                    reward = self.rewards['correct']
-                    self.performance = 1
-
-        return ob, reward, False, {'new_trial': new_trial, 'gt': gt}
-
 
 class ContextDecisionMaking(ngym.TrialEnv):
     """Context-dependent decision-making task.
@@ -168,6 +150,7 @@ class ContextDecisionMaking(ngym.TrialEnv):
             self.timing.update(timing)
 
         self.abort = False
+        self.rule = ngym.StandardDecisionRule(fail=False)
 
         # set action and observation space
         names = ['fixation', 'stim1_mod1', 'stim2_mod1',
@@ -222,22 +205,3 @@ class ContextDecisionMaking(ngym.TrialEnv):
         self.set_groundtruth(trial['ground_truth'], 'decision')
 
         return trial
-
-    def _step(self, action):
-        ob = self.ob_now
-        gt = self.gt_now
-
-        new_trial = False
-        reward = 0
-        if self.in_period('fixation'):
-            if action != 0:
-                new_trial = self.abort
-                reward = self.rewards['abort']
-        elif self.in_period('decision'):
-            if action != 0:  # broke fixation
-                new_trial = True
-                if action == gt:
-                    reward = self.rewards['correct']
-                    self.performance = 1
-
-        return ob, reward, False, {'new_trial': new_trial, 'gt': gt}
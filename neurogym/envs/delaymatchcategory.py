@@ -5,6 +5,7 @@ import numpy as np
 
 import neurogym as ngym
 from neurogym import spaces
+from neurogym.utils import stimuli
 
 
 class DelayMatchCategory(ngym.TrialEnv):
@@ -76,8 +77,9 @@ class DelayMatchCategory(ngym.TrialEnv):
         sample_theta = (sample_category + self.rng.rand()) * np.pi
         test_theta = (test_category + self.rng.rand()) * np.pi
 
-        stim_sample = np.cos(self.theta - sample_theta) * 0.5 + 0.5
-        stim_test = np.cos(self.theta - test_theta) * 0.5 + 0.5
+        dim_ring = len(self.theta)
+        stim_sample = stimuli.ring_stimulus(sample_theta, dim_ring) * 0.5 + 0.5
+        stim_test = stimuli.ring_stimulus(test_theta, dim_ring) * 0.5 + 0.5
 
         # Periods
         periods = ['fixation', 'sample', 'first_delay', 'test']
@@ -5,6 +5,7 @@ import numpy as np
 
 import neurogym as ngym
 from neurogym import spaces
+from neurogym.utils import stimuli
 
 
 class DelayMatchSample(ngym.TrialEnv):
@@ -72,8 +73,9 @@ class DelayMatchSample(ngym.TrialEnv):
             test_theta = np.mod(sample_theta + np.pi, 2 * np.pi)
         trial['test_theta'] = test_theta
 
-        stim_sample = np.cos(self.theta - sample_theta) * 0.5 + 0.5
-        stim_test = np.cos(self.theta - test_theta) * 0.5 + 0.5
+        dim_ring = len(self.theta)
+        stim_sample = stimuli.ring_stimulus(sample_theta, dim_ring) * 0.5 + 0.5
+        stim_test = stimuli.ring_stimulus(test_theta, dim_ring) * 0.5 + 0.5
 
         # Periods
         self.add_period(['fixation', 'sample', 'delay', 'test', 'decision'])
@@ -185,7 +187,8 @@ class DelayMatchSampleDistractor1D(ngym.TrialEnv):
 
         self.add_ob(1, 'fixation', where='fixation')
         for period in ['sample', 'test1', 'test2', 'test3']:
-            self.add_ob(np.cos(self.theta - trial[period]), period, 'stimulus')
+            stim = stimuli.ring_stimulus(trial[period], len(self.theta))
+            self.add_ob(stim, period, 'stimulus')
 
         self.set_groundtruth(1, 'test'+str(ground_truth))
 
@@ -0,0 +1,311 @@
+"""Manifest of neurogym envs, used to register them without importing them.
+
+Generated by neurogym.envs.registration._write_manifest, do not edit.
+"""
+
+ENVS = {
+    'AntiReach-v0': {
+        'entry_point': 'neurogym.envs.antireach:AntiReach',
+        'group': 'native',
+        'paper_link': 'https://www.nature.com/articles/nrn1345',
+        'paper_name': 'Look away: the anti-saccade task and\n        the voluntary control of eye movement',
+        'tags': ['perceptual', 'steps action space'],
+    },
+    'Bandit-v0': {
+        'entry_point': 'neurogym.envs.bandit:Bandit',
+        'group': 'native',
+        'paper_link': 'https://www.nature.com/articles/s41593-018-0147-8',
+        'paper_name': 'Prefrontal cortex as a meta-reinforcement learning system',
+        'tags': ['n-alternative'],
+    },
+    'ContextDecisionMaking-v0': {
+        'entry_point': 'neurogym.envs.contextdecisionmaking:ContextDecisionMaking',
+        'group': 'native',
+        'paper_link': 'https://www.nature.com/articles/nature12742',
+        'paper_name': 'Context-dependent computation by recurrent\n         dynamics in prefrontal cortex',
+        'tags': ['perceptual', 'context dependent', 'two-alternative', 'supervised'],
+    },
+    'DawTwoStep-v0': {
+        'entry_point': 'neurogym.envs.dawtwostep:DawTwoStep',
+        'group': 'native',
+        'paper_link': 'https://www.sciencedirect.com/science/article/pii/S0896627311001255',
+        'paper_name': 'Model-Based Influences on Humans Choices and Striatal Prediction Errors',
+        'tags': ['two-alternative'],
+    },
+    'DelayComparison-v0': {
+        'entry_point': 'neurogym.envs.delaycomparison:DelayComparison',
+        'group': 'native',
+        'paper_link': 'https://www.jneurosci.org/content/30/28/9424',
+        'paper_name': 'Neuronal Population Coding of Parametric\n        Working Memory',
+        'tags': ['perceptual', 'working memory', 'two-alternative', 'supervised'],
+    },
+    'DelayMatchCategory-v0': {
+        'entry_point': 'neurogym.envs.delaymatchcategory:DelayMatchCategory',
+        'group': 'native',
+        'paper_link': 'https://www.nature.com/articles/nature05078',
+        'paper_name': 'Experience-dependent representation\n        of visual categories in parietal cortex',
+        'tags': ['perceptual', 'working memory', 'two-alternative', 'supervised'],
+    },
+    'DelayMatchSample-v0': {
+        'entry_point': 'neurogym.envs.delaymatchsample:DelayMatchSample',
+        'group': 'native',
+        'paper_link': 'https://www.jneurosci.org/content/jneuro/16/16/5154.full.pdf',
+        'paper_name': 'Neural Mechanisms of Visual Working Memory in \n        Prefrontal Cortex of the Macaque',
+        'tags': ['perceptual', 'working memory', 'two-alternative', 'supervised'],
+    },
+    'DelayMatchSampleDistractor1D-v0': {
+        'entry_point': 'neurogym.envs.delaymatchsample:DelayMatchSampleDistractor1D',
+        'group': 'native',
+        'paper_link': 'https://www.jneurosci.org/content/jneuro/16/16/5154.full.pdf',
+        'paper_name': 'Neural Mechanisms of Visual Working Memory\n        in Prefrontal Cortex of the Macaque',
+        'tags': ['perceptual', 'working memory', 'two-alternative', 'supervised'],
+    },
+    'DelayPairedAssociation-v0': {
+        'entry_point': 'neurogym.envs.delaypairedassociation:DelayPairedAssociation',
+        'group': 'native',
+        'paper_link': 'https://elifesciences.org/articles/43191',
+        'paper_name': 'Active information maintenance in working memory by a sensory cortex',
+        'tags': ['perceptual', 'working memory', 'go-no-go', 'supervised'],
+    },
+    'DualDelayMatchSample-v0': {
+        'entry_point': 'neurogym.envs.dualdelaymatchsample:DualDelayMatchSample',
+        'group': 'native',
+        'paper_link': 'https://science.sciencemag.org/content/354/6316/1136',
+        'paper_name': 'Reactivation of latent working memories with\n        transcranial magnetic stimulation',
+        'tags': ['perceptual', 'working memory', 'two-alternative', 'supervised'],
+    },
+    'EconomicDecisionMaking-v0': {
+        'entry_point': 'neurogym.envs.economicdecisionmaking:EconomicDecisionMaking',
+        'group': 'native',
+        'paper_link': 'https://www.nature.com/articles/nature04676',
+        'paper_name': 'Neurons in the orbitofrontal cortex encode\n         economic value',
+        'tags': ['perceptual', 'value-based'],
+    },
+    'GoNogo-v0': {
+        'entry_point': 'neurogym.envs.gonogo:GoNogo',
+        'group': 'native',
+        'paper_link': 'https://elifesciences.org/articles/43191',
+        'paper_name': 'Active information maintenance in working memory by a sensory cortex',
+        'tags': ['delayed response', 'go-no-go', 'supervised'],
+    },
+    'HierarchicalReasoning-v0': {
+        'entry_point': 'neurogym.envs.hierarchicalreasoning:HierarchicalReasoning',
+        'group': 'native',
+        'paper_link': 'https://science.sciencemag.org/content/364/6441/eaav8911',
+        'paper_name': 'Hierarchical reasoning by neural circuits in the frontal cortex',
+        'tags': ['perceptual', 'two-alternative', 'supervised'],
+    },
+    'IntervalDiscrimination-v0': {
+        'entry_point': 'neurogym.envs.intervaldiscrimination:IntervalDiscrimination',
+        'group': 'native',
+        'paper_link': 'https://www.sciencedirect.com/science/article/pii/S0896627309004887',
+        'paper_name': 'Feature- and Order-Based Timing Representations\n         in the Frontal Cortex',
+        'tags': ['timing', 'working memory', 'delayed response', 'two-alternative', 'supervised'],
+    },
+    'MotorTiming-v0': {
+        'entry_point': 'neurogym.envs.readysetgo:MotorTiming',
+        'group': 'native',
+        'paper_link': 'https://www.nature.com/articles/s41593-017-0028-6',
+        'paper_name': 'Flexible timing by temporal scaling of\n         cortical responses',
+        'tags': ['timing', 'go-no-go', 'supervised'],
+    },
+    'MultiSensoryIntegration-v0': {
+        'entry_point': 'neurogym.envs.multisensory:MultiSensoryIntegration',
+        'group': 'native',
+        'description': None,
+        'paper_link': None,
+        'paper_name': None,
+        'tags': ['perceptual', 'two-alternative', 'supervised'],
+    },
+    'Null-v0': {
+        'entry_point': 'neurogym.envs.null:Null',
+        'group': 'native',
+    },
+    'OneTwoThreeGo-v0': {
+        'entry_point': 'neurogym.envs.readysetgo:OneTwoThreeGo',
+        'group': 'native',
+        'paper_link': 'https://www.nature.com/articles/s41593-019-0500-6',
+        'paper_name': 'Internal models of sensorimotor integration regulate cortical dynamics',
+        'tags': ['timing', 'go-no-go', 'supervised'],
+    },
+    'PerceptualDecisionMaking-v0': {
+        'entry_point': 'neurogym.envs.perceptualdecisionmaking:PerceptualDecisionMaking',
+        'group': 'native',
+        'paper_link': 'https://www.jneurosci.org/content/12/12/4745',
+        'paper_name': 'The analysis of visual motion: a comparison of\n        neuronal and psychophysical performance',
+        'tags': ['perceptual', 'two-alternative', 'supervised'],
+    },
+    'PerceptualDecisionMakingDelayResponse-v0': {
+        'entry_point': 'neurogym.envs.perceptualdecisionmaking:PerceptualDecisionMakingDelayResponse',
+        'group': 'native',
+        'paper_link': 'https://www.nature.com/articles/s41586-019-0919-7',
+        'paper_name': 'Discrete attractor dynamics underlies persistent activity in the frontal cortex',
+        'tags': ['perceptual', 'delayed response', 'two-alternative', 'supervised'],
+    },
+    'PostDecisionWager-v0': {
+        'entry_point': 'neurogym.envs.postdecisionwager:PostDecisionWager',
+        'group': 'native',
+        'paper_link': 'https://science.sciencemag.org/content/324/5928/759.long',
+        'paper_name': 'Representation of Confidence Associated with a\n         Decision by Neurons in the Parietal Cortex',
+        'tags': ['perceptual', 'delayed response', 'confidence'],
+    },
+    'ProbabilisticReasoning-v0': {
+        'entry_point': 'neurogym.envs.probabilisticreasoning:ProbabilisticReasoning',
+        'group': 'native',
+        'paper_link': 'https://www.nature.com/articles/nature05852',
+        'paper_name': 'Probabilistic reasoning by neurons',
+        'tags': ['perceptual', 'two-alternative', 'supervised'],
+    },
+    'PulseDecisionMaking-v0': {
+        'entry_point': 'neurogym.envs.perceptualdecisionmaking:PulseDecisionMaking',
+        'group': 'native',
+        'paper_link': 'https://elifesciences.org/articles/11308',
+        'paper_name': 'Sources of noise during accumulation of evidence in\n        unrestrained and voluntarily head-restrained rats',
+        'tags': ['perceptual', 'two-alternative', 'supervised'],
+    },
+    'Reaching1D-v0': {
+        'entry_point': 'neurogym.envs.reaching:Reaching1D',
+        'group': 'native',
+        'paper_link': 'https://science.sciencemag.org/content/233/4771/1416',
+        'paper_name': 'Neuronal population coding of movement direction',
+        'tags': ['motor', 'steps action space'],
+    },
+    'Reaching1DWithSelfDistraction-v0': {
+        'entry_point': 'neurogym.envs.reaching:Reaching1DWithSelfDistraction',
+        'group': 'native',
+        'description': 'The agent has to reproduce the angle indicated\n         by the observation. Furthermore, the reaching state itself\n         generates strong inputs that overshadows the actual target input.',
+        'paper_link': None,
+        'paper_name': None,
+        'tags': ['motor', 'steps action space'],
+    },
+    'ReachingDelayResponse-v0': {
+        'entry_point': 'neurogym.envs.reachingdelayresponse:ReachingDelayResponse',
+        'group': 'native',
+        'paper_link': None,
+        'paper_name': None,
+        'tags': ['perceptual', 'delayed response', 'continuous action space', 'multidimensional action space', 'supervised'],
+    },
+    'ReadySetGo-v0': {
+        'entry_point': 'neurogym.envs.readysetgo:ReadySetGo',
+        'group': 'native',
+        'paper_link': 'https://www.sciencedirect.com/science/article/pii/S0896627318304185',
+        'paper_name': 'Flexible Sensorimotor Computations through Rapid\n        Reconfiguration of Cortical Dynamics',
+        'tags': ['timing', 'go-no-go', 'supervised'],
+    },
+    'SingleContextDecisionMaking-v0': {
+        'entry_point': 'neurogym.envs.contextdecisionmaking:SingleContextDecisionMaking',
+        'group': 'native',
+        'paper_link': 'https://www.nature.com/articles/nature12742',
+        'paper_name': 'Context-dependent computation by recurrent\n         dynamics in prefrontal cortex',
+        'tags': ['perceptual', 'context dependent', 'two-alternative', 'supervised'],
+    },
+    'psychopy.RandomDotMotion-v0': {
+        'entry_point': 'neurogym.envs.psychopy.perceptualdecisionmaking:RandomDotMotion',
+        'group': 'psychopy',
+        'paper_link': 'https://www.jneurosci.org/content/12/12/4745',
+        'paper_name': 'The analysis of visual motion: a comparison of\n        neuronal and psychophysical performance',
+        'tags': ['perceptual', 'two-alternative', 'supervised'],
+    },
+    'psychopy.SpatialSuppressMotion-v0': {
+        'entry_point': 'neurogym.envs.psychopy.spatialsuppressmotion:SpatialSuppressMotion',
+        'group': 'psychopy',
+        'paper_link': 'https://www.nature.com/articles/nature01800',
+        'paper_name': 'Perceptual consequences of centre–surround antagonism in visual motion processing ',
+        'tags': ['perceptual', 'plaid', 'motion', 'center-surround'],
+    },
+    'psychopy.VisualSearch-v0': {
+        'entry_point': 'neurogym.envs.psychopy.visualsearch:VisualSearch',
+        'group': 'psychopy',
+        'paper_link': 'https://science.sciencemag.org/content/315/5820/1860',
+        'paper_name': 'Top-down versus bottom-up control of attention \n        in the prefrontal and posterior parietal cortices',
+        'tags': ['perceptual', 'supervised'],
+    },
+    'perceptualdecisionmaking.ibl20-v0': {
+        'entry_point': 'neurogym.envs.collections.perceptualdecisionmaking:ibl20',
+        'group': 'collections',
+    },
+    'perceptualdecisionmaking.roitman02-v0': {
+        'entry_point': 'neurogym.envs.collections.perceptualdecisionmaking:roitman02',
+        'group': 'collections',
+    },
+    'yang19.go-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:go',
+        'group': 'collections',
+    },
+    'yang19.rtgo-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:rtgo',
+        'group': 'collections',
+    },
+    'yang19.dlygo-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:dlygo',
+        'group': 'collections',
+    },
+    'yang19.anti-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:anti',
+        'group': 'collections',
+    },
+    'yang19.rtanti-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:rtanti',
+        'group': 'collections',
+    },
+    'yang19.dlyanti-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:dlyanti',
+        'group': 'collections',
+    },
+    'yang19.dm1-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:dm1',
+        'group': 'collections',
+    },
+    'yang19.dm2-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:dm2',
+        'group': 'collections',
+    },
+    'yang19.ctxdm1-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:ctxdm1',
+        'group': 'collections',
+    },
+    'yang19.ctxdm2-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:ctxdm2',
+        'group': 'collections',
+    },
+    'yang19.multidm-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:multidm',
+        'group': 'collections',
+    },
+    'yang19.dlydm1-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:dlydm1',
+        'group': 'collections',
+    },
+    'yang19.dlydm2-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:dlydm2',
+        'group': 'collections',
+    },
+    'yang19.ctxdlydm1-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:ctxdlydm1',
+        'group': 'collections',
+    },
+    'yang19.ctxdlydm2-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:ctxdlydm2',
+        'group': 'collections',
+    },
+    'yang19.multidlydm-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:multidlydm',
+        'group': 'collections',
+    },
+    'yang19.dms-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:dms',
+        'group': 'collections',
+    },
+    'yang19.dnms-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:dnms',
+        'group': 'collections',
+    },
+    'yang19.dmc-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:dmc',
+        'group': 'collections',
+    },
+    'yang19.dnmc-v0': {
+        'entry_point': 'neurogym.envs.collections.yang19:dnmc',
+        'group': 'collections',
+    },
+}
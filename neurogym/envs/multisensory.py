@@ -4,6 +4,7 @@ import numpy as np
 
 import neurogym as ngym
 from neurogym import spaces
+from neurogym.utils import stimuli
 
 
 # TODO: This is not finished yet. Need to compare with original paper
@@ -75,16 +76,16 @@ class MultiSensoryIntegration(ngym.TrialEnv):
         coh_0 = trial['coh'] * trial['coh_prop']
         coh_1 = trial['coh'] * (1 - trial['coh_prop'])
         ground_truth = trial['ground_truth']
-        stim_theta = self.theta[ground_truth]
+        cos = stimuli.table(len(self.theta))[ground_truth]
 
         # Periods
         periods = ['fixation', 'stimulus', 'decision']
         self.add_period(periods)
 
         self.add_ob(1, where='fixation')
-        stim = np.cos(self.theta - stim_theta) * (coh_0 / 200) + 0.5
+        stim = cos * (coh_0 / 200) + 0.5
         self.add_ob(stim, 'stimulus', where='stimulus_mod1')
-        stim = np.cos(self.theta - stim_theta) * (coh_1 / 200) + 0.5
+        stim = cos * (coh_1 / 200) + 0.5
         self.add_ob(stim, 'stimulus', where='stimulus_mod2')
         self.add_randn(0, self.sigma, 'stimulus')
         self.set_ob(0, 'decision')
@@ -5,6 +5,7 @@ import numpy as np
 
 import neurogym as ngym
 from neurogym import spaces
+from neurogym.utils import stimuli
 
 
 class PerceptualDecisionMaking(ngym.TrialEnv):
@@ -52,6 +53,7 @@ class PerceptualDecisionMaking(ngym.TrialEnv):
             self.timing.update(timing)
 
         self.abort = False
+        self.rule = ngym.StandardDecisionRule()
 
         self.theta = np.linspace(0, 2*np.pi, dim_ring+1)[:-1]
         self.choices = np.arange(dim_ring)
@@ -82,14 +84,13 @@ class PerceptualDecisionMaking(ngym.TrialEnv):
 
         coh = trial['coh']
         ground_truth = trial['ground_truth']
-        stim_theta = self.theta[ground_truth]
 
         # Periods
         self.add_period(['fixation', 'stimulus', 'delay', 'decision'])
 
         # Observations
         self.add_ob(1, period=['fixation', 'stimulus', 'delay'], where='fixation')
-        stim = np.cos(self.theta - stim_theta) * (coh/200) + 0.5
+        stim = stimuli.table(len(self.theta))[ground_truth] * (coh/200) + 0.5
         self.add_ob(stim, 'stimulus', where='stimulus')
         self.add_randn(0, self.sigma, 'stimulus', where='stimulus')
 
@@ -98,35 +99,27 @@ class PerceptualDecisionMaking(ngym.TrialEnv):
 
         return trial
 
-    def _step(self, action):
-        """
-        _step receives an action and returns:
-            a new observation, obs
-            reward associated with the action, reward
-            a boolean variable indicating whether the experiment has end, done
-            a dictionary with extra information:
-                ground truth correct response, info['gt']
-                boolean indicating the end of the trial, info['new_trial']
-        """
-        new_trial = False
-        # rewards
-        reward = 0
-        gt = self.gt_now
-        # observations
-        if self.in_period('fixation'):
-            if action != 0:  # action = 0 means fixating
-                new_trial = self.abort
-                reward += self.rewards['abort']
-        elif self.in_period('decision'):
-            if action != 0:
-                new_trial = True
-                if action == gt:
-                    reward += self.rewards['correct']
-                    self.performance = 1
-                else:
-                    reward += self.rewards['fail']
+    def _new_trials(self, batch, **kwargs):
+        """Generate batch.n trials at once, see _new_trial."""
+        trial = {
+            'ground_truth': self.rng.choice(self.choices, batch.n),
+            'coh': self.rng.choice(self.cohs, batch.n),
+        }
+        batch.update_trial(trial, kwargs)
 
-        return self.ob_now, reward, False, {'new_trial': new_trial, 'gt': gt}
+        batch.add_period(['fixation', 'stimulus', 'delay', 'decision'])
+
+        batch.add_ob(1, period=['fixation', 'stimulus', 'delay'],
+                     where='fixation')
+        stim = (stimuli.table(len(self.theta))[trial['ground_truth']] *
+                (trial['coh'][:, None]/200) + 0.5)
+        batch.add_ob(stim, 'stimulus', where='stimulus')
+        batch.add_randn(0, self.sigma, 'stimulus', where='stimulus')
+
+        batch.set_groundtruth(trial['ground_truth'], period='decision',
+                              where='choice')
+
+        return trial
 
 
 #  TODO: there should be a timeout of 1000ms for incorrect trials
@@ -210,6 +203,29 @@ class PerceptualDecisionMakingDelayResponse(ngym.TrialEnv):
 
         return trial
 
+    def _new_trials(self, batch, **kwargs):
+        trial = {
+            'ground_truth': self.rng.choice(self.choices, batch.n),
+            'coh': self.rng.choice(self.cohs, batch.n),
+            'sigma': np.full(batch.n, self.sigma),
+        }
+        batch.update_trial(trial, kwargs)
+
+        periods = ['fixation', 'stimulus', 'delay', 'decision']
+        batch.add_period(periods)
+
+        batch.add_ob([1, 0, 0], ['fixation', 'stimulus', 'delay'])
+        stim = np.zeros((batch.n, 2))
+        stim[:] = ((1 - trial['coh']/100)/2)[:, None]
+        stim[np.arange(batch.n), trial['ground_truth'] - 1] = \
+            (1 + trial['coh']/100)/2
+        batch.add_ob(stim, 'stimulus', where=slice(1, 3))
+        batch.add_randn(0, trial['sigma'], 'stimulus', where=slice(1, 3))
+
+        batch.set_groundtruth(trial['ground_truth'], 'decision')
+
+        return trial
+
     def _step(self, action):
         # ---------------------------------------------------------------------
         # Reward and observations
@@ -315,6 +331,44 @@ class PulseDecisionMaking(ngym.TrialEnv):
 
         return trial
 
+    def _new_trials(self, batch, **kwargs):
+        n = batch.n
+        p_pulse = np.tile(np.asarray(self.p_pulse, dtype=float), (n, 1))
+        swap = self.rng.rand(n) < 0.5
+        p_pulse[swap] = p_pulse[swap, ::-1]
+        pulse1 = (self.rng.random((n, self.n_bin)) < p_pulse[:, :1]) * 1.0
+        pulse2 = (self.rng.random((n, self.n_bin)) < p_pulse[:, 1:]) * 1.0
+        trial = {'pulse1': pulse1, 'pulse2': pulse2}
+        batch.update_trial(trial, kwargs)
+
+        n_pulse1 = pulse1.sum(axis=1)
+        n_pulse2 = pulse2.sum(axis=1) + self.rng.uniform(-0.1, 0.1, n)
+        ground_truth = (n_pulse1 < n_pulse2).astype(int)
+        trial['ground_truth'] = ground_truth
+
+        periods = ['fixation']
+        for i in range(self.n_bin):
+            periods += ['cue' + str(i), 'bin' + str(i)]
+        periods += ['decision']
+        batch.add_period(periods)
+
+        batch.add_ob(1, where='fixation')
+        # Pulses of all cue periods at once, scattered to their time steps
+        cues = ['cue' + str(i) for i in range(self.n_bin)]
+        start = np.stack([batch.start_ind[c] for c in cues], axis=1).ravel()
+        duration = np.stack([batch.end_ind[c] for c in cues],
+                            axis=1).ravel() - start
+        offset = np.cumsum(duration) - duration
+        ind = np.repeat(np.arange(n * self.n_bin), duration)
+        t_ind = start[ind] + np.arange(len(ind)) - offset[ind]
+        pulses = np.stack([pulse1, pulse2], axis=-1).reshape(-1, 2)
+        self._task_ob(batch.ob)[ind // self.n_bin, t_ind, 1:3] += pulses[ind]
+        batch.set_ob(0, 'decision')
+
+        batch.set_groundtruth(ground_truth, period='decision', where='choice')
+
+        return trial
+
     def _step(self, action):
         new_trial = False
         # rewards
@@ -7,6 +7,7 @@ import numpy as np
 
 import neurogym as ngym
 from neurogym import spaces
+from neurogym.utils import stimuli
 
 
 class PostDecisionWager(ngym.TrialEnv):
@@ -75,7 +76,6 @@ class PostDecisionWager(ngym.TrialEnv):
         trial.update(kwargs)
         coh = trial['coh']
         ground_truth = trial['ground_truth']
-        stim_theta = self.theta[ground_truth]
 
         # Periods
         periods = ['fixation', 'stimulus', 'delay']
@@ -86,7 +86,7 @@ class PostDecisionWager(ngym.TrialEnv):
 
         # Observations
         self.add_ob(1, ['fixation', 'stimulus', 'delay'], where='fixation')
-        stim = np.cos(self.theta - stim_theta) * (coh / 200) + 0.5
+        stim = stimuli.table(len(self.theta))[ground_truth] * (coh / 200) + 0.5
         self.add_ob(stim, 'stimulus', where='stimulus')
         self.add_randn(0, self.sigma, 'stimulus')
         if trial['wager']:
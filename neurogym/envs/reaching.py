@@ -5,7 +5,7 @@ import numpy as np
 import neurogym as ngym
 from neurogym import spaces
 
-from neurogym.utils import tasktools
+from neurogym.utils import stimuli, tasktools
 
 
 # TODO: Ground truth and action have different space,
@@ -61,7 +61,7 @@ class Reaching1D(ngym.TrialEnv):
         # Periods
         self.add_period(['fixation', 'reach'])
 
-        target = np.cos(self.theta - trial['ground_truth'])
+        target = stimuli.ring_stimulus(trial['ground_truth'], self.dim_ring)
         self.add_ob(target, 'reach', where='target')
 
         self.set_groundtruth(np.pi, 'fixation')
@@ -92,7 +92,9 @@ class Reaching1D(ngym.TrialEnv):
 
     def post_step(self, ob, reward, done, info):
         """Modify observation"""
-        ob[self.dim_ring:] = np.cos(self.theta - self.state)
+        # ob is a read-only view of self.ob[self.t_ind]
+        self.view_ob()[self.t_ind, self.dim_ring:] = np.cos(self.theta -
+                                                            self.state)
         return ob, reward, done, info
 
 
@@ -151,7 +153,8 @@ class Reaching1DWithSelfDistraction(ngym.TrialEnv):
 
         ob = self.view_ob('reach')
         # Signal is weaker than the self-distraction
-        ob += np.cos(self.theta - trial['ground_truth']) * 0.3
+        ob += stimuli.ring_stimulus(trial['ground_truth'],
+                                    len(self.theta)) * 0.3
 
         self.set_groundtruth(np.pi, 'fixation')
         self.set_groundtruth(trial['ground_truth'], 'reach')
@@ -180,5 +183,6 @@ class Reaching1DWithSelfDistraction(ngym.TrialEnv):
 
     def post_step(self, ob, reward, done, info):
         """Modify observation."""
-        ob += np.cos(self.theta - self.state)
+        # ob is a read-only view of self.ob[self.t_ind]
+        self.view_ob()[self.t_ind] += np.cos(self.theta - self.state)
         return ob, reward, done, info
@@ -1,10 +1,13 @@
+import ast
 import importlib
+import importlib.util
 from inspect import getmembers, isfunction, isclass
 from pathlib import Path
 from packaging import version
 
 import gym
-from neurogym.envs.collections import get_collection
+from neurogym.envs.collections import _collection_from_file
+from neurogym.envs.manifest import ENVS as _MANIFEST
 
 
 def _get_envs(foldername=None, env_prefix=None, allow_list=None):
@@ -90,8 +93,6 @@ NATIVE_ALLOW_LIST = [
     # 'SpatialSuppressMotion',  # TODO: raises ModuleNotFound error since requires scipy, which is not in the requirements of neurogym
     # 'ToneDetection'  # TODO: Temporary removing until bug fixed
 ]
-ALL_NATIVE_ENVS = _get_envs(foldername=None, env_prefix=None,
-                            allow_list=NATIVE_ALLOW_LIST)
 
 _psychopy_prefix = 'neurogym.envs.psychopy.'
 ALL_PSYCHOPY_ENVS = {
@@ -114,8 +115,6 @@ CONTRIB_ALLOW_LIST = [
     # 'MemoryRecall',
     # 'Pneumostomeopening'
 ]
-ALL_CONTRIB_ENVS = _get_envs(foldername='contrib', env_prefix='contrib',
-                             allow_list=CONTRIB_ALLOW_LIST)
 
 
 # Automatically register all tasks in collections
@@ -135,12 +134,84 @@ def _get_collection_envs():
         envs = [env for env in envs if env[0] != '_']  # ignore private members
         # TODO: check is instance gym.env
         env_dict = {l+'.'+env+'-v0': lib + ':' + env for env in envs}
-        valid_envs = get_collection(l)
+        valid_envs = _collection_from_file(l)
         derived_envs.update({key: env_dict[key] for key in valid_envs})
     return derived_envs
 
 
-ALL_COLLECTIONS_ENVS = _get_collection_envs()
+_MANIFEST_GROUPS = ['native', 'psychopy', 'contrib', 'collections']
+_METADATA_KEYS = ['description', 'paper_link', 'paper_name', 'tags']
+
+
+def _class_metadata(entry_point):
+    """Return the metadata of the env class or function at entry_point."""
+    from_, class_ = entry_point.split(':')
+    try:
+        imported = getattr(importlib.import_module(from_), class_)
+        metadata = getattr(imported, 'metadata', {})
+    except ImportError:
+        # Optional dependency missing, read metadata from the source
+        spec = importlib.util.find_spec(from_)
+        with open(spec.origin) as f:
+            tree = ast.parse(f.read())
+        metadata = dict()
+        for node in ast.walk(tree):
+            if not (isinstance(node, ast.ClassDef) and node.name == class_):
+                continue
+            for stmt in node.body:
+                if (isinstance(stmt, ast.Assign) and
+                        getattr(stmt.targets[0], 'id', None) == 'metadata'):
+                    metadata = ast.literal_eval(stmt.value)
+    return {key: metadata[key] for key in _METADATA_KEYS if key in metadata}
+
+
+def _generate_manifest():
+    """Find all envs by importing their modules and return the manifest."""
+    groups = {
+        'native': _get_envs(foldername=None, env_prefix=None,
+                            allow_list=NATIVE_ALLOW_LIST),
+        'psychopy': ALL_PSYCHOPY_ENVS,
+        'contrib': _get_envs(foldername='contrib', env_prefix='contrib',
+                             allow_list=CONTRIB_ALLOW_LIST),
+        'collections': _get_collection_envs(),
+    }
+    manifest = dict()
+    for group in _MANIFEST_GROUPS:
+        env_ids = groups[group].keys()
+        if group != 'collections':  # collections keep the order of tasks
+            env_ids = sorted(env_ids)
+        for env_id in env_ids:
+            entry_point = groups[group][env_id]
+            manifest[env_id] = {'entry_point': entry_point, 'group': group,
+                                **_class_metadata(entry_point)}
+    return manifest
+
+
+def _write_manifest():
+    """Regenerate neurogym/envs/manifest.py, run after adding an env."""
+    manifest = _generate_manifest()
+    fname = Path(__file__).resolve().parent / 'manifest.py'
+    with open(fname, 'w') as f:
+        f.write('"""Manifest of neurogym envs, used to register them without '
+                'importing them.\n\nGenerated by '
+                'neurogym.envs.registration._write_manifest, do not edit.\n'
+                '"""\n\nENVS = {\n')
+        for env_id, spec in manifest.items():
+            f.write('    {!r}: {{\n'.format(env_id))
+            for key, val in spec.items():
+                f.write('        {!r}: {!r},\n'.format(key, val))
+            f.write('    },\n')
+        f.write('}\n')
+
+
+def _manifest_group(group):
+    return {env_id: spec['entry_point'] for env_id, spec in _MANIFEST.items()
+            if spec['group'] == group}
+
+
+ALL_NATIVE_ENVS = _manifest_group('native')
+ALL_CONTRIB_ENVS = _manifest_group('contrib')
+ALL_COLLECTIONS_ENVS = _manifest_group('collections')
 
 ALL_ENVS = {
     **ALL_NATIVE_ENVS, **ALL_PSYCHOPY_ENVS, **ALL_CONTRIB_ENVS
@@ -165,14 +236,8 @@ def all_envs(tag=None, psychopy=False, contrib=False, collections=False):
         if not isinstance(tag, str):
             raise ValueError('tag must be str, but got ', type(tag))
 
-        new_env_list = list()
-        for env in env_list:
-            from_, class_ = envs[env].split(':')
-            imported = getattr(__import__(from_, fromlist=[class_]), class_)
-            env_tag = imported.metadata.get('tags', [])
-            if tag in env_tag:
-                new_env_list.append(env)
-        return new_env_list
+        return [env for env in env_list
+                if tag in _MANIFEST[env].get('tags', [])]
 
 
 def all_tags():
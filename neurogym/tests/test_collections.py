@@ -1,2 +1,36 @@
 """Test collections of tasks."""
 
+import numpy as np
+
+import neurogym as ngym
+from neurogym.utils.scheduler import RandomSchedule
+from neurogym.wrappers import ScheduleEnvs
+
+
+def _yang19(seed=0):
+    envs = [ngym.make(task) for task in ngym.get_collection('yang19')]
+    env = ScheduleEnvs(envs, schedule=RandomSchedule(len(envs)),
+                       env_input=True)
+    env.seed(seed)
+    return env
+
+
+def test_yang19_new_trials():
+    """Test batched trials of the yang19 mixture follow the schedule."""
+    env, env_seq = _yang19(), _yang19()
+    assert env.batched_trials
+    n_task = len(env.envs)
+    batch = env.new_trials(100)
+    i_envs = [env_seq.new_trial()['i_env'] for _ in range(100)]
+    assert list(batch.trial['i_env']) == i_envs
+    assert env.next_i_env == env_seq.next_i_env
+
+    # Task one-hot over the trial, zero padding
+    rule = batch.ob[..., -n_task:]
+    valid = batch.period_mask()
+    assert np.all(rule[valid].sum(axis=-1) == 1)
+    assert np.all(rule[~valid] == 0)
+    assert np.all(rule[np.arange(100), 0].argmax(axis=-1) == i_envs)
+    # Ground truth only in the decision period of each task
+    assert np.all(batch.gt[~batch.period_mask('decision')] == 0)
+    assert np.any(batch.gt[batch.period_mask('decision')] != 0)
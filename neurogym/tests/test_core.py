@@ -1,6 +1,8 @@
 """Test core.py"""
 
-# import pytest
+import copy
+
+import pytest
 
 import numpy as np
 import neurogym as ngym
@@ -70,3 +72,479 @@ def test_addob_instep():
     for i in range(10):
         ob, rew, done, info = env.step(action=0)
         assert ob[0] == ((i + 1) % 5) + 1  # each trial is 5 steps
+
+
+class _BatchedTestEnv(ngym.TrialEnv):
+    """Deterministic task with a sequential and a batched generator."""
+    def __init__(self, dt=100):
+        super().__init__(dt=dt)
+        self.timing = {'fixation': 200, 'stimulus': ('choice', [100, 300]),
+                       'decision': 100}
+        name = {'fixation': 0, 'stimulus': [1, 2]}
+        self.observation_space = ngym.spaces.Box(
+            -np.inf, np.inf, shape=(3,), dtype=np.float32, name=name)
+        name = {'fixation': 0, 'choice': [1, 2]}
+        self.action_space = ngym.spaces.Discrete(3, name=name)
+
+    def _new_trial(self, **kwargs):
+        trial = {'ground_truth': self.rng.choice([0, 1])}
+        trial.update(kwargs)
+        self.add_period(['fixation', 'stimulus', 'decision'])
+        self.add_ob(1, period=['fixation', 'stimulus'], where='fixation')
+        stim = np.array([1., 2.]) * (trial['ground_truth'] + 1)
+        self.add_ob(stim, 'stimulus', where='stimulus')
+        self.set_groundtruth(trial['ground_truth'], 'decision', where='choice')
+        return trial
+
+    def _new_trials(self, batch, **kwargs):
+        trial = {'ground_truth': self.rng.choice([0, 1], batch.n)}
+        batch.add_period(['fixation', 'stimulus', 'decision'])
+        batch.add_ob(1, period=['fixation', 'stimulus'], where='fixation')
+        stim = np.array([1., 2.]) * (trial['ground_truth'][:, None] + 1)
+        batch.add_ob(stim, 'stimulus', where='stimulus')
+        batch.set_groundtruth(trial['ground_truth'], 'decision',
+                              where='choice')
+        return trial
+
+    def _step(self, action):
+        return self.ob_now, 0, False, {'new_trial': False}
+
+
+def test_new_trials_batched():
+    """Test batched trials match trials generated one at a time."""
+    env = _BatchedTestEnv()
+    env.seed(0)
+    assert env.batched_trials
+    batch = env.new_trials(50)
+    assert batch.ob.shape == (50, batch.lengths.max(), 3)
+    assert env.num_tr == 50
+    for i in range(batch.n):
+        trial, ob, gt = batch.get_trial(i)
+        env.new_trial(ground_truth=trial['ground_truth'])
+        # stimulus duration is random, compare the periods independently
+        assert gt[-1] == env.gt[-1] and np.all(gt[:-1] == 0)
+        assert np.all(ob[:3] == env.ob[:3])
+        assert np.all(ob[-1] == env.ob[-1])
+        assert np.all(batch.ob[i, batch.lengths[i]:] == 0)
+
+
+def test_new_trials_fallback():
+    """Test new_trials for a task without batched generator."""
+    env = ngym.make('DelayMatchSample-v0')
+    env.reset()
+    assert not env.batched_trials
+    batch = env.new_trials(10)
+    ob, gt = batch.concatenate()
+    assert len(ob) == len(gt) == batch.lengths.sum()
+    trial, ob, gt = batch.get_trial(3)
+    assert ob.shape == (batch.lengths[3],) + env.observation_space.shape
+    assert set(trial.keys()) == set(batch.trial.keys())
+
+
+def test_dataset_batched():
+    """Test Dataset with a task generating batched trials."""
+    dataset = ngym.Dataset(_BatchedTestEnv(), batch_size=4, seq_len=20)
+    for i in range(5):
+        inputs, target = dataset()
+        assert inputs.shape == (20, 4, 3)
+        # fixation input is on whenever the target is fixation
+        assert np.all(inputs[..., 0][target == 0] == 1)
+
+
+def test_period_table():
+    """Test in_period and current_period against period times."""
+    env = ngym.make('PulseDecisionMaking-v0').unwrapped
+    env.reset()
+    for _ in range(3):
+        env.new_trial()
+        for t_ind in range(env.ob.shape[0]):
+            env.t_ind, env.t = t_ind, t_ind * env.dt
+            periods = [p for p in env.start_t if env.in_period(p, env.t)]
+            assert [p for p in env.start_t if env.in_period(p)] == periods
+            assert env.current_period == periods[0]
+
+
+def test_period_table_overlap():
+    """Test in_period with overlapping periods."""
+    class OverlapEnv(_BatchedTestEnv):
+        def _new_trial(self, **kwargs):
+            self.add_period('cue', duration=200, after=0)  # overlaps fixation
+            return super()._new_trial(**kwargs)
+
+    env = OverlapEnv()
+    env.reset()
+    env.t_ind, env.t = 1, env.dt
+    assert env.in_period('cue') and env.in_period('fixation')
+    env.t_ind, env.t = 2, 2 * env.dt
+    assert not env.in_period('cue') and env.current_period == 'stimulus'
+
+
+def test_step_ob_ownership():
+    """Test observations returned by step are read-only unless copied."""
+    from neurogym.wrappers import Noise, PassAction
+    env = ngym.make('PerceptualDecisionMaking-v0')
+    env.reset()
+    ob, _, _, _ = env.step(0)
+    assert np.all(ob == env.ob[env.t_ind])
+    with pytest.raises(ValueError):
+        ob += 1
+    env.set_copy_obs(True)
+    ob, _, _, _ = env.step(0)
+    ob += 1  # owned by the caller
+
+    # Noise must not modify the trial observations of the env
+    env = Noise(ngym.make('PerceptualDecisionMaking-v0'), std_noise=1.)
+    env.reset()
+    trial_ob = env.unwrapped.ob.copy()
+    ob, _, _, _ = env.step(0)
+    assert np.all(env.unwrapped.ob == trial_ob)
+    assert not np.all(ob == trial_ob[env.unwrapped.t_ind])
+    with pytest.raises(ValueError):
+        ob += 1
+
+    # Copies return their own buffer
+    env_copy = copy.deepcopy(env)
+    ob_copy, _, _, _ = env_copy.step(0)
+    ob_next, _, _, _ = env.step(0)
+    assert not np.shares_memory(ob_copy, ob_next)
+    with pytest.raises(ValueError):
+        ob_copy += 1
+
+    # Envs other than TrialEnv don't copy observations
+    class BaseTask(ngym.BaseEnv):
+        def __init__(self):
+            super().__init__()
+            self.observation_space = ngym.spaces.Box(-1, 1, shape=(2,))
+            self.action_space = ngym.spaces.Discrete(2)
+
+        def step(self, action):
+            return np.zeros(2), 0, False, {}
+
+    env = PassAction(Noise(BaseTask(), std_noise=1.))
+    ob, _, _, _ = env.step(1)
+    assert ob.shape == (3,) and ob[-1] == 1
+
+
+def test_ob_channels():
+    """Test wrappers writing into channels of the trial observation."""
+    from neurogym.wrappers import Noise, PassAction, PassReward, ScheduleEnvs
+    from neurogym.utils.scheduler import RandomSchedule
+    tasks = ['yang19.go-v0', 'yang19.dm1-v0']
+    envs = [ngym.make(task) for task in tasks]
+    env = ScheduleEnvs(envs, schedule=RandomSchedule(len(envs)),
+                       env_input=True)
+    env = PassReward(PassAction(env))
+    env.seed(0)
+    n_task = envs[0].observation_space.shape[0]
+    ob = env.reset()
+    assert ob.shape == env.observation_space.shape
+    assert env.unwrapped.ob.shape[1:] == env.observation_space.shape
+    for _ in range(200):
+        action = env.action_space.sample()
+        ob, reward, _, info = env.step(action)
+        assert ob.shape == env.observation_space.shape
+        assert ob[-2] == action and ob[-1] == np.float32(reward)
+        assert np.argmax(ob[n_task:n_task + len(envs)]) == env.i_env or \
+            info['new_trial']
+
+    # Fallback to an output buffer if a wrapper changes the observation
+    env = PassAction(Noise(ngym.make('PerceptualDecisionMaking-v0')))
+    env.reset()
+    assert env._ob_channel is None
+    ob, _, _, _ = env.step(1)
+    assert ob.shape == env.observation_space.shape and ob[-1] == 1
+
+    # The same env instance passed twice gets its channels once
+    task = ngym.make('PerceptualDecisionMaking-v0')
+    n_task = task.observation_space.shape[0]
+    env = ScheduleEnvs([task, task], schedule=RandomSchedule(2),
+                       env_input=True)
+    env = PassAction(env)
+    env.reset()
+    assert env.unwrapped.ob.shape[1] == n_task + 3
+    assert env.add_ob_channels(1, env) == n_task + 2
+    for _ in range(20):
+        ob, _, _, info = env.step(1)
+        assert ob.shape == env.observation_space.shape and ob[-1] == 1
+        assert np.argmax(ob[n_task:n_task + 2]) == env.i_env or \
+            info['new_trial']
+
+    # Released channels are no longer allocated
+    env.remove_ob_channels(env)
+    env.env.remove_ob_channels(env.env)
+    env.unwrapped.new_trial()
+    assert env.unwrapped.ob.shape[1] == n_task
+
+
+@pytest.mark.parametrize('info_mode', ['full', 'minimal', 'none'])
+def test_info_mode(info_mode):
+    """Test the info keys returned by step in each info_mode."""
+    from neurogym.wrappers import (Monitor, PassReward, ReactionTime,
+                                   ScheduleEnvs)
+    from neurogym.utils.scheduler import RandomSchedule
+    envs = [ngym.make('PerceptualDecisionMaking-v0'),
+            ngym.make('PerceptualDecisionMaking-v0', cohs=[51.2])]
+    env = ScheduleEnvs(envs, schedule=RandomSchedule(len(envs)))
+    env = Monitor(PassReward(ReactionTime(env)), sv_per=10**6)
+    env.set_info_mode(info_mode)
+    env.seed(0)
+    env.reset()
+    infos = list()
+    for _ in range(200):
+        _, _, _, info = env.step(env.action_space.sample())
+        assert all(info is not other for other in infos[-1:])
+        infos.append(info)
+    end_keys = {'full': {'new_trial', 'gt', 'performance', 'trial',
+                         'tr_dur'},
+                'minimal': {'new_trial', 'performance'},
+                'none': {'new_trial'}}[info_mode]
+    keys = {'full': {'new_trial', 'gt'}}.get(info_mode, {'new_trial'})
+    assert any(info['new_trial'] for info in infos)
+    for info in infos:
+        assert set(info) == (end_keys if info['new_trial'] else keys)
+    # Monitor saves the keys of the info
+    assert set(env.data) == end_keys | {'action', 'reward'}
+
+
+def test_reuse_buffers():
+    """Test trials reusing the memory of env.ob and env.gt."""
+    env = ngym.make('PerceptualDecisionMaking-v0')
+    env_new = ngym.make('PerceptualDecisionMaking-v0')
+    env_new.set_reuse_buffers(False)
+    env.seed(0)
+    env_new.seed(0)
+    obs = list()
+    for _ in range(20):
+        env.new_trial()
+        env_new.new_trial()
+        assert np.all(env.ob == env_new.ob) and np.all(env.gt == env_new.gt)
+        obs.append(env_new.ob)
+    # Trials share the pooled buffer, except when it grows
+    bases = [env.ob.base]
+    env.new_trial()
+    assert np.shares_memory(env.ob, bases[0]) or \
+        len(env.ob) > len(bases[0])
+    # With the opt-out, references stay valid across trials
+    assert not np.shares_memory(obs[0], obs[1])
+
+    env.seed(0)
+    env_new.seed(0)
+    batch, batch_new = env.new_trials(5), env_new.new_trials(5)
+    assert np.all(batch.ob == batch_new.ob)
+    assert np.all(batch.gt == batch_new.gt)
+
+
+def test_trial_at():
+    """Test regenerating trials without changing the env state."""
+    env = ngym.make('PerceptualDecisionMaking-v0')
+    env.seed(0)
+    trials = list()
+    for i in range(5):
+        trial = env.new_trial()
+        trials.append((trial, env.ob.copy(), env.gt.copy()))
+    ob, gt = env.ob.copy(), env.gt.copy()
+    rng_next = copy.deepcopy(env.rng).random(5)
+
+    for i in [3, 0, 4]:
+        trial, trial_ob, trial_gt = env.trial_at(i)
+        assert trial == trials[i][0]
+        assert np.all(trial_ob == trials[i][1])
+        assert np.all(trial_gt == trials[i][2])
+    assert env.trial == trials[-1][0] and env.num_tr == 5
+    assert np.all(env.ob == ob) and np.all(env.gt == gt)
+    assert np.all(copy.deepcopy(env.rng).random(5) == rng_next)
+
+    # The next trial is the same as without regenerating trials
+    trial = env.new_trial()
+    assert trial == env.trial_at(5)[0]
+
+
+def test_trials_at():
+    """Test regenerating batches of new_trials and the trials after them."""
+    env = ngym.make('PerceptualDecisionMaking-v0')
+    env.seed(0)
+    batch = env.new_trials(4)
+    trial = env.new_trial()
+    batch_next = env.new_trials(3)
+    assert env.num_tr == 8
+    # A batch takes one trial index per trial
+    assert env.trial_at(4)[0] == trial
+    for index, expected in [(0, batch), (5, batch_next)]:
+        regenerated = env.trials_at(index, len(expected))
+        assert np.all(regenerated.ob == expected.ob)
+        assert np.all(regenerated.gt == expected.gt)
+        for key, val in expected.trial.items():
+            assert np.all(regenerated.trial[key] == val)
+        # Each trial of the batch is regenerated from its index
+        for i in range(len(expected)):
+            trial_i, ob, gt = env.trial_at(index + i)
+            _, ob_batch, gt_batch = expected.get_trial(i)
+            assert np.all(ob == ob_batch) and np.all(gt == gt_batch)
+            for key, val in trial_i.items():
+                assert val == expected.trial[key][i]
+    assert env.new_trial() == env.trial_at(8)[0]
+
+    # Batches of the same size, as generated by Dataset
+    env.seed(0)
+    batches = [env.new_trials(6) for _ in range(3)]
+    assert len(env.unwrapped._batch_runs) == 1
+    for i in range(18):
+        trial_i = env.trial_at(i)[0]
+        assert trial_i['coh'] == batches[i // 6].trial['coh'][i % 6]
+
+    # Trials of tasks without batched generator are those of new_trial
+    env = ngym.make('ReadySetGo-v0')
+    env.seed(0)
+    env.new_trial()
+    batch = env.new_trials(3)
+    for i in range(3):
+        trial, ob, gt = env.trial_at(1 + i)
+        assert trial['measure'] == batch.trial['measure'][i]
+        assert np.all(ob == batch.get_trial(i)[1])
+
+
+def test_standard_decision_rule():
+    """Test tasks stepped by their rule reward aborts and decisions."""
+    env = ngym.make('PerceptualDecisionMaking-v0', dt=100)
+    rule = env.unwrapped.rule
+    assert isinstance(rule, ngym.StandardDecisionRule)
+    task = env.unwrapped
+    rewards = task.rewards
+
+    for abort in [False, True]:
+        task.abort = abort  # read by the rule at each step
+        env.reset(no_step=True)
+        _, reward, _, info = env.step(1)  # break fixation
+        assert reward == rewards['abort'] and info['new_trial'] == abort
+    task.abort = False
+
+    for correct in [True, False]:
+        task.new_trial()
+        while not task.in_period('decision'):
+            env.step(0)
+        gt = task.gt[-1]
+        _, reward, _, info = env.step(gt if correct else 3 - gt)
+        assert info['new_trial'] and info['gt'] == gt
+        assert reward == (rewards['correct'] if correct else
+                          rewards.get('fail', 0))
+
+    # evaluate agrees with step over all time steps of a trial
+    for action in [0, 1, 2]:
+        task.new_trial()
+        t = np.arange(len(task.gt)) * task.dt
+        in_period = {p: (task.start_t[p] <= t) & (t < task.end_t[p])
+                     for p in ['fixation', 'decision']}
+        reward, new_trial, _ = rule.evaluate(
+            task, action, task.gt, in_period['fixation'], in_period['decision'])
+        for i in range(len(task.gt)):
+            task.t_ind = i
+            _, r, _, info = rule.step(task, action)
+            assert r == reward[i] and info['new_trial'] == new_trial[i]
+
+    # Context tasks don't reward wrong decisions with rewards['fail']
+    env = ngym.make('ContextDecisionMaking-v0', rewards={'fail': -1.})
+    task = env.unwrapped
+    assert not task.rule.fail
+    env.reset(no_step=True)
+    task.new_trial()
+    while not task.in_period('decision'):
+        env.step(0)
+    gt = task.gt_now
+    _, reward, _, info = env.step(3 - gt)  # wrong choice
+    assert info['new_trial'] and reward == 0
+
+
+def _step_trials(env, actions):
+    """Step env through a trial per row of actions, from its current trial.
+
+    Returns the trials as a PackedBatch with period times, and the rewards,
+    end indices and performance of stepping.
+    """
+    from neurogym.utils.data import PackedBatch
+    trials, periods, rewards, end_ind, performance = [], [], [], [], []
+    for i in range(len(actions)):
+        task = env.unwrapped
+        trials.append((dict(task.trial), task.ob.copy(), task.gt.copy()))
+        periods.append((dict(task.start_t), dict(task.end_t)))
+        reward = np.zeros(actions.shape[1])
+        for t in range(len(task.gt)):
+            _, reward[t], _, info = env.step(actions[i, t])
+            if info['new_trial']:
+                break
+        rewards.append(reward)
+        end_ind.append(t)
+        performance.append(info['performance'])
+    return (PackedBatch(trials, periods), np.array(rewards),
+            np.array(end_ind), np.array(performance))
+
+
+@pytest.mark.parametrize('abort', [False, True])
+def test_score_actions(abort):
+    """Test scoring actions on a batch of trials is the same as stepping."""
+    from neurogym.utils.data import PackedBatch
+    timing = {'fixation': 300, 'stimulus': 500, 'decision': 500}
+    env = ngym.make('PerceptualDecisionMaking-v0', dt=100, timing=timing)
+    env.seed(0)
+    task = env.unwrapped
+    task.abort = abort
+    rng = np.random.default_rng(0)
+    env.reset(no_step=True)
+
+    n = 20
+    actions = rng.choice(3, size=(n, 20), p=[0.8, 0.1, 0.1])
+    batch, rewards, end_ind, performance = _step_trials(env, actions)
+    score = task.score_actions(actions, batch)
+    assert np.allclose(score[0], rewards)
+    assert np.all(score[1] == end_ind) and np.all(score[2] == performance)
+    assert np.any(end_ind < batch.lengths - 1)
+    assert 0 < np.mean(performance) < 1
+
+    # TrialBatch and its PackedBatch are scored the same
+    trial_batch = env.new_trials(n)
+    trials = [trial_batch.get_trial(i) for i in range(n)]
+    periods = [({p: t[i] for p, t in trial_batch.start_t.items()},
+                {p: t[i] for p, t in trial_batch.end_t.items()})
+               for i in range(n)]
+    for x, y in zip(task.score_actions(actions, trial_batch),
+                    task.score_actions(actions, PackedBatch(trials, periods))):
+        assert np.all(x == y)
+
+    with pytest.raises(ValueError):
+        task.score_actions(actions[:, :5], trial_batch)
+
+
+def test_score_actions_wrapper():
+    """Test scoring actions through wrappers, e.g. on a schedule of tasks."""
+    from neurogym.utils.scheduler import RandomSchedule
+    from neurogym.wrappers import ScheduleEnvs
+    envs = [ngym.make('yang19.go-v0'), ngym.make('yang19.dm1-v0')]
+    env = ScheduleEnvs(envs, schedule=RandomSchedule(2), env_input=True)
+    env.seed(0)
+    env.reset()
+    # Tasks start from the first time step of a trial once they ended one
+    ended = set()
+    while len(ended) < 3 or env.unwrapped.t_ind > 0:
+        task = env.unwrapped
+        if env.step(0)[3]['new_trial']:
+            ended.add(id(task))
+    rng = np.random.default_rng(0)
+    actions = rng.choice(17, size=(30, 100), p=[0.84] + [0.01] * 16)
+    batch, rewards, end_ind, performance = _step_trials(env, actions)
+    assert len(set(batch.trial['i_env'])) == 2
+    score = env.score_actions(actions, batch)
+    assert np.allclose(score[0], rewards)
+    assert np.all(score[1] == end_ind) and np.all(score[2] == performance)
+
+    class DoubleReward(ngym.TrialWrapper):
+        def new_trial(self, **kwargs):
+            return self.env.new_trial(**kwargs)
+
+        def step(self, action):
+            ob, reward, done, info = self.env.step(action)
+            return ob, 2 * reward, done, info
+
+    # A wrapper modifying step can't be scored
+    env = DoubleReward(ngym.make('PerceptualDecisionMaking-v0'))
+    batch = env.new_trials(4)
+    with pytest.raises(ValueError):
+        env.score_actions(np.zeros((4, batch.lengths.max())), batch)
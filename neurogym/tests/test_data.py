@@ -4,6 +4,9 @@ All tests in this file can be run by running in command line
 pytest test_data.py
 """
 
+import json
+import os
+
 import pytest
 
 import numpy as np
@@ -104,3 +107,289 @@ def test_examples_different_custom_env():
 
     env = TestEnv()
     _test_examples_different(env)
+
+
+def test_dataset_workers():
+    """Test datasets generated by worker processes match in-process ones."""
+    kwargs = dict(env_kwargs={'dt': 100}, batch_size=6, seq_len=20,
+                  cache_len=100)
+    dataset = ngym.Dataset('PerceptualDecisionMaking-v0', **kwargs)
+    dataset.seed(0)
+    dataset_workers = ngym.Dataset('PerceptualDecisionMaking-v0',
+                                   num_workers=4, **kwargs)
+    dataset_workers.seed(0)
+    try:
+        for i in range(12):  # several refills of the ring
+            inputs, target = dataset()
+            inputs_workers, target_workers = dataset_workers()
+            assert np.all(inputs == inputs_workers)
+            assert np.all(target == target_workers)
+    finally:
+        dataset_workers.close()
+
+    with pytest.raises(ValueError):
+        ngym.Dataset('PerceptualDecisionMaking-v0', num_workers=2,
+                     max_memory=100, **kwargs)
+
+
+def test_dataset_prefetch():
+    """Test datasets prefetched by a thread match synchronous ones."""
+    kwargs = dict(env_kwargs={'dt': 100}, batch_size=4, seq_len=20,
+                  cache_len=100)
+    dataset = ngym.Dataset('PerceptualDecisionMaking-v0', **kwargs)
+    dataset.seed(0)
+    dataset_prefetch = ngym.Dataset('PerceptualDecisionMaking-v0',
+                                    prefetch=True, **kwargs)
+    dataset_prefetch.seed(0)
+    try:
+        for i in range(12):
+            inputs, target = dataset()
+            inputs_prefetch, target_prefetch = dataset_prefetch()
+            assert np.all(inputs == inputs_prefetch)
+            assert np.all(target == target_prefetch)
+    finally:
+        dataset_prefetch.close()
+    stats = dataset_prefetch.stats
+    assert stats['refills'] == dataset.stats['refills']
+    assert 0 <= stats['blocked'] <= stats['refills']
+
+
+def test_dataset_from_corpus(tmp_path):
+    """Test corpus writing and datasets served from it."""
+    from neurogym.utils.corpus import Corpus, corpus_hash, write_corpus
+    env_id = 'PerceptualDecisionMaking-v0'
+    path = str(tmp_path / 'corpus')
+    meta = write_corpus(path, env_id, n_trial=50, env_kwargs={'dt': 100},
+                        seed=0, chunk_size=20)
+    corpus = Corpus(path)
+    assert len(corpus) == 50
+    assert not corpus.stale
+
+    # Trials are those of new_trials, one chunk at a time
+    env = ngym.make(env_id, dt=100)
+    env.seed(0)
+    batch = env.new_trials(20)
+    for i in range(3):
+        trial, ob_batch, gt_batch = batch.get_trial(i)
+        trial_corpus, ob, gt = corpus.get_trial(i)
+        assert np.all(ob == ob_batch) and np.all(gt == gt_batch)
+        assert trial_corpus['ground_truth'] == trial['ground_truth']
+    _, ob_batch, _ = env.unwrapped.trials_at(20, 20).get_trial(3)
+    assert np.all(corpus.get_trial(23)[1] == ob_batch)
+
+    batch_size, seq_len = 4, 10
+    dataset = ngym.Dataset.from_corpus(path, batch_size=batch_size,
+                                       seq_len=seq_len)
+    row_len = len(corpus.ob) // batch_size
+    for i in range(3):
+        inputs, target = dataset()
+        assert inputs.shape == (seq_len, batch_size) + corpus.ob.shape[1:]
+        start = i * seq_len
+        assert np.all(inputs[:, 1] == corpus.ob[row_len + start:
+                                                 row_len + start + seq_len])
+        assert np.all(target[:, 1] == corpus.gt[row_len + start:
+                                                 row_len + start + seq_len])
+    # Random access returns the trials served in the first row
+    for i in range(3):
+        ob, gt = dataset[i]
+        start = corpus.offsets[i]
+        end = min(corpus.offsets[i + 1], start + seq_len)  # truncated
+        assert np.all(ob[:end - start] == corpus.ob[start:end])
+
+    # from_corpus goes through the constructor
+    dataset = ngym.Dataset(None, batch_size=batch_size, seq_len=seq_len,
+                           corpus=path)
+    assert np.all(dataset()[0][:, 1] == corpus.ob[row_len:row_len + seq_len])
+    with pytest.raises(ValueError):
+        ngym.Dataset(None, mode='trial', corpus=path)
+
+    # Same content is not regenerated, a different version is stale
+    assert write_corpus(path, env_id, n_trial=50, env_kwargs={'dt': 100},
+                        seed=0, chunk_size=20) == meta
+    meta['version'] = '0.0.0'
+    meta['hash'] = corpus_hash(env_id, {'dt': 100}, 0, 50, 20,
+                               version='0.0.0')
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    with pytest.warns(UserWarning):
+        Corpus(path)
+
+
+def test_dataset_getitem():
+    """Test random access to the trials of a dataset."""
+    kwargs = dict(env_kwargs={'dt': 100}, batch_size=2, seq_len=50,
+                  cache_len=200)
+    dataset = ngym.Dataset('PerceptualDecisionMaking-v0', **kwargs)
+    dataset.seed(0)
+    cache_len, seq_len = dataset.stats['cache_len'], 50
+    # Trials served by iteration in the first row, across caches and chunks
+    row = np.concatenate([dataset()[1][:, 0].copy() for _ in range(40)])
+    served = cache_len - seq_len  # the last sequence of a cache is skipped
+    start = 0  # position of the trial in the caches
+    for i in range(70):
+        ob, gt = dataset[i]
+        # Trials end with a decision, so trailing zeros are padding
+        n = np.flatnonzero(gt)[-1] + 1
+        assert np.all(ob[n:] == 0) and np.all(gt[n:] == 0)
+        # The last trial of a cache is cut at its end
+        i_cache, t = divmod(start, cache_len)
+        n = min(n, cache_len - t)
+        n_served = max(min(n, served - t), 0)
+        row_start = i_cache * served + t
+        assert np.all(gt[:n_served] == row[row_start:row_start + n_served])
+        start += n
+    assert start > 5 * cache_len
+    # Batches are not affected
+    inputs_next, target_next = dataset()
+    dataset.seed(0)
+    for _ in range(40):
+        dataset()
+    assert np.all(dataset()[0] == inputs_next)
+
+    # Trials of a non-batched env
+    dataset = ngym.Dataset('ReadySetGo-v0', batch_size=2, seq_len=100)
+    dataset.seed(0)
+    env = ngym.make('ReadySetGo-v0')
+    env.seed(0)
+    for i in range(3):
+        env.new_trial()
+        ob, gt = dataset[i]
+        n = len(env.ob)
+        assert np.all(ob[:n] == env.ob) and np.all(gt[:n] == env.gt)
+
+
+def test_dataset_trial_mode():
+    """Test datasets returning whole trials packed in batches."""
+    env_id = 'ReadySetGo-v0'
+    dataset = ngym.Dataset(env_id, batch_size=4, mode='trial')
+    dataset.seed(0)
+    batch = dataset()
+    assert len(batch) == 4 and batch.offsets[-1] == len(batch.ob)
+    assert np.all(np.diff(batch.offsets) == batch.lengths)
+    assert np.all(np.flatnonzero(batch.trial_start) == batch.offsets[:-1])
+    for i in range(4):
+        env = ngym.make(env_id)
+        env.seed(i)  # row i comes from the env seeded with seed + i
+        env.new_trial()
+        start, end = batch.offsets[i], batch.offsets[i + 1]
+        assert np.all(batch.ob[start:end] == env.ob)
+        assert np.all(batch.gt[start:end] == env.gt)
+        assert batch.trial['measure'][i] == env.trial['measure']
+        assert batch.start_t['set'][i] == env.start_t['set']
+
+    inputs, target, mask = batch.padded()
+    assert inputs.shape[:2] == (batch.lengths.max(), 4)
+    assert np.all(mask.sum(axis=0) == batch.lengths)
+    assert np.all(inputs.swapaxes(0, 1)[mask.T] == batch.ob)
+    assert np.all(target.swapaxes(0, 1)[mask.T] == batch.gt)
+
+    # Grouping by length reduces padding, with the same trials
+    batches = [batch] + [dataset() for _ in range(7)]
+    dataset = ngym.Dataset(env_id, batch_size=4, mode='trial',
+                           bucket_batches=8)
+    dataset.seed(0)
+    batches_bucket = [dataset() for _ in range(8)]
+    assert np.mean([b.padding_efficiency for b in batches_bucket]) > \
+        np.mean([b.padding_efficiency for b in batches])
+    assert np.all(np.sort(np.concatenate([b.lengths for b in batches])) ==
+                  np.sort(np.concatenate([b.lengths for b in
+                                          batches_bucket])))
+
+
+def test_bucket_sampler():
+    """Test grouping trials by length and task in trial mode."""
+    from neurogym.utils.data import PackedBatch
+    from neurogym.utils.scheduler import BucketSampler, RandomSchedule
+    from neurogym.wrappers import ScheduleEnvs
+    sampler = BucketSampler(batch_size=4, window=12, max_padding=0.2)
+    sampler.seed(0)
+    lengths = [10, 50, 11, 12, 48, 13, 49, 30, 51, 10, 12, 52]
+    trials = [({}, np.zeros((n, 1)), np.zeros(n)) for n in lengths]
+    batches = sampler(trials)
+    assert sum(len(batch) for batch in batches) == len(trials)
+    for batch in batches:
+        batch = PackedBatch(batch)
+        assert len(batch) <= 4 and 1 - batch.padding_efficiency <= 0.2
+
+    envs = [ngym.make('PerceptualDecisionMaking-v0'),
+            ngym.make('PerceptualDecisionMakingDelayResponse-v0')]
+    env = ScheduleEnvs(envs, schedule=RandomSchedule(2), env_input=True)
+    sampler = BucketSampler(batch_size=4, window=16, by='task')
+    dataset = ngym.Dataset(env, batch_size=2, mode='trial', sampler=sampler)
+    dataset.seed(0)
+    for _ in range(10):
+        batch = dataset()
+        assert 0 < len(batch) <= 4
+        assert len(set(batch.trial['i_env'])) == 1
+        i_env = batch.trial['i_env'][0]
+        assert np.all(batch.ob[:, -2 + i_env] == 1)
+        if i_env == 0:
+            # Period times follow the trials, so the targets score perfectly
+            _, target, _ = batch.padded(batch_first=True)
+            _, end_ind, performance = envs[0].unwrapped.score_actions(
+                target, batch)
+            assert np.all(performance == 1)
+            assert np.all(end_ind == batch.start_t['decision'] / 100)
+
+
+def test_dataset_output():
+    """Test output dtype and contiguous output buffers of datasets."""
+    kwargs = dict(env_kwargs={'dt': 100}, batch_size=4, seq_len=20,
+                  batch_first=True)
+    dataset = ngym.Dataset('PerceptualDecisionMaking-v0', **kwargs)
+    dataset.seed(0)
+    dataset_out = ngym.Dataset('PerceptualDecisionMaking-v0',
+                               dtype=np.float16, contiguous=True, n_out=2,
+                               **kwargs)
+    dataset_out.seed(0)
+    outputs = list()
+    for i in range(3):
+        inputs, target = dataset()
+        inputs_out, target_out = dataset_out()
+        assert not inputs.flags.c_contiguous
+        assert inputs_out.flags.c_contiguous and target_out.flags.c_contiguous
+        assert inputs_out.dtype == np.float16
+        assert np.all(inputs_out == inputs.astype(np.float16))
+        assert np.all(target_out == target)
+        outputs.append(inputs_out)
+    assert outputs[2] is outputs[0] and outputs[1] is not outputs[0]
+    if hasattr(inputs_out, '__dlpack__'):
+        inputs_out.__dlpack__()
+
+    # Time-major batches are already contiguous views of the cache
+    kwargs['batch_first'] = False
+    dataset = ngym.Dataset('PerceptualDecisionMaking-v0', contiguous=True,
+                           **kwargs)
+    inputs, target = dataset()
+    assert inputs.flags.c_contiguous and inputs.base is not None
+
+
+def test_dataset_auto_cache_len():
+    """Test choosing cache_len from the measured generation cost."""
+    kwargs = dict(env_kwargs={'dt': 100}, batch_size=4, seq_len=20)
+    dataset = ngym.Dataset('PerceptualDecisionMaking-v0', cache_len='auto',
+                           refill_time=0.01, **kwargs)
+    stats = dataset.stats
+    assert stats['cache_len'] % 20 == 0 and stats['cache_len'] > 20
+    assert stats['step_time'] > 0 and stats['step_bytes'] == 4 * (3 * 4 + 8)
+
+    # Explicit values are rounded to the next multiple of seq_len above
+    for cache_len, expected in [(100, 120), (90, 100), (5, 20)]:
+        dataset_fixed = ngym.Dataset('PerceptualDecisionMaking-v0',
+                                     cache_len=cache_len, **kwargs)
+        assert dataset_fixed.stats['cache_len'] == expected
+
+    # Memory cap
+    dataset = ngym.Dataset('PerceptualDecisionMaking-v0', cache_len='auto',
+                           refill_time=100., max_memory=20 * 2000, **kwargs)
+    assert dataset.stats['cache_len'] * 4 * 20 <= 20 * 2000 + 20 * 80
+
+    # The chosen cache_len reproduces the batches
+    dataset.seed(0)
+    dataset_fixed = ngym.Dataset('PerceptualDecisionMaking-v0',
+                                 cache_len=dataset.stats['cache_len'] - 20,
+                                 **kwargs)
+    dataset_fixed.seed(0)
+    assert dataset_fixed.stats['cache_len'] == dataset.stats['cache_len']
+    for i in range(5):
+        assert np.all(dataset()[0] == dataset_fixed()[0])
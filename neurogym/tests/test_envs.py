@@ -6,6 +6,9 @@ All tests in this file can be run by running in command line
 pytest test_envs.py
 """
 
+import subprocess
+import sys
+
 import pytest
 
 import numpy as np
@@ -143,3 +146,62 @@ def test_seeding_all():
         assert (obs1 == obs2).all(), 'obs are not identical'
         assert (rews1 == rews2).all(), 'rewards are not identical'
         assert (acts1 == acts2).all(), 'actions are not identical'
+
+
+def test_manifest():
+    """Test the env manifest matches the envs found by importing them."""
+    from neurogym.envs.manifest import ENVS as manifest
+    from neurogym.envs.registration import _generate_manifest
+    assert manifest == _generate_manifest(), \
+        'Env manifest is outdated, run registration._write_manifest()'
+
+
+def test_import_lazy():
+    """Test importing neurogym does not import env modules or matplotlib."""
+    code = (
+        'import sys\n'
+        'import neurogym\n'
+        'print(\'matplotlib\' in sys.modules)\n'
+        'print(sorted(name for name in sys.modules\n'
+        '             if name.startswith(\'neurogym.envs.\') and\n'
+        '             name not in (\'neurogym.envs.registration\',\n'
+        '                          \'neurogym.envs.manifest\',\n'
+        '                          \'neurogym.envs.collections\')))\n')
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                         text=True, check=True).stdout.splitlines()
+    assert out[0] == 'False', 'import neurogym imports matplotlib'
+    assert out[1] == '[]', 'import neurogym imports env modules ' + out[1]
+
+
+def _trial_stats(batch):
+    """Per-trial statistics of a TrialBatch, one row per trial."""
+    lengths = batch.lengths
+    valid = batch.period_mask()[..., None]
+    mean = (batch.ob * valid).sum(axis=1) / lengths[:, None]
+    std = np.sqrt((((batch.ob - mean[:, None]) * valid) ** 2).sum(axis=1) /
+                  lengths[:, None])
+    gt = batch.gt[np.arange(batch.n), lengths - 1]
+    return np.column_stack([lengths, gt == gt.min(), mean, std])
+
+
+@pytest.mark.parametrize('env_id', [
+    'PerceptualDecisionMaking-v0',
+    'PerceptualDecisionMakingDelayResponse-v0',
+    'PulseDecisionMaking-v0',
+    'yang19.dlyanti-v0',
+    'yang19.ctxdm1-v0',
+    'yang19.multidlydm-v0',
+    'yang19.dnmc-v0'])
+def test_batched_trials_parity(env_id, n=2000):
+    """Test batched trials have the distribution of sequential trials."""
+    from neurogym.core import _stack_trials
+    env = make_env(env_id)
+    env.seed(0)
+    assert env.batched_trials
+    batch, stacked = env.new_trials(n), _stack_trials(env, n)
+    assert set(batch.trial) == set(stacked.trial)
+    batched, sequential = _trial_stats(batch), _trial_stats(stacked)
+    # Two-sample z-test on the mean of each statistic
+    diff = batched.mean(axis=0) - sequential.mean(axis=0)
+    se = np.sqrt((batched.var(axis=0) + sequential.var(axis=0)) / n)
+    assert np.all(np.abs(diff) <= 4 * se + 1e-6)
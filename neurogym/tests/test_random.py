@@ -14,6 +14,89 @@ def test_truncexp():
 
     assert (np.array(a) == np.array(b)).all(), 'TruncExp not reproducible'
 
+    te = TruncExp(vmean=100, rng=np.random.RandomState(0))
+    a = te(size=1000)
+    te = TruncExp(vmean=100, rng=np.random.RandomState(0))
+    assert a.shape == (1000,)
+    assert (a == te(size=1000)).all(), 'TruncExp rng not used'
+
+
+def _rejection_trunc_exp(rng, vmean, vmin, vmax, size):
+    """Previous rejection sampler of trunc_exp, vectorized."""
+    samples = np.zeros(0)
+    while len(samples) < size:
+        x = rng.exponential(vmean, size=size)
+        samples = np.concatenate((samples, x[(vmin <= x) & (x < vmax)]))
+    return samples[:size]
+
+
+@pytest.mark.parametrize('args', [(100, 0, np.inf), (600, 300, 3000),
+                                  (100, 300, 400), (1000, 500, 1500),
+                                  (100, 0, 10)])
+def test_trunc_exp_distribution(args, n=20000):
+    """Test inverse-CDF trunc_exp against rejection sampling."""
+    from neurogym.utils.random import trunc_exp
+    vmean, vmin, vmax = args
+    rng = np.random.RandomState(0)
+    t = trunc_exp(rng, vmean, vmin, vmax, size=n)
+    ref = _rejection_trunc_exp(rng, vmean, vmin, vmax, n)
+    assert np.all((vmin <= t) & (t < vmax))
+    assert np.isscalar(trunc_exp(rng, vmean, vmin, vmax))
+
+    # Two-sample Kolmogorov-Smirnov test, critical value for alpha=0.001
+    x = np.sort(np.concatenate((t, ref)))
+    cdf_t = np.searchsorted(np.sort(t), x, side='right') / n
+    cdf_ref = np.searchsorted(np.sort(ref), x, side='right') / n
+    assert np.max(np.abs(cdf_t - cdf_ref)) < 1.95 * np.sqrt(2 / n)
+    assert abs(t.mean() - ref.mean()) < 5 * ref.std() / np.sqrt(n)
+
+
+@pytest.mark.parametrize('bit_generator', ['Philox', 'PCG64'])
+def test_generator(bit_generator):
+    """Test trial substreams and RandomState methods of Generator."""
+    import copy
+    import pickle
+    from neurogym.utils.random import Generator
+    rng = Generator(0, bit_generator)
+    assert rng.rand(2, 3).shape == (2, 3) and np.isscalar(rng.rand())
+    assert rng.randn(4).shape == (4,) and np.isscalar(rng.randn())
+    assert 0 <= rng.randint(3) < 3
+    assert np.all((rng.random_integers(1, 3, size=100) >= 1) &
+                  (rng.random_integers(1, 3, size=100) <= 3))
+
+    rng.set_trial(5)
+    a = rng.random(10)
+    rng.set_trial(3)
+    b = rng.random(10)
+    rng.uniform(size=7)
+    rng.set_trial(5)
+    assert np.all(a == rng.random(10)), 'Trial substream not reproducible'
+    assert not np.any(a == b)
+    rng = Generator(0, bit_generator)
+    rng.set_trial(5)
+    assert np.all(a == rng.random(10))
+
+    for rng_copy in [copy.deepcopy(rng), pickle.loads(pickle.dumps(rng))]:
+        assert type(rng_copy) is Generator
+        assert rng_copy.random() == copy.deepcopy(rng).random()
+        rng_copy.set_trial(5)
+        assert np.all(a == rng_copy.random(10))
+
+
+def test_trial_seeding():
+    """Test trials only depend on the seed and their index."""
+    import neurogym as ngym
+    env = ngym.make('PerceptualDecisionMaking-v0')
+    env_other = ngym.make('PerceptualDecisionMaking-v0')
+    env.seed(0)
+    env_other.seed(0)
+    for i in range(5):
+        trial = env.new_trial()
+        env_other.rng.uniform(size=i + 1)  # unrelated draws between trials
+        trial_other = env_other.new_trial()
+        assert trial == trial_other
+        assert np.all(env.ob == env_other.ob)
+
 
 def test_randomschedule():
     schedule = RandomSchedule(10)
@@ -35,3 +118,40 @@ def test_randomschedule():
     b = [schedule() for i in range(1000)]
     assert (np.array(a) == np.array(b)).all(), 'RandomBlockSchedule not ' \
                                                'reproducible'
+
+
+def test_compile_timing():
+    """Test samplers compiled from all timing formats."""
+    from neurogym.utils.random import compile_timing
+    rng = np.random.RandomState(0)
+    timings = [300, [100, 200, 300], ('uniform', (100, 300)),
+               ('choice', [100, 200, 300]), ('constant', 300),
+               ('truncated_exponential', [150, 100, 300]),
+               lambda: rng.uniform(100, 300)]
+    for timing in timings:
+        sampler = compile_timing(timing)
+        t = sampler(rng, size=1000)
+        assert t.shape == (1000,)
+        if callable(timing):
+            assert sampler.min is None and sampler.max is None  # unknown
+        else:
+            assert sampler.min >= 0
+            assert np.all((sampler.min <= t) & (t <= sampler.max))
+        assert np.isscalar(sampler(rng))
+
+    te = TruncExp(150, 100, 300)
+    sampler = compile_timing(te)
+    te.seed(0)
+    t = sampler(rng, size=1000)
+    te.seed(0)
+    assert np.all(t == [te() for _ in range(1000)])
+    assert (sampler.min, sampler.max) == (100, 300)
+
+    sampler = compile_timing(('truncated_exponential', [100, 1000, 1100]))
+    t = sampler(rng, size=1000)
+    assert np.all((1000 <= t) & (t < 1100))
+    assert compile_timing(('truncated_exponential', [100, 500, 500]))(rng) \
+        == 500
+    t = compile_timing(('until', 1000))(rng, size=3, tmax=np.array([0, 200,
+                                                                    900]))
+    assert np.all(t == [1000, 800, 100])
@@ -70,6 +70,52 @@ def test_speed_all():
             print(e)
 
 
+def test_speed_info_mode(env='PerceptualDecisionMaking-v0', n_steps=20000):
+    """Test speed of stepping with each info_mode."""
+    times = dict()
+    for info_mode in ['full', 'minimal', 'none']:
+        env_mode = gym.make(env, dt=20)
+        env_mode.set_info_mode(info_mode)
+        env_mode.reset()
+        new_trial = False
+        start_time = time.time()
+        for stp in range(n_steps):
+            state, rew, done, info = env_mode.step(0)
+            new_trial = new_trial or info['new_trial']
+        times[info_mode] = (time.time() - start_time) / n_steps * 1e6
+        assert new_trial
+        if info_mode == 'none':
+            assert list(info.keys()) == ['new_trial']
+        elif info_mode == 'full':
+            assert 'gt' in info
+        print('Time/step {:0.3f}us [info_mode {:s}]'.format(
+            times[info_mode], info_mode))
+    print('Saved/step {:0.3f}us [info_mode none]'.format(
+        times['full'] - times['none']))
+
+
+def test_memory_new_trial(env='PerceptualDecisionMaking-v0', n_trials=500):
+    """Test memory allocated by generating trials, with and without reuse."""
+    import tracemalloc
+    peaks = dict()
+    for reuse_buffers in [False, True]:
+        env_reuse = gym.make(env, dt=20, dim_ring=256)
+        env_reuse.set_reuse_buffers(reuse_buffers)
+        env_reuse.new_trial()
+        tracemalloc.start()
+        peak = 0
+        for stp in range(n_trials):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            env_reuse.new_trial()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+        tracemalloc.stop()
+        peaks[reuse_buffers] = peak
+        print('Peak allocation/trial {:0.1f}kB [reuse_buffers {:s}]'.format(
+            peak / 1e3, str(reuse_buffers)))
+    assert peaks[True] < peaks[False]
+
+
 def test_speed_dataset(env):
     batch_size = 16
     seq_len = 100
@@ -0,0 +1,37 @@
+"""Test stimuli of ring-coded tasks."""
+
+import numpy as np
+import pytest
+
+from neurogym.utils import stimuli
+
+
+def test_table():
+    """Test tables hold the stimuli at the preferred angles."""
+    theta = np.linspace(0, 2 * np.pi, 17)[:-1]
+    table = stimuli.table(16)
+    assert table is stimuli.table(16)
+    assert not table.flags.writeable
+    for i in [0, 5, 15]:
+        assert np.allclose(table[i], np.cos(theta - theta[i]))
+
+    bump = stimuli.table(16, 'gaussian')[3]
+    assert bump[3] == 1 and np.all(bump <= 1)
+    assert np.allclose(bump, np.roll(bump[::-1], 7))  # symmetric around 3
+
+    with pytest.raises(ValueError):
+        stimuli.table(16, 'square')
+
+
+def test_ring_stimulus():
+    """Test stimuli at arbitrary angles, looked up or computed."""
+    theta = stimuli.ring_angles(8)
+    loc = np.mod(theta[[1, 6]] + np.pi, 2 * np.pi)
+    stim = stimuli.ring_stimulus(loc, 8, 'gaussian')
+    assert np.all(stim == stimuli.table(8, 'gaussian')[[5, 2]])
+
+    loc = np.array([0.3, 4.1])
+    stim = stimuli.ring_stimulus(loc, 8)
+    assert stim.shape == (2, 8)
+    assert np.allclose(stim, np.cos(theta - loc[:, None]))
+    assert np.allclose(stimuli.ring_stimulus(0.3, 8), stim[0])
@@ -0,0 +1,57 @@
+"""Test trial streams."""
+
+import numpy as np
+
+import neurogym as ngym
+from neurogym.utils import stream
+
+
+def _env(seed=0):
+    env = ngym.make('PerceptualDecisionMaking-v0')
+    env.seed(seed)
+    return env
+
+
+def test_trials():
+    """Test streams of trials are those of the env."""
+    env = _env()
+    obs = [(trial, ob.copy(), gt.copy()) for trial, ob, gt in
+           stream.trials(_env(), n=5)]
+    assert len(obs) == 5
+    for trial, ob, gt in obs:
+        assert trial == env.new_trial()
+        assert np.all(ob == env.ob) and np.all(gt == env.gt)
+
+
+def test_stages():
+    """Test batch, pack, shuffle_buffer, interleave and prefetch."""
+    env = _env()
+    lengths = [len(ob) for _, ob, _ in stream.trials(_env(), n=20)]
+
+    batches = list(stream.pack(stream.batch(stream.trials(env, n=20), 8)))
+    assert [len(b) for b in batches] == [8, 8, 4]
+    assert list(np.concatenate([b.lengths for b in batches])) == lengths
+
+    items = list(stream.shuffle_buffer(range(100), 10, seed=0))
+    assert sorted(items) == list(range(100)) and items != list(range(100))
+    assert items == list(stream.shuffle_buffer(range(100), 10, seed=0))
+
+    items = list(stream.interleave([range(3), range(10, 15)]))
+    assert items == [0, 10, 1, 11, 2, 12, 13, 14]
+    items = list(stream.interleave([range(100), range(100, 200)],
+                                   weights=[0.9, 0.1], seed=0))
+    assert len(items) == 200 and np.mean(np.array(items[:50]) < 100) > 0.7
+
+    items = list(stream.map(stream.prefetch(
+        stream.trials(_env(), n=20), size=3), lambda t: len(t[1])))
+    assert items == lengths
+
+
+def test_parallel_trials():
+    """Test trials generated by worker processes are in order."""
+    env = _env()
+    env.new_trial()  # workers start from the current trial index
+    parallel = list(stream.trials(env, n=7, num_workers=2))
+    for trial, ob, gt in parallel:
+        assert trial == env.new_trial()
+        assert np.all(ob == env.ob) and np.all(gt == env.gt)
@@ -0,0 +1,83 @@
+"""Test vectorized stepping of environments."""
+
+import numpy as np
+
+import neurogym as ngym
+from neurogym.vector import VecTrialEnv, _CHUNK_SIZE
+
+
+def _run_oracle(vec, n_steps=500):
+    """Step vec with the ground truth, return rewards at trial ends."""
+    vec.seed(0)
+    vec.reset()
+    index = np.arange(vec.num_envs)
+    rewards = list()
+    for i in range(n_steps):
+        action = vec.gt[index, vec.t_ind]
+        ob, reward, done, info = vec.step(action)
+        assert ob.shape == (vec.num_envs,) + vec.observation_space.shape
+        rewards.append(reward[info['new_trial']])
+        assert np.all(info['performance'][info['new_trial']] == 1)
+    return np.concatenate(rewards)
+
+
+def test_vector_step():
+    """Test vectorized tasks reward the ground truth."""
+    for env_name in ['PerceptualDecisionMaking-v0', 'AntiReach-v0',
+                     'ContextDecisionMaking-v0', 'yang19.go-v0',
+                     'yang19.dm1-v0']:
+        vec = VecTrialEnv(env_name, num_envs=8)
+        assert vec.vectorized, env_name
+        rewards = _run_oracle(vec)
+        assert len(rewards) > 0
+        assert np.all(rewards == 1)
+
+
+def test_vector_abort():
+    """Test breaking fixation is penalized."""
+    vec = VecTrialEnv('PerceptualDecisionMaking-v0', num_envs=4)
+    vec.reset()
+    vec.t_ind[:] = 0
+    _, reward, _, info = vec.step(np.ones(4, dtype=int))
+    assert np.all(reward == vec.env.unwrapped.rewards['abort'])
+    assert not np.any(info['new_trial'])
+
+
+def test_vector_fallback():
+    """Test tasks that can't be vectorized are stepped one by one."""
+    class CustomStep(ngym.envs.perceptualdecisionmaking.PerceptualDecisionMaking):
+        def _step(self, action):
+            return self.ob_now, 0., False, {'new_trial': False}
+
+    vec = VecTrialEnv(CustomStep(), num_envs=3)
+    assert not vec.vectorized
+    vec = VecTrialEnv('DelayMatchSample-v0', num_envs=3)
+    assert not vec.vectorized
+    ob = vec.reset()
+    assert ob.shape == (3,) + vec.observation_space.shape
+    for i in range(50):
+        ob, reward, done, info = vec.step(np.zeros(3, dtype=int))
+        assert reward.shape == (3,)
+        assert info['new_trial'].shape == (3,)
+
+
+def test_vector_seeds():
+    """Test each copy draws its trials from its own seeded env."""
+    for env_name in ['PerceptualDecisionMaking-v0', 'AntiReach-v0']:
+        vec = VecTrialEnv(env_name, num_envs=3)
+        vec.seed(1)
+        vec.reset()
+        trials = [[vec.gt[i, :vec.lengths[i]].copy()] for i in range(3)]
+        for _ in range(600):
+            _, _, _, info = vec.step(np.zeros(3, dtype=int))
+            for i in np.flatnonzero(info['new_trial']):
+                trials[i].append(vec.gt[i, :vec.lengths[i]].copy())
+        for i in range(3):
+            env = ngym.make(env_name)
+            env.seed(1 + i)
+            assert len(trials[i]) > _CHUNK_SIZE
+            for _ in range(len(trials[i]) // _CHUNK_SIZE + 1):
+                env.new_trials(_CHUNK_SIZE)  # as generated by the copy
+            for j, gt in enumerate(trials[i]):
+                trial_gt = env.unwrapped.trial_at(j)[2]
+                assert np.all(gt == trial_gt), (env_name, i, j)
@@ -1 +1,7 @@
-from neurogym.utils.plotting import plot_env
\ No newline at end of file
+def __getattr__(name):
+    # Import plotting, and matplotlib, only when used
+    if name == 'plot_env':
+        from neurogym.utils.plotting import plot_env
+        return plot_env
+    raise AttributeError(
+        'module {!r} has no attribute {!r}'.format(__name__, name))
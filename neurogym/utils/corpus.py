@@ -0,0 +1,168 @@
+"""Corpora of pre-generated trials stored on disk.
+
+A corpus is a directory containing
+    ob.bin: observations of all trials concatenated along time
+    gt.bin: ground-truths of all trials concatenated along time
+    offsets.npy: (n_trial + 1,) start index of each trial in ob and gt
+    trial.npz: one array (n_trial, ...) per field of the trial dicts
+    meta.json: env id, kwargs, seed, shapes, dtypes and content hash
+
+ob.bin and gt.bin are raw arrays, written chunk by chunk and read as
+memory maps, so corpora larger than memory can be written and shared.
+"""
+
+import hashlib
+import json
+import os
+import warnings
+
+import numpy as np
+
+from neurogym.version import VERSION
+
+
+def corpus_hash(env_id, env_kwargs=None, seed=0, n_trial=None,
+                chunk_size=None, version=VERSION):
+    """Hash identifying the content of a corpus."""
+    content = {'env_id': env_id, 'env_kwargs': env_kwargs or {},
+               'seed': seed, 'n_trial': n_trial, 'chunk_size': chunk_size,
+               'version': version}
+    content = json.dumps(content, sort_keys=True, default=repr)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def write_corpus(path, env_id, n_trial, env_kwargs=None, seed=0,
+                 chunk_size=1000, overwrite=False):
+    """Generate trials of a task and store them in a corpus.
+
+    Trials are generated with env.new_trials, chunk_size at a time, so that
+    chunk c is regenerated by env.unwrapped.trials_at(c * chunk_size,
+    chunk_size) on an env seeded with seed. Fields
+    of the trial dicts that are not numeric arrays of the same shape for
+    all trials are not stored.
+
+    Args:
+        path: str, corpus directory
+        env_id: str, id of the task
+        n_trial: int, number of trials
+        env_kwargs: dict, additional kwargs for environment
+        seed: int, seed of the environment
+        chunk_size: int, number of trials generated at a time
+        overwrite: bool, if False and path holds a corpus with the same
+            content hash, the corpus is not regenerated
+
+    Returns:
+        meta: dict, content of meta.json
+    """
+    from neurogym.envs.registration import make
+
+    env_kwargs = env_kwargs or {}
+    content_hash = corpus_hash(env_id, env_kwargs, seed, n_trial, chunk_size)
+    meta_file = os.path.join(path, 'meta.json')
+    if not overwrite and os.path.exists(meta_file):
+        with open(meta_file) as f:
+            meta = json.load(f)
+        if meta['hash'] == content_hash:
+            return meta
+
+    os.makedirs(path, exist_ok=True)
+    if os.path.exists(meta_file):
+        os.remove(meta_file)  # corpus is incomplete until meta is written
+
+    env = make(env_id, **env_kwargs)
+    env.seed(seed)
+    ob_dtype = np.dtype(env.observation_space.dtype)
+    gt_dtype = np.dtype(env.action_space.dtype)
+    lengths = list()
+    trial_fields = dict()
+    with open(os.path.join(path, 'ob.bin'), 'wb') as f_ob, \
+            open(os.path.join(path, 'gt.bin'), 'wb') as f_gt:
+        for start in range(0, n_trial, chunk_size):
+            batch = env.new_trials(min(chunk_size, n_trial - start))
+            ob, gt = batch.concatenate()
+            if gt is None:
+                gt = np.zeros((len(ob),) + env.action_space.shape)
+            ob.astype(ob_dtype, copy=False).tofile(f_ob)
+            gt.astype(gt_dtype, copy=False).tofile(f_gt)
+            lengths.append(batch.lengths)
+            for key, val in batch.trial.items():
+                trial_fields.setdefault(key, list()).append(np.asarray(val))
+
+    offsets = np.zeros(n_trial + 1, dtype=np.int64)
+    np.cumsum(np.concatenate(lengths), out=offsets[1:])
+    np.save(os.path.join(path, 'offsets.npy'), offsets)
+
+    trial = dict()
+    for key, vals in trial_fields.items():
+        if len(set(val.shape[1:] for val in vals)) > 1:
+            continue
+        val = np.concatenate(vals)
+        if val.dtype.kind in 'biufcU' and len(val) == n_trial:
+            trial[key] = val
+    np.savez(os.path.join(path, 'trial.npz'), **trial)
+
+    meta = {'env_id': env_id, 'env_kwargs': env_kwargs, 'seed': seed,
+            'n_trial': n_trial, 'chunk_size': chunk_size,
+            'version': VERSION, 'hash': content_hash,
+            'n_step': int(offsets[-1]),
+            'ob_shape': list(env.observation_space.shape),
+            'gt_shape': list(env.action_space.shape),
+            'ob_dtype': ob_dtype.str, 'gt_dtype': gt_dtype.str}
+    with open(meta_file + '.tmp', 'w') as f:
+        json.dump(meta, f, indent=1, default=repr)
+    os.replace(meta_file + '.tmp', meta_file)
+    return meta
+
+
+class Corpus(object):
+    """Read-only view of a corpus written by write_corpus.
+
+    Args:
+        path: str, corpus directory
+
+    Attributes:
+        meta: dict, content of meta.json
+        ob, gt: memory-mapped arrays (n_step, ...) of all trials
+        offsets: array (n_trial + 1,), start index of each trial
+        trial: dict of arrays (n_trial, ...), fields of the trial dicts
+    """
+
+    def __init__(self, path):
+        meta_file = os.path.join(path, 'meta.json')
+        if not os.path.exists(meta_file):
+            raise ValueError('No complete corpus in ' + str(path))
+        with open(meta_file) as f:
+            self.meta = json.load(f)
+        meta = self.meta
+        if self.stale:
+            warnings.warn('Corpus in {:s} was written by neurogym {:s}, '
+                          'its trials may differ from those of neurogym '
+                          '{:s}'.format(str(path), meta['version'], VERSION))
+
+        n_step = meta['n_step']
+        self.ob = np.memmap(os.path.join(path, 'ob.bin'), mode='r',
+                            dtype=meta['ob_dtype'],
+                            shape=(n_step,) + tuple(meta['ob_shape']))
+        self.gt = np.memmap(os.path.join(path, 'gt.bin'), mode='r',
+                            dtype=meta['gt_dtype'],
+                            shape=(n_step,) + tuple(meta['gt_shape']))
+        self.offsets = np.load(os.path.join(path, 'offsets.npy'))
+        with np.load(os.path.join(path, 'trial.npz')) as trial:
+            self.trial = dict(trial)
+
+    @property
+    def stale(self):
+        """True if the corpus content hash doesn't match this neurogym."""
+        meta = self.meta
+        return meta['hash'] != corpus_hash(
+            meta['env_id'], meta['env_kwargs'], meta['seed'],
+            meta['n_trial'], meta['chunk_size'])
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def get_trial(self, i):
+        """Return the trial dict, ob and gt of the i-th trial."""
+        start, end = self.offsets[i], self.offsets[i + 1]
+        trial = {key: val[i] for key, val in self.trial.items()}
+        return trial, self.ob[start:end], self.gt[start:end]
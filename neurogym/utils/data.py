@@ -1,10 +1,348 @@
 """Utilities for data."""
 
 import copy
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import queue
+import threading
+import time
+import traceback
 
 import numpy as np
 import gym
 
+from neurogym.core import TrialWrapper, _stack_trial_info
+from neurogym.utils.scheduler import BucketSampler
+
+# Number of trials generated at once by envs with batched trials, in
+# sequence mode. Random access regenerates the whole chunk of a trial.
+_CHUNK_SIZE = 64
+
+
+def _fill_cache(envs, inputs, target, batch_first, pending=None, **kwargs):
+    """Fill each row of inputs and target with consecutive trials of an env.
+
+    Each row holds the trials of its env in the order they are generated,
+    the last one cut at the end of the cache.
+
+    Args:
+        envs: list of envs, one per row
+        inputs, target: numpy arrays (cache_len, len(envs), ...), or
+            (len(envs), cache_len, ...) if batch_first
+        batch_first: bool
+        pending: list, one entry per env, of the trials of a chunk
+            generated by an env with batched trials that did not fit in the
+            previous cache, served first and updated in place. If None,
+            these trials are dropped
+    """
+    if pending is None:
+        pending = [None] * len(envs)
+    cache_len = inputs.shape[1] if batch_first else inputs.shape[0]
+    for i, env in enumerate(envs):
+        batched = getattr(env, 'batched_trials', False)
+        seq_start = 0
+        seq_end = 0
+        while seq_end < cache_len:
+            # TODO: Right now this only works for env with new_trial
+            if batched:
+                if pending[i] is None:
+                    batch = env.new_trials(_CHUNK_SIZE, **kwargs)
+                    ob, gt = batch.concatenate()
+                    lengths = batch.lengths
+                else:
+                    ob, gt, lengths = pending[i]
+                    pending[i] = None
+            else:
+                env.new_trial(**kwargs)
+                ob, gt = env.ob, env.gt
+            seq_len = ob.shape[0]
+            seq_end = seq_start + seq_len
+            if seq_end > cache_len:
+                seq_end = cache_len
+                seq_len = seq_end - seq_start
+                if batched:
+                    # Keep the trials starting after the end of the cache
+                    starts = np.cumsum(lengths) - lengths
+                    k = np.searchsorted(starts, seq_len)
+                    if k < len(lengths):
+                        pending[i] = (ob[starts[k]:], gt[starts[k]:],
+                                      lengths[k:])
+            if batch_first:
+                inputs[i, seq_start:seq_end, ...] = ob[:seq_len]
+                target[i, seq_start:seq_end, ...] = gt[:seq_len]
+            else:
+                inputs[seq_start:seq_end, i, ...] = ob[:seq_len]
+                target[seq_start:seq_end, i, ...] = gt[:seq_len]
+            seq_start = seq_end
+
+
+def _worker(envs, inputs, target, rows, batch_first, tasks, done):
+    """Fill the rows of the requested blocks of the ring, in order."""
+    pending = [None] * len(envs)
+    try:
+        while True:
+            block = tasks.get()
+            if block is None:
+                break
+            if batch_first:
+                _fill_cache(envs, inputs[block, rows], target[block, rows],
+                            batch_first, pending)
+            else:
+                _fill_cache(envs, inputs[block, :, rows],
+                            target[block, :, rows], batch_first, pending)
+            done.put(block)
+    except BaseException:
+        done.put(traceback.format_exc())
+
+
+class _WorkerPool(object):
+    """Worker processes filling a ring of cache blocks in shared memory.
+
+    Each worker owns a contiguous slice of the envs (rows of the cache) and
+    fills its rows of every block in ring order, so the content of the
+    blocks does not depend on the number of workers or their timing. A
+    block is refilled once the consumer moves to the next block.
+
+    Args:
+        envs: list of envs, one per row of the cache
+        inputs_shape, target_shape: shape of one cache block
+        inputs_dtype, target_dtype: dtype of the cache
+        batch_first: bool
+        num_workers: int, number of processes
+        n_blocks: int, number of blocks in the ring
+    """
+
+    def __init__(self, envs, inputs_shape, target_shape, inputs_dtype,
+                 target_dtype, batch_first, num_workers, n_blocks):
+        if 'fork' not in mp.get_all_start_methods():
+            raise RuntimeError('num_workers > 0 requires the fork start '
+                               'method of multiprocessing')
+        ctx = mp.get_context('fork')
+        self.n_blocks = n_blocks
+        self._shms = list()
+        self.inputs = self._shared_array(
+            (n_blocks,) + tuple(inputs_shape), inputs_dtype)
+        self.target = self._shared_array(
+            (n_blocks,) + tuple(target_shape), target_dtype)
+
+        self._done = ctx.Queue()
+        self._tasks = list()
+        self._workers = list()
+        # Workers inherit envs and the shared arrays through fork
+        for rows in np.array_split(np.arange(len(envs)), num_workers):
+            tasks = ctx.Queue()
+            worker = ctx.Process(
+                target=_worker, daemon=True,
+                args=(envs[rows[0]:rows[-1] + 1], self.inputs, self.target,
+                      slice(rows[0], rows[-1] + 1), batch_first, tasks,
+                      self._done))
+            worker.start()
+            self._tasks.append(tasks)
+            self._workers.append(worker)
+
+        self._n_done = np.zeros(n_blocks, dtype=int)
+        self._i_block = -1  # block currently served
+        for block in range(n_blocks):
+            self._request(block)
+
+    def _shared_array(self, shape, dtype):
+        nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._shms.append(shm)
+        return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    def _request(self, block):
+        self._n_done[block] = 0
+        for tasks in self._tasks:
+            tasks.put(block)
+
+    def ready(self):
+        """True if the next block is filled."""
+        self._collect(block=False)
+        return self._n_done[(self._i_block + 1) % self.n_blocks] == \
+            len(self._workers)
+
+    def _collect(self, block):
+        """Collect messages of finished blocks from workers."""
+        while True:
+            try:
+                msg = self._done.get(block=block, timeout=1 if block else None)
+            except queue.Empty:
+                if not block:
+                    return
+                if not all(worker.is_alive() for worker in self._workers):
+                    raise RuntimeError('Dataset worker died unexpectedly')
+                continue
+            if isinstance(msg, str):
+                raise RuntimeError('Error in Dataset worker:\n' + msg)
+            self._n_done[msg] += 1
+            return
+
+    def next_block(self):
+        """Release the current block and return the next one, when filled.
+
+        Returns:
+            inputs, target: numpy arrays, views of the shared memory
+        """
+        if self._i_block >= 0:
+            self._request(self._i_block)
+        self._i_block = (self._i_block + 1) % self.n_blocks
+        while self._n_done[self._i_block] < len(self._workers):
+            self._collect(block=True)
+        return self.inputs[self._i_block], self.target[self._i_block]
+
+    def close(self):
+        """Stop workers and release the shared memory."""
+        for tasks in self._tasks:
+            tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        self._tasks, self._workers = list(), list()
+        self.inputs = self.target = None
+        for shm in self._shms:
+            try:
+                shm.close()
+            except BufferError:  # batches still referenced by the user
+                pass
+            shm.unlink()
+        self._shms = list()
+
+
+class _PrefetchThread(object):
+    """Background thread filling a ring of cache blocks in order.
+
+    Same interface as _WorkerPool, with all envs owned by a single thread.
+    NumPy releases the GIL in large array operations, so generating the
+    next block overlaps with the consumption of the current one.
+    """
+
+    def __init__(self, envs, inputs_shape, target_shape, inputs_dtype,
+                 target_dtype, batch_first, n_blocks=2):
+        self.n_blocks = n_blocks
+        self.inputs = np.zeros((n_blocks,) + tuple(inputs_shape),
+                               dtype=inputs_dtype)
+        self.target = np.zeros((n_blocks,) + tuple(target_shape),
+                               dtype=target_dtype)
+        self._envs = envs
+        self._batch_first = batch_first
+        self._pending = [None] * len(envs)
+        self._tasks = queue.Queue()
+        self._done = queue.Queue()
+        self._i_block = -1
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        for block in range(n_blocks):
+            self._tasks.put(block)
+
+    def _run(self):
+        try:
+            while True:
+                block = self._tasks.get()
+                if block is None:
+                    break
+                _fill_cache(self._envs, self.inputs[block],
+                            self.target[block], self._batch_first,
+                            self._pending)
+                self._done.put(block)
+        except BaseException:
+            self._done.put(traceback.format_exc())
+
+    def ready(self):
+        """True if the next block is filled."""
+        return not self._done.empty()
+
+    def next_block(self):
+        """Release the current block and return the next one, when filled."""
+        if self._i_block >= 0:
+            self._tasks.put(self._i_block)
+        msg = self._done.get()
+        if isinstance(msg, str):
+            raise RuntimeError('Error in Dataset prefetch thread:\n' + msg)
+        self._i_block = msg
+        return self.inputs[msg], self.target[msg]
+
+    def close(self):
+        """Stop the thread once it finishes the block it is filling."""
+        self._tasks.put(None)
+        self._thread.join()
+
+
+class PackedBatch(object):
+    """A batch of whole trials concatenated along time, without padding.
+
+    Returned by Dataset with mode='trial'.
+
+    Args:
+        trials: list of (trial, ob, gt), with trial a dict and ob, gt numpy
+            arrays (T, ...) of one trial
+        periods: None, or list of (start_t, end_t) of each trial, dicts of
+            the start and end time of its periods
+
+    Attributes:
+        ob: numpy array (sum(lengths), ob_space.shape...)
+        gt: numpy array (sum(lengths), action_space.shape...)
+        lengths: numpy array (batch_size,), number of time steps of each trial
+        offsets: numpy array (batch_size + 1,), start index of each trial in
+            ob and gt, and total length
+        trial_start: bool numpy array (sum(lengths),), True at the first time
+            step of each trial
+        trial: dict of numpy arrays (batch_size, ...), trial information
+        start_t, end_t: dicts of numpy arrays (batch_size,), start and end
+            time of each period, nan for trials without the period. Empty
+            if periods is None
+    """
+
+    def __init__(self, trials, periods=None):
+        self.lengths = np.array([len(ob) for _, ob, _ in trials], dtype=int)
+        self.offsets = np.zeros(len(trials) + 1, dtype=int)
+        np.cumsum(self.lengths, out=self.offsets[1:])
+        self.ob = np.concatenate([ob for _, ob, _ in trials])
+        self.gt = np.concatenate([gt for _, _, gt in trials])
+        self.trial_start = np.zeros(len(self.ob), dtype=bool)
+        self.trial_start[self.offsets[:-1][self.lengths > 0]] = True
+        self.trial = _stack_trial_info([trial for trial, _, _ in trials])
+        self.start_t = dict()
+        self.end_t = dict()
+        if periods is not None:
+            names = set().union(*[start for start, _ in periods])
+            for name in names:
+                self.start_t[name] = np.array(
+                    [start.get(name, np.nan) for start, _ in periods])
+                self.end_t[name] = np.array(
+                    [end.get(name, np.nan) for _, end in periods])
+
+    def __len__(self):
+        return len(self.lengths)
+
+    @property
+    def padding_efficiency(self):
+        """Fraction of the padded batch made of trial time steps."""
+        if len(self) == 0 or self.lengths.max() == 0:
+            return 1.
+        return self.lengths.sum() / (len(self) * self.lengths.max())
+
+    def padded(self, batch_first=False):
+        """Return the trials zero-padded to the longest trial.
+
+        Returns:
+            inputs, target: numpy arrays (T_max, batch_size, ...), or
+                (batch_size, T_max, ...) if batch_first
+            mask: bool numpy array (T_max, batch_size) or (batch_size,
+                T_max), True at the time steps of the trials
+        """
+        t_max = self.lengths.max() if len(self) > 0 else 0
+        mask = np.arange(t_max) < self.lengths[:, np.newaxis]
+        inputs = np.zeros(mask.shape + self.ob.shape[1:], dtype=self.ob.dtype)
+        target = np.zeros(mask.shape + self.gt.shape[1:], dtype=self.gt.dtype)
+        inputs[mask] = self.ob
+        target[mask] = self.gt
+        if not batch_first:
+            inputs, target = inputs.swapaxes(0, 1), target.swapaxes(0, 1)
+            mask = mask.T
+        return inputs, target, mask
+
 
 class Dataset(object):
     """Make an environment into an iterable dataset for supervised learning.
@@ -20,45 +358,136 @@ class Dataset(object):
         seq_len: int, sequence length
         max_batch: int, maximum number of batch for iterator, default infinite
         batch_first: bool, if True, return (batch, seq_len, n_units), default False
-        cache_len: int, default length of caching
+        cache_len: int, default length of caching, or 'auto' to choose it
+            from the generation time and memory of a few trials, measured
+            on a copy of the env, such that generating a cache takes about
+            refill_time and the cache blocks fit in max_memory. The cache
+            length, in stats['cache_len'], is the next multiple of seq_len
+            above an int cache_len, and the nearest one up for 'auto'.
+            Batches of a seed depend on it, pass
+            cache_len=stats['cache_len'] - seq_len to reproduce them
+        refill_time: float, target time in seconds to generate a cache if
+            cache_len is 'auto', default 1
+        num_workers: int, if > 0, caches are generated ahead of time by this
+            number of processes, each owning a slice of the batch, in a ring
+            of cache blocks in shared memory. Batches are views of the ring,
+            valid until the block is refilled. Call close() when done.
+        max_memory: int, maximum bytes used by the ring of cache blocks,
+            which holds between 2 and 4 blocks, or by the cache if
+            cache_len is 'auto'. Default 1GB
+        prefetch: bool, if True and num_workers is 0, the next cache is
+            generated by a background thread while the current one is
+            consumed. Call close() when done.
+        mode: str, 'sequence' (default) to return trials concatenated and
+            cut into sequences of seq_len, or 'trial' to return whole trials
+            as a PackedBatch, one trial from each of the batch_size envs
+        bucket_batches: int, in 'trial' mode, number of batches generated at
+            once, whose trials are grouped by length into batches returned
+            in random order. Default 1, no grouping
+        dtype: numpy dtype of inputs, e.g. np.float16, or np.float32 to
+            convert to bfloat16 in the framework. Observations are converted
+            when the cache is filled. Default observation_space.dtype
+        contiguous: bool, if True, batches are C-contiguous, copied if needed
+            into a rotating set of n_out preallocated output buffers, each
+            valid until it is reused n_out batches later
+        n_out: int, number of output buffers if contiguous, default 2
+        sampler: utils.scheduler.BucketSampler object, in 'trial' mode,
+            groups the trials of each refill of sampler.window trials into
+            batches, which then hold at most batch_size trials. Overrides
+            bucket_batches
+        corpus: str, if not None, corpus directory to serve batches from
+            instead of env, see from_corpus
+
+    Writable batches (all but the views of a corpus, unless contiguous)
+    support the DLPack protocol, so frameworks can import them without a
+    copy, e.g. torch.from_dlpack(inputs).
+
+    Attributes:
+        stats: dict, number of cache refills, number of refills for which
+            the consumer had to wait for the cache to be generated
+            (blocked), total time spent waiting in seconds (wait_time), and
+            cache_len. If cache_len is 'auto', also the measured time and
+            bytes per generated time step and batch (step_time, step_bytes)
     """
 
     def __init__(self, env, env_kwargs=None,
                  batch_size=1, seq_len=None, max_batch=np.inf,
-                 batch_first=False, cache_len=None):
-        if isinstance(env, gym.Env):
-            self.envs = [copy.deepcopy(env) for _ in range(batch_size)]
-        else:
-            assert isinstance(env, str), 'env must be gym.Env or str'
-            if env_kwargs is None:
-                env_kwargs = {}
-            self.envs = [gym.make(env, **env_kwargs)
-                         for _ in range(batch_size)]
-        for env in self.envs:
-            env.reset()
-        self.seed()
-
-        env = self.envs[0]
-        self.env = env
-        self.batch_size = batch_size
-        self.batch_first = batch_first
+                 batch_first=False, cache_len=None, num_workers=0,
+                 max_memory=2**30, prefetch=False, refill_time=1.,
+                 mode='sequence',
+                 bucket_batches=1, sampler=None, dtype=None,
+                 contiguous=False, n_out=2, corpus=None):
+        if mode not in ('sequence', 'trial'):
+            raise ValueError('Unknown mode ' + str(mode))
+        if mode == 'trial' and (num_workers > 0 or prefetch):
+            raise ValueError('num_workers and prefetch are not supported '
+                             'in trial mode')
+        if corpus is not None and (mode == 'trial' or num_workers > 0 or
+                                   prefetch):
+            raise ValueError('Corpus datasets only support sequence mode, '
+                             'without num_workers and prefetch')
+        self.mode = mode
+        if sampler is None and bucket_batches > 1:
+            sampler = BucketSampler(batch_size, bucket_batches * batch_size)
+        self.sampler = sampler
+        self._batches = list()  # pending PackedBatch in trial mode
 
         if seq_len is None:
             # TODO: infer sequence length from task
             seq_len = 1000
+        self.stats = {'refills': 0, 'blocked': 0, 'wait_time': 0.}
+        self._corpus = None
+        if corpus is not None:
+            self.envs = list()
+            self.env = None
+            inputs, target = self._corpus_rows(corpus, batch_size, seq_len,
+                                               batch_first)
+            obs_shape = self._corpus.ob.shape[1:]
+            action_shape = self._corpus.gt.shape[1:]
+            cache_len = inputs.shape[1] if batch_first else inputs.shape[0]
+            dtype = dtype or self._corpus.ob.dtype
+        else:
+            if isinstance(env, gym.Env):
+                envs = [copy.deepcopy(env) for _ in range(batch_size + 1)]
+            else:
+                assert isinstance(env, str), 'env must be gym.Env or str'
+                if env_kwargs is None:
+                    env_kwargs = {}
+                envs = [gym.make(env, **env_kwargs)
+                        for _ in range(batch_size + 1)]
+            for env in envs:
+                env.reset()
+            # Random access runs on its own env, not on the envs filling
+            # caches
+            self.envs, self._access_env = envs[:-1], envs[-1]
+            self.seed()
 
-        obs_shape = env.observation_space.shape
-        action_shape = env.action_space.shape
+            env = self.envs[0]
+            self.env = env
+            obs_shape = env.observation_space.shape
+            action_shape = env.action_space.shape
+            dtype = dtype or env.observation_space.dtype
+            if cache_len == 'auto':
+                n_blocks = 1 if num_workers == 0 and not prefetch else 2
+                cache_len = self._autotune_cache_len(
+                    np.dtype(dtype), refill_time, max_memory // n_blocks)
+                # Round up, keeping the tuned length as close as possible
+                cache_len = int(max(np.ceil(cache_len / seq_len), 1)
+                                * seq_len)
+            else:
+                if cache_len is None:
+                    # Infer cache len
+                    cache_len = 1e5  # Probably too low
+                    cache_len /= (np.prod(obs_shape) + np.prod(action_shape))
+                    cache_len /= batch_size
+                cache_len = int((1 + (cache_len // seq_len)) * seq_len)
+        self.batch_size = batch_size
+        self.batch_first = batch_first
         if len(action_shape) == 0:
             self._expand_action = True
         else:
             self._expand_action = False
-        if cache_len is None:
-            # Infer cache len
-            cache_len = 1e5  # Probably too low
-            cache_len /= (np.prod(obs_shape) + np.prod(action_shape))
-            cache_len /= batch_size
-        cache_len = int((1 + (cache_len // seq_len)) * seq_len)
+        self.stats['cache_len'] = cache_len
 
         self.seq_len = seq_len
         self._cache_len = cache_len
@@ -73,39 +502,200 @@ class Dataset(object):
         self._cache_inputs_shape = shape2 + list(obs_shape)
         self._cache_target_shape = shape2 + list(action_shape)
 
-        self._inputs = np.zeros(self._cache_inputs_shape, dtype=env.observation_space.dtype)
-        self._target = np.zeros(self._cache_target_shape, dtype=env.action_space.dtype)
+        self.num_workers = min(num_workers, batch_size)
+        self.max_memory = max_memory
+        self.prefetch = prefetch
+        self._pool = None
+        self._set_output(dtype, contiguous, n_out)
+        if corpus is not None:
+            self._inputs, self._target = inputs, target
+        elif self.num_workers > 0 or self.prefetch:
+            self._start_pool()
+        elif mode == 'trial':
+            self._inputs = self._target = None
+        else:
+            self._inputs = np.zeros(self._cache_inputs_shape,
+                                    dtype=self.dtype)
+            self._target = np.zeros(self._cache_target_shape,
+                                    dtype=env.action_space.dtype)
 
         self._cache()
 
         self._i_batch = 0
         self.max_batch = max_batch
 
+    @classmethod
+    def from_corpus(cls, path, batch_size=1, seq_len=1000, max_batch=np.inf,
+                    batch_first=False, dtype=None, contiguous=False, n_out=2):
+        """Make a dataset serving batches from a corpus on disk.
+
+        The trials of the corpus (see neurogym.utils.corpus) are split into
+        batch_size rows of consecutive trials, and batches are views of the
+        memory-mapped corpus, so no env code runs. Rows restart from their
+        beginning once exhausted.
+
+        Args:
+            path: str, corpus directory
+            batch_size: int, batch size
+            seq_len: int, sequence length
+            max_batch: int, maximum number of batch for iterator
+            batch_first: bool, if True, return (batch, seq_len, n_units)
+            dtype, contiguous, n_out: output options, see Dataset
+        """
+        return cls(None, batch_size=batch_size, seq_len=seq_len,
+                   max_batch=max_batch, batch_first=batch_first, dtype=dtype,
+                   contiguous=contiguous, n_out=n_out, corpus=path)
+
+    def _corpus_rows(self, path, batch_size, seq_len, batch_first):
+        """Open the corpus at path and split it into batch_size rows."""
+        from neurogym.utils.corpus import Corpus
+
+        corpus = self._corpus = Corpus(path)
+        row_len = len(corpus.ob) // batch_size
+        if row_len <= seq_len:
+            raise ValueError('Corpus of {:d} steps is too short for {:d} rows'
+                             ' of seq_len {:d}'.format(len(corpus.ob),
+                                                       batch_size, seq_len))
+        n_step = row_len * batch_size
+        inputs = corpus.ob[:n_step].reshape((batch_size, row_len) +
+                                            corpus.ob.shape[1:])
+        target = corpus.gt[:n_step].reshape((batch_size, row_len) +
+                                            corpus.gt.shape[1:])
+        if not batch_first:
+            inputs, target = inputs.swapaxes(0, 1), target.swapaxes(0, 1)
+        return inputs, target
+
+    def _autotune_cache_len(self, dtype, refill_time, max_bytes,
+                            min_time=0.05, max_trials=100):
+        """Choose cache_len from the measured cost of generating trials.
+
+        Trials are generated by a copy of the first env, so the trials of
+        the dataset are not changed, for at least min_time seconds and 3
+        trials, and at most max_trials.
+        """
+        env = copy.deepcopy(self.envs[0])
+        n_trial = n_step = 0
+        start_time = time.perf_counter()
+        while n_trial < max_trials and (
+                n_trial < 3 or time.perf_counter() - start_time < min_time):
+            env.new_trial()
+            n_trial += 1
+            n_step += len(env.unwrapped.ob)
+        step_time = (time.perf_counter() - start_time) / max(n_step, 1)
+
+        # Per time step of the cache, i.e. for all envs of the batch
+        step_time *= len(self.envs)
+        step_bytes = len(self.envs) * (
+            np.prod(env.observation_space.shape) * dtype.itemsize +
+            np.prod(env.action_space.shape) *
+            np.dtype(env.action_space.dtype).itemsize)
+        self.stats['step_time'] = step_time
+        self.stats['step_bytes'] = int(step_bytes)
+        return min(refill_time / step_time, max_bytes // step_bytes)
+
+    def _set_output(self, dtype, contiguous, n_out):
+        self.dtype = np.dtype(dtype)
+        self.contiguous = contiguous
+        self._out = [None] * n_out  # output buffers, allocated when needed
+        self._i_out = 0
+
+    def _output(self, inputs, target):
+        """Return a batch in the output dtype and layout."""
+        if not self.contiguous:
+            if inputs.dtype != self.dtype:
+                inputs = inputs.astype(self.dtype)
+            return inputs, target
+        if (inputs.dtype == self.dtype and inputs.flags.c_contiguous and
+                target.flags.c_contiguous and inputs.flags.writeable and
+                target.flags.writeable):
+            return inputs, target  # already views of contiguous memory
+
+        if self._out[self._i_out] is None:
+            self._out[self._i_out] = (
+                np.empty(inputs.shape, dtype=self.dtype),
+                np.empty(target.shape, dtype=target.dtype))
+        out_inputs, out_target = self._out[self._i_out]
+        self._i_out = (self._i_out + 1) % len(self._out)
+        np.copyto(out_inputs, inputs, casting='unsafe')
+        np.copyto(out_target, target)
+        return out_inputs, out_target
+
+    def _start_pool(self):
+        """Start worker processes or a thread filling a ring of caches."""
+        obs_dtype = self.dtype
+        action_dtype = self.env.action_space.dtype
+        if self.num_workers == 0:
+            self._pool = _PrefetchThread(
+                self.envs, self._cache_inputs_shape, self._cache_target_shape,
+                obs_dtype, action_dtype, self.batch_first)
+            return
+
+        block_bytes = (
+            np.prod(self._cache_inputs_shape) * self.dtype.itemsize +
+            np.prod(self._cache_target_shape) *
+            np.dtype(self.env.action_space.dtype).itemsize)
+        n_blocks = int(min(4, self.max_memory // block_bytes))
+        if n_blocks < 2:
+            raise ValueError(
+                'max_memory={:d} does not fit two cache blocks of {:d} bytes,'
+                ' decrease cache_len'.format(int(self.max_memory),
+                                             int(block_bytes)))
+        self._pool = _WorkerPool(
+            self.envs, self._cache_inputs_shape, self._cache_target_shape,
+            obs_dtype, action_dtype, self.batch_first, self.num_workers,
+            n_blocks)
+
     def _cache(self, **kwargs):
-        for i in range(self.batch_size):
-            env = self.envs[i]
-            seq_start = 0
-            seq_end = 0
-            while seq_end < self._cache_len:
-                # TODO: Right now this only works for env with new_trial
-                env.new_trial(**kwargs)
-                ob, gt = env.ob, env.gt
-                seq_len = ob.shape[0]
-                seq_end = seq_start + seq_len
-                if seq_end > self._cache_len:
-                    seq_end = self._cache_len
-                    seq_len = seq_end - seq_start
-                if self.batch_first:
-                    self._inputs[i, seq_start:seq_end, ...] = ob[:seq_len]
-                    self._target[i, seq_start:seq_end, ...] = gt[:seq_len]
-                else:
-                    self._inputs[seq_start:seq_end, i, ...] = ob[:seq_len]
-                    self._target[seq_start:seq_end, i, ...] = gt[:seq_len]
-                seq_start = seq_end
+        start_time = time.perf_counter()
+        if self._corpus is not None:
+            pass  # restart the rows of the corpus
+        elif self.mode == 'trial':
+            self.stats['blocked'] += 1
+            self._batches = self._pack_trials(**kwargs)
+        elif self._pool is None:
+            self.stats['blocked'] += 1
+            _fill_cache(self.envs, self._inputs, self._target,
+                        self.batch_first, self._pending, **kwargs)
+        else:
+            if kwargs:
+                raise ValueError('kwargs for new_trial are not supported '
+                                 'with num_workers > 0 or prefetch')
+            if not self._pool.ready():
+                self.stats['blocked'] += 1
+            self._inputs, self._target = self._pool.next_block()
+        self.stats['wait_time'] += time.perf_counter() - start_time
+        self.stats['refills'] += 1
 
         self._seq_start = 0
         self._seq_end = self._seq_start + self.seq_len
 
+    def _pack_trials(self, **kwargs):
+        """Generate trials and group them into PackedBatch objects.
+
+        Without sampler, one trial is generated by each env. With a sampler,
+        each env generates its share of a window of trials.
+        """
+        n_trial = self._chunk_size()
+        trials = list()
+        periods = dict()  # period times of each trial, by id
+        for env in self.envs:
+            batch = env.new_trials(n_trial, **kwargs)
+            for i in range(n_trial):
+                trial, ob, gt = batch.get_trial(i)
+                if gt is None:
+                    gt = np.zeros((len(ob),) + env.action_space.shape,
+                                  dtype=env.action_space.dtype)
+                trials.append((trial, ob, gt))
+                periods[id(trials[-1])] = (
+                    {key: val[i] for key, val in batch.start_t.items()},
+                    {key: val[i] for key, val in batch.end_t.items()})
+        groups = [trials] if self.sampler is None else self.sampler(trials)
+        batches = [PackedBatch(group, [periods[id(item)] for item in group])
+                   for group in groups]
+        for batch in batches:
+            batch.ob = batch.ob.astype(self.dtype, copy=False)
+        return batches
+
     def __iter__(self):
         return self
 
@@ -118,6 +708,11 @@ class Dataset(object):
             self._i_batch = 0
             raise StopIteration
 
+        if self.mode == 'trial':
+            if not self._batches:
+                self._cache(**kwargs)
+            return self._batches.pop(0)
+
         self._seq_end = self._seq_start + self.seq_len
 
         if self._seq_end >= self._cache_len:
@@ -131,15 +726,98 @@ class Dataset(object):
             target = self._target[self._seq_start:self._seq_end]
 
         self._seq_start = self._seq_end
-        return inputs, target
+        return self._output(inputs, target)
         # return inputs, np.expand_dims(target, axis=2)
 
+    def _chunk_size(self):
+        """Number of trials generated at once by each env."""
+        if self.mode == 'trial':
+            if self.sampler is None:
+                return 1
+            return int(np.ceil(self.sampler.window / len(self.envs)))
+        return _CHUNK_SIZE
+
+    def _trial_at(self, index):
+        """Regenerate the index-th trial generated by the first env."""
+        env = self._access_env
+        while isinstance(env, gym.Wrapper):
+            if isinstance(env, TrialWrapper):
+                raise ValueError('Random access is not supported for envs '
+                                 'with trial wrappers')
+            env = env.env
+        if not env.batched_trials:
+            return env.trial_at(index)
+        # The env serving the first row generates chunks of trials
+        size = self._chunk_size()
+        chunk, i = divmod(index, size)
+        if self._access_batch is None or self._access_batch[0] != chunk:
+            self._access_batch = (chunk, env.trials_at(chunk * size, size))
+        return self._access_batch[1].get_trial(i)
+
+    def __getitem__(self, index):
+        """Random access to the index-th trial, e.g. for sharded loading.
+
+        The trial is the index-th trial generated by the first env of the
+        dataset since it was seeded, i.e. served in the first row when
+        iterating, where the last trial of each cache is cut at its end,
+        and the last seq_len steps of each cache are not returned. It is
+        regenerated by the task of a separate copy of the env, or
+        read from the corpus, without changing the batches returned by
+        iterating the dataset. Envs with trial wrappers, e.g. ScheduleEnvs,
+        are not supported.
+
+        Returns:
+            inputs, target: numpy arrays (seq_len, ...), the trial truncated
+                or zero-padded to seq_len
+        """
+        if self._corpus is not None:
+            _, ob, gt = self._corpus.get_trial(index)
+        else:
+            _, ob, gt = self._trial_at(index)
+        inputs = np.zeros([self.seq_len] + self.inputs_shape[2:],
+                          dtype=self.dtype)
+        target = np.zeros([self.seq_len] + self.target_shape[2:],
+                          dtype=self.env.action_space.dtype
+                          if gt is None else gt.dtype)
+        seq_len = min(len(ob), self.seq_len)
+        inputs[:seq_len] = ob[:seq_len]
+        if gt is not None:
+            target[:seq_len] = gt[:seq_len]
+        return inputs, target
+
     def seed(self, seed=None):
+        if getattr(self, 'sampler', None) is not None:
+            self.sampler.seed(seed)
+        restart = getattr(self, '_pool', None) is not None
+        if restart:
+            self.close()  # stop producers before changing env states
         for i, env in enumerate(self.envs):
             if seed is None:
                 env.seed(seed)
             else:
                 env.seed(seed + i)
+        if self.envs:
+            self._access_env.seed(seed)  # regenerates trials of envs[0]
+            self._access_batch = None
+            self._pending = [None] * len(self.envs)  # see _fill_cache
+        if hasattr(self, '_i_batch'):
+            # Regenerate the cache, so batches only depend on the new seeds
+            if restart:
+                self._start_pool()
+            self._cache()
+
+    def close(self):
+        """Stop worker processes or prefetch thread, if any."""
+        if getattr(self, '_pool', None) is not None:
+            self._pool.close()
+            self._pool = None
+            self._inputs = self._target = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:  # interpreter shutting down
+            pass
 
 
 if __name__ == '__main__':
@@ -69,7 +69,7 @@ def run_env(env, num_steps=200, num_trials=None, def_act=None, model=None):
     gt = []
     perf = []
     ob = env.reset()  # TODO: not saving this first observation
-    ob_cum_temp = ob
+    ob_cum_temp = np.array(ob)
 
     if num_trials is not None:
         num_steps = 1e5  # Overwrite num_steps value
@@ -100,7 +100,7 @@ def run_env(env, num_steps=200, num_trials=None, def_act=None, model=None):
 
         if done:
             env.reset()
-        observations.append(ob_aux)
+        observations.append(np.array(ob_aux))
         rewards.append(rew)
         actions.append(action)
         if 'gt' in info.keys():
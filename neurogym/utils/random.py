@@ -1,17 +1,96 @@
 import numpy as np
 
 
-def trunc_exp(rng, vmean, vmin=0, vmax=np.inf):
+BIT_GENERATORS = {'Philox': np.random.Philox, 'PCG64': np.random.PCG64}
+
+
+class Generator(np.random.Generator):
+    """Random generator of neurogym, with one substream per trial.
+
+    A np.random.Generator that can jump to the substream of any trial, so
+    that trial i can be regenerated from (seed, i) alone, independently of
+    the draws made for other trials. With the default counter-based Philox,
+    the substream of trial i starts at counter i * 2**192. Other bit
+    generators are reseeded with the child of the seed with spawn key i.
+
+    Also provides the np.random.RandomState methods used by tasks.
+
+    Args:
+        seed: None, int or np.random.SeedSequence
+        bit_generator: str, one of BIT_GENERATORS, default 'Philox'
+    """
+
+    def __init__(self, seed=None, bit_generator='Philox'):
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        if bit_generator not in BIT_GENERATORS:
+            raise ValueError('Unknown bit_generator ' + str(bit_generator))
+        super(Generator, self).__init__(BIT_GENERATORS[bit_generator](seed))
+        self.seed_seq = seed
+        self.bit_generator_name = bit_generator
+        self._key = None
+        if bit_generator == 'Philox':
+            self._key = self.bit_generator.state['state']['key']
+
+    def __reduce__(self):
+        # np.random.Generator pickles as a plain Generator
+        return _rebuild_generator, (type(self), self.bit_generator,
+                                    self.__dict__)
+
+    def set_trial(self, trial):
+        """Move to the substream of trial."""
+        if self._key is not None:
+            counter = np.zeros(4, dtype=np.uint64)
+            counter[-1] = trial
+            self.bit_generator.state = {
+                'bit_generator': 'Philox',
+                'state': {'counter': counter, 'key': self._key},
+                'buffer': np.zeros(4, dtype=np.uint64), 'buffer_pos': 4,
+                'has_uint32': 0, 'uinteger': 0}
+        else:
+            seed = np.random.SeedSequence(
+                self.seed_seq.entropy,
+                spawn_key=self.seed_seq.spawn_key + (trial,))
+            bit_generator = BIT_GENERATORS[self.bit_generator_name](seed)
+            self.bit_generator.state = bit_generator.state
+
+    # np.random.RandomState methods
+    def rand(self, *shape):
+        return self.random(shape or None)
+
+    def randn(self, *shape):
+        return self.standard_normal(shape or None)
+
+    def randint(self, low, high=None, size=None, dtype=int):
+        return self.integers(low, high, size, dtype=dtype)
+
+    def random_integers(self, low, high=None, size=None):
+        if high is None:
+            low, high = 1, low
+        return self.integers(low, high, size, endpoint=True)
+
+    def random_sample(self, size=None):
+        return self.random(size)
+
+
+def _rebuild_generator(cls, bit_generator, state):
+    rng = cls.__new__(cls, bit_generator)
+    np.random.Generator.__init__(rng, bit_generator)
+    rng.__dict__.update(state)
+    return rng
+
+
+def trunc_exp(rng, vmean, vmin=0, vmax=np.inf, size=None):
     """
     function for generating period durations
+
+    Exponential with mean vmean truncated to [vmin, vmax), sampled by inverse
+    CDF. Returns a float, or an array of shape size if size is not None.
     """
     if vmin >= vmax:  # the > is to avoid issues when making vmin as big as dt
-        return vmax
+        return vmax if size is None else np.full(size, vmax, dtype=float)
     else:
-        while True:
-            x = rng.exponential(vmean)
-            if vmin <= x < vmax:
-                return x
+        return _trunc_exp_icdf(rng.uniform(size=size), vmean, vmin, vmax)
 
 
 class TruncExp(object):
@@ -19,20 +98,169 @@ class TruncExp(object):
         self.vmean = vmean
         self.vmin = vmin
         self.vmax = vmax
-        self.rng = np.random.RandomState()
+        self.rng = Generator() if rng is None else rng
 
     def seed(self, seed=None):
         """Seed the PRNG of this space. """
-        self.rng = np.random.RandomState(seed)
+        self.rng = Generator(seed)
 
-    def __call__(self, *args, **kwargs):
-        if self.vmin >= self.vmax:  # the > is to avoid issues when making vmin as big as dt
-            return self.vmax
-        else:
-            while True:
-                v = self.rng.exponential(self.vmean)
-                if self.vmin <= v < self.vmax:
-                    return v
+    def __call__(self, *args, size=None, **kwargs):
+        return trunc_exp(self.rng, self.vmean, self.vmin, self.vmax, size)
+
+
+def _trunc_exp_icdf(u, vmean, vmin=0, vmax=np.inf):
+    """Inverse CDF of the exponential with mean vmean truncated to [vmin, vmax).
+
+    Args:
+        u: float or np array, uniform samples in [0, 1)
+    """
+    # Mass of [vmin, vmax) relative to the exponential tail from vmin
+    mass = -np.expm1(-(vmax - vmin) / vmean)
+    return vmin - vmean * np.log1p(-u * mass)
+
+
+class Sampler(object):
+    """Distribution of the duration of a period.
+
+    Samplers are called with the env rng and draw one duration, or an array
+    of size durations at once.
+
+    Attributes:
+        min: float, lower bound of the durations, or None if unknown
+        max: float, upper bound of the durations, or None if unknown
+    """
+    min = 0
+    max = np.inf
+
+    def __call__(self, rng, size=None, tmax=0):
+        """Draw durations.
+
+        Args:
+            rng: Generator object
+            size: int or None, number of durations, None for a scalar
+            tmax: float or np array (size,), current end time of the trials,
+                only used by Until
+        """
+        raise NotImplementedError
+
+
+class Constant(Sampler):
+    def __init__(self, value):
+        self.value = self.min = self.max = value
+
+    def __call__(self, rng, size=None, tmax=0):
+        if size is None:
+            return self.value
+        return np.full(size, self.value, dtype=float)
+
+
+class Uniform(Sampler):
+    def __init__(self, low, high):
+        self.min, self.max = low, high
+
+    def __call__(self, rng, size=None, tmax=0):
+        return rng.uniform(self.min, self.max, size)
+
+
+class Choice(Sampler):
+    def __init__(self, values):
+        self.values = values
+        self.min, self.max = min(values), max(values)
+
+    def __call__(self, rng, size=None, tmax=0):
+        return rng.choice(self.values, size)
+
+
+class TruncatedExponential(Sampler):
+    """Exponential with mean vmean, truncated to [vmin, vmax).
+
+    Sampled by inverse CDF, with one uniform draw per duration.
+    """
+
+    def __init__(self, vmean, vmin=0, vmax=np.inf):
+        self.vmean, self.min, self.max = vmean, vmin, vmax
+
+    def __call__(self, rng, size=None, tmax=0):
+        return trunc_exp(rng, self.vmean, self.min, self.max, size)
+
+
+class Until(Sampler):
+    """Duration such that the period ends at time t_end."""
+
+    def __init__(self, t_end):
+        self.max = t_end
+
+    def __call__(self, rng, size=None, tmax=0):
+        if size is None:
+            return self.max - tmax
+        t = self.max - np.asarray(tmax, dtype=float)
+        return np.broadcast_to(t, (size,)).copy()
+
+
+class Function(Sampler):
+    """Duration drawn by calling a function, one at a time.
+
+    Bounds are unknown, so min and max are None.
+
+    Args:
+        fn: callable returning a duration
+        vectorized: bool, if True fn is called once with size=size to draw
+            an array of durations
+    """
+
+    min = max = None
+
+    def __init__(self, fn, vectorized=False):
+        self.fn = fn
+        self.vectorized = vectorized
+
+    def __call__(self, rng, size=None, tmax=0):
+        if size is None:
+            return self.fn()
+        if self.vectorized:
+            return np.asarray(self.fn(size=size), dtype=float)
+        return np.array([self.fn() for _ in range(size)], dtype=float)
+
+
+def compile_timing(timing):
+    """Return the sampler of a timing value of an env.
+
+    Args:
+        timing: int or float for a constant duration, callable returning a
+            duration, list of int/float to choose from, Sampler object, or
+            tuple (dist, args), with dist one of 'uniform', 'choice',
+            'truncated_exponential', 'constant', 'until'
+
+    Returns:
+        sampler: Sampler object
+    """
+    if isinstance(timing, Sampler):
+        return timing
+    if isinstance(timing, (int, float)):
+        return Constant(timing)
+    if isinstance(timing, TruncExp):
+        # Draw from the TruncExp rng, so that seeding the env reseeds it
+        sampler = Function(timing, vectorized=True)
+        sampler.min, sampler.max = timing.vmin, timing.vmax
+        return sampler
+    if callable(timing):
+        return Function(timing)
+    if isinstance(timing[0], (int, float)):
+        # Expect list of int/float, and use random choice
+        return Choice(timing)
+    dist, args = timing
+    if dist == 'uniform':
+        return Uniform(*args)
+    elif dist == 'choice':
+        return Choice(args)
+    elif dist == 'truncated_exponential':
+        return TruncatedExponential(*args)
+    elif dist == 'constant':
+        return Constant(args)
+    elif dist == 'until':
+        return Until(args)
+    else:
+        raise ValueError('Unknown dist:', str(dist))
 
 
 def random_number_fn(dist, args, rng):
@@ -1,6 +1,8 @@
 """Trial scheduler class."""
 import numpy as np
 
+from neurogym.utils.random import Generator
+
 
 class BaseSchedule(object):
     """Base schedule.
@@ -13,10 +15,10 @@ class BaseSchedule(object):
         self.total_count = 0  # total count
         self.count = 0  # count within a condition
         self.i = 0  # initialize at 0
-        self.rng = np.random.RandomState()
+        self.rng = Generator()
 
     def seed(self, seed=None):
-        self.rng = np.random.RandomState(seed)
+        self.rng = Generator(seed)
 
     def reset(self):
         self.total_count = 0
@@ -102,5 +104,70 @@ class RandomBlockSchedule(BaseSchedule):
         return self.i
 
 
+class BucketSampler(object):
+    """Group trials into batches of similar length or of the same task.
+
+    Trials are collected in a shuffle window of window trials, sorted by
+    task (if by is 'task') and length, and split into batches of at most
+    batch_size consecutive trials. A batch is closed early if adding the
+    next trial would make more than max_padding of its padded time steps
+    padding. Batches of a window are returned in random order.
 
+    Args:
+        batch_size: int, maximum number of trials per batch
+        window: int, number of trials grouped at once, default
+            8 * batch_size
+        by: str, 'length' to group trials of similar length, or 'task' to
+            group trials of the same task (trial['i_env'], set by
+            ScheduleEnvs and MultiEnvs), then of similar length
+        max_padding: float between 0 and 1, padding budget of a batch.
+            Default 1, no budget
+    """
 
+    def __init__(self, batch_size, window=None, by='length', max_padding=1.):
+        if by not in ('length', 'task'):
+            raise ValueError('Unknown by ' + str(by))
+        self.batch_size = batch_size
+        self.window = 8 * batch_size if window is None else window
+        self.by = by
+        self.max_padding = max_padding
+        self.rng = Generator()
+
+    def seed(self, seed=None):
+        self.rng = Generator(seed)
+
+    def __call__(self, trials):
+        """Split trials into batches.
+
+        Args:
+            trials: list of (trial, ob, gt), with trial a dict and ob, gt
+                numpy arrays (T, ...) of one trial
+
+        Returns:
+            batches: list of lists of (trial, ob, gt)
+        """
+        lengths = np.array([len(ob) for _, ob, _ in trials])
+        if self.by == 'task':
+            tasks = np.array([trial.get('i_env', 0) for trial, _, _ in trials])
+            order = np.lexsort((lengths, tasks))
+        else:
+            tasks = np.zeros(len(trials), dtype=int)
+            order = np.argsort(lengths, kind='stable')
+
+        batches, batch = list(), list()
+        total = 0  # time steps of the trials of batch
+        for i in order:
+            if batch:
+                # Trials are sorted, so trial i is the longest of the batch
+                padding = 1 - (total + lengths[i]) / (
+                    (len(batch) + 1) * max(lengths[i], 1))
+                if (len(batch) == self.batch_size or
+                        tasks[i] != tasks[batch[0]] or
+                        padding > self.max_padding):
+                    batches.append([trials[j] for j in batch])
+                    batch, total = list(), 0
+            batch.append(i)
+            total += lengths[i]
+        if batch:
+            batches.append([trials[j] for j in batch])
+        return [batches[i] for i in self.rng.permutation(len(batches))]
@@ -0,0 +1,86 @@
+"""Stimuli of ring-coded tasks, from cached lookup tables.
+
+A ring of dim_ring units has preferred angles 2 pi k / dim_ring. The
+stimulus of an angle is a kernel of the difference between the preferred
+angles and this angle. Stimulus angles usually are preferred angles, or
+preferred angles rotated by pi, so stimuli are rows of a table computed once
+per (dim_ring, kernel):
+
+    from neurogym.utils import stimuli
+    stim = stimuli.table(16, 'gaussian')[ground_truth]
+    stim = stimuli.ring_stimulus(angles, 16)  # any angles, (n, 16)
+"""
+
+import functools
+
+import numpy as np
+
+
+def _cos(delta):
+    return np.cos(delta)
+
+
+def _gaussian(delta):
+    """Gaussian bump of width pi / 8, in periodic distance."""
+    delta = np.mod(delta, 2 * np.pi)
+    dist = np.minimum(delta, 2 * np.pi - delta) / (np.pi / 8)
+    return np.exp(-dist ** 2 / 2)
+
+
+KERNELS = {'cos': _cos, 'gaussian': _gaussian}
+
+
+def _kernel(kernel):
+    try:
+        return KERNELS[kernel]
+    except KeyError:
+        raise ValueError('Unknown kernel ' + str(kernel) + ', expected one '
+                         'of ' + str(sorted(KERNELS)))
+
+
+@functools.lru_cache(maxsize=None)
+def ring_angles(dim_ring):
+    """Preferred angles of the units of a ring, read-only (dim_ring,)."""
+    theta = np.arange(dim_ring) * (2 * np.pi / dim_ring)
+    theta.setflags(write=False)
+    return theta
+
+
+@functools.lru_cache(maxsize=None)
+def table(dim_ring, kernel='cos'):
+    """Stimuli at the preferred angles of a ring.
+
+    Args:
+        dim_ring: int, number of units of the ring
+        kernel: str, name of the kernel in KERNELS
+
+    Returns:
+        table: read-only np array (dim_ring, dim_ring), row i is the
+            stimulus at the i-th preferred angle
+    """
+    theta = ring_angles(dim_ring)
+    stim = _kernel(kernel)(theta - theta[:, None])
+    stim.setflags(write=False)
+    return stim
+
+
+def ring_stimulus(loc, dim_ring, kernel='cos'):
+    """Stimuli at angles loc.
+
+    Stimuli are looked up in table(dim_ring, kernel) if all angles are
+    preferred angles, and computed otherwise.
+
+    Args:
+        loc: float or np array (...), angles in radians
+        dim_ring: int, number of units of the ring
+        kernel: str, name of the kernel in KERNELS
+
+    Returns:
+        stim: np array (..., dim_ring)
+    """
+    loc = np.asarray(loc, dtype=float)
+    index = loc * (dim_ring / (2 * np.pi))
+    rounded = np.rint(index)
+    if np.all(np.abs(index - rounded) < 1e-6):
+        return table(dim_ring, kernel)[rounded.astype(int) % dim_ring]
+    return _kernel(kernel)(ring_angles(dim_ring) - loc[..., None])
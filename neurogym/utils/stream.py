@@ -0,0 +1,254 @@
+"""Lazy streams of trials, built from composable generator stages.
+
+A stream is any iterable, usually of trials (trial, ob, gt) as yielded by
+trials(env). Stages take a stream and return a new one, so pipelines are
+plain Python generators, with memory bounded by the stages holding items
+(batch, shuffle_buffer, prefetch):
+
+    from neurogym.utils import stream
+    trials = stream.trials(env)
+    trials = stream.shuffle_buffer(trials, 64, seed=0)
+    for batch in stream.pack(stream.batch(trials, 16)):
+        ...
+
+ob and gt yielded by trials(env) are views of the trial buffers of the env,
+valid until the next trial. Stages holding items copy them.
+"""
+
+import multiprocessing as mp
+import queue
+import threading
+import traceback
+
+import numpy as np
+
+from neurogym.utils.data import PackedBatch
+from neurogym.utils.random import Generator
+
+
+def _own(item):
+    """Copy the arrays of item that are views of buffers reused by a stream."""
+    if isinstance(item, np.ndarray):
+        return item if item.base is None else item.copy()
+    if isinstance(item, tuple):
+        return tuple(_own(val) for val in item)
+    return item
+
+
+def trials(env, n=None, num_workers=0, max_queue=4, **kwargs):
+    """Stream of trials of env.
+
+    Args:
+        env: TrialEnv or TrialWrapper object
+        n: int, number of trials, default None for an infinite stream
+        num_workers: int, if > 0, trials are regenerated in this number of
+            processes by env.trial_at from the current trial index of the
+            task, without wrappers and without changing env. They are equal
+            to the trials of the task if its trials don't depend on previous
+            trials. Requires the fork start method of multiprocessing
+        max_queue: int, number of trials generated ahead by each worker
+        kwargs: passed to new_trial
+
+    Yields:
+        trial: dict of trial information
+        ob: numpy array (T, ...), observations of the trial
+        gt: numpy array (T, ...), ground truth of the trial, or None
+    """
+    if num_workers > 0:
+        yield from _parallel_trials(env, n, num_workers, max_queue, **kwargs)
+        return
+    i = 0
+    while n is None or i < n:
+        trial = env.new_trial(**kwargs)
+        task = env.unwrapped
+        yield trial, task.ob, task.gt if task._has_gt else None
+        i += 1
+
+
+def _trial_worker(task, indices, kwargs, out):
+    """Regenerate the trials of indices and put them in out, in order."""
+    try:
+        for index in indices:
+            out.put(task.trial_at(index, **kwargs))
+    except BaseException:
+        out.put(traceback.format_exc())
+
+
+def _parallel_trials(env, n, num_workers, max_queue, **kwargs):
+    if 'fork' not in mp.get_all_start_methods():
+        raise RuntimeError('num_workers > 0 requires the fork start method '
+                           'of multiprocessing')
+    ctx = mp.get_context('fork')
+    task = env.unwrapped
+    start = task._trial_index
+    stop = None if n is None else start + n
+    queues, workers = list(), list()
+    for i in range(num_workers):
+        indices = range(start + i, stop, num_workers) if stop is not None \
+            else _count(start + i, num_workers)
+        out = ctx.Queue(maxsize=max_queue)
+        worker = ctx.Process(target=_trial_worker, daemon=True,
+                             args=(task, indices, kwargs, out))
+        worker.start()
+        queues.append(out)
+        workers.append(worker)
+    try:
+        i = 0
+        while n is None or i < n:
+            # Trial i is generated by worker i % num_workers
+            while True:
+                try:
+                    msg = queues[i % num_workers].get(timeout=1)
+                    break
+                except queue.Empty:
+                    if not workers[i % num_workers].is_alive():
+                        raise RuntimeError('Stream worker died unexpectedly')
+            if isinstance(msg, str):
+                raise RuntimeError('Error in stream worker:\n' + msg)
+            yield msg
+            i += 1
+    finally:
+        for worker in workers:
+            worker.terminate()
+            worker.join()
+
+
+def _count(start, step):
+    while True:
+        yield start
+        start += step
+
+
+def map(stream, fn):
+    """Apply fn to each item of stream."""
+    for item in stream:
+        yield fn(item)
+
+
+def batch(stream, batch_size, drop_last=False):
+    """Group consecutive items of stream into lists of batch_size items.
+
+    Args:
+        stream: iterable
+        batch_size: int, number of items per batch
+        drop_last: bool, if True, drop the last batch if it is incomplete
+    """
+    items = list()
+    for item in stream:
+        items.append(_own(item))
+        if len(items) == batch_size:
+            yield items
+            items = list()
+    if items and not drop_last:
+        yield items
+
+
+def pack(stream):
+    """Convert lists of trials, e.g. from batch, into PackedBatch objects."""
+    for items in stream:
+        trials = [(trial, ob, np.zeros(len(ob)) if gt is None else gt)
+                  for trial, ob, gt in items]
+        yield PackedBatch(trials)
+
+
+def shuffle_buffer(stream, size, seed=None):
+    """Shuffle stream with a buffer of size items.
+
+    Each item is yielded once, at a random position among the items up to
+    size items after it.
+
+    Args:
+        stream: iterable
+        size: int, number of items held
+        seed: None or int, seed of the shuffling
+    """
+    rng = Generator(seed)
+    items = list()
+    for item in stream:
+        item = _own(item)
+        if len(items) < size:
+            items.append(item)
+            continue
+        i = rng.integers(size)
+        yield items[i]
+        items[i] = item
+    for i in rng.permutation(len(items)):
+        yield items[i]
+
+
+def interleave(streams, weights=None, seed=None):
+    """Interleave the items of several streams, e.g. of different envs.
+
+    Exhausted streams are dropped, and the stream ends when all are.
+
+    Args:
+        streams: list of iterables
+        weights: None to take items in turn, list of probabilities of taking
+            the next item from each stream, or callable returning this list
+            from the number of items yielded so far, e.g. for a curriculum
+        seed: None or int, seed of the random choice of streams
+    """
+    rng = Generator(seed)
+    iterators = [iter(stream) for stream in streams]
+    active = list(range(len(iterators)))
+    i = 0
+    while active:
+        if weights is None:
+            j = active[i % len(active)]
+        else:
+            p = np.asarray(weights(i) if callable(weights) else weights,
+                           dtype=float)[active]
+            j = active[rng.choice(len(active), p=p / p.sum())]
+        try:
+            item = next(iterators[j])
+        except StopIteration:
+            active.remove(j)
+            continue
+        yield item
+        i += 1
+
+
+_END = object()
+
+
+def prefetch(stream, size=2):
+    """Run stream in a background thread, up to size items ahead.
+
+    NumPy releases the GIL in large array operations, so generating the next
+    items overlaps with the consumption of the current one.
+    """
+    out = queue.Queue(maxsize=size)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run():
+        try:
+            for item in stream:
+                if not put(_own(item)):
+                    return
+            put(_END)
+        except BaseException:
+            put(RuntimeError('Error in stream thread:\n' +
+                             traceback.format_exc()))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = out.get()
+            if item is _END:
+                return
+            if isinstance(item, RuntimeError):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
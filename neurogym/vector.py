@@ -0,0 +1,199 @@
+"""Vectorized stepping of multiple copies of a trial-based task."""
+
+import copy
+
+import numpy as np
+import gym
+
+from neurogym.core import _rule_stepped, _same_scoring, _stepped_tasks
+from neurogym.envs.registration import make
+
+# Number of trials generated at once by each copy of a vectorized task
+_CHUNK_SIZE = 16
+
+
+def _vector_tasks(env):
+    """Return the tasks stepped by env, or None if env can't be vectorized.
+
+    env can be vectorized if no wrapper modifies step and every task is
+    stepped by a StandardDecisionRule.
+    """
+    tasks = _stepped_tasks(env)
+    if tasks is None:
+        return None
+    if not all(_rule_stepped(task) for task in tasks):
+        return None
+    return tasks
+
+
+class VecTrialEnv(object):
+    """Step a batch of copies of one trial-based task at once.
+
+    Tasks stepped by a StandardDecisionRule (abort when breaking fixation
+    during the fixation period, reward the first non-fixation action in the
+    decision period) are stepped with one array operation for all copies,
+    keeping trials of all copies in padded arrays. Each copy draws its
+    trials from its own env, seeded with seed + i by seed, in batches of
+    new_trials. Other tasks are stepped one copy at a time.
+
+    In both cases, step returns
+        ob: numpy array (num_envs, ob_space.shape...)
+        reward: numpy array (num_envs,)
+        done: numpy array (num_envs,)
+        info: dict of numpy arrays (num_envs,) with keys new_trial, gt
+            and performance
+
+    Args:
+        env: str for env id or gym.Env object
+        num_envs: int, number of copies of the task
+        env_kwargs: dict, additional kwargs for environment, if env is str
+    """
+
+    def __init__(self, env, num_envs=1, env_kwargs=None):
+        if isinstance(env, gym.Env):
+            self.envs = [copy.deepcopy(env) for _ in range(num_envs)]
+        else:
+            assert isinstance(env, str), 'env must be gym.Env or str'
+            if env_kwargs is None:
+                env_kwargs = {}
+            self.envs = [make(env, **env_kwargs) for _ in range(num_envs)]
+        self.num_envs = num_envs
+        self.env = self.envs[0]
+        self.observation_space = self.env.observation_space
+        self.action_space = self.env.action_space
+
+        self._tasks = _vector_tasks(self.env)
+        if self._tasks is not None:
+            task = self._tasks[0]
+            for other in self._tasks[1:]:
+                if not _same_scoring(task, other):
+                    self._tasks = None  # tasks disagree on reward logic
+                    break
+        self.vectorized = self._tasks is not None
+
+        # Trial buffers of all copies, (num_envs, T, ...)
+        self.ob = None
+        self.gt = None
+        self.lengths = np.zeros(num_envs, dtype=int)
+        self.t_ind = np.zeros(num_envs, dtype=int)
+        self.performance = np.zeros(num_envs)
+        self.start_t = dict()
+        self.end_t = dict()
+        # Batch of trials of each copy and index of its next trial
+        self._batches = [(None, 0)] * num_envs
+
+    def seed(self, seed=None):
+        for i, env in enumerate(self.envs):
+            if seed is None:
+                env.seed(seed)
+            else:
+                env.seed(seed + i)
+        self._batches = [(None, 0)] * self.num_envs
+
+    def _next_trial(self, i):
+        """Batch and index of the next trial of copy i."""
+        batch, j = self._batches[i]
+        if batch is None or j == batch.n:
+            batch, j = self.envs[i].new_trials(_CHUNK_SIZE), 0
+        self._batches[i] = (batch, j + 1)
+        return batch, j
+
+    def _new_trials(self, ind):
+        """Replace the trials of the copies in ind by new trials."""
+        trials = [self._next_trial(i) for i in ind]
+        t_max = max(batch.lengths[j] for batch, j in trials)
+        if self.ob is None or t_max > self.ob.shape[1]:
+            # Grow trial buffers to fit the longest trial
+            batch = trials[0][0]
+            t_cap = t_max if self.ob is None else max(t_max,
+                                                      2 * self.ob.shape[1])
+            ob = np.zeros((self.num_envs, t_cap) + batch.ob.shape[2:],
+                          dtype=batch.ob.dtype)
+            gt = np.zeros((self.num_envs, t_cap) + batch.gt.shape[2:],
+                          dtype=batch.gt.dtype)
+            if self.ob is not None:
+                ob[:, :self.ob.shape[1]] = self.ob
+                gt[:, :self.gt.shape[1]] = self.gt
+            self.ob, self.gt = ob, gt
+
+        rule = self._tasks[0].rule
+        for period in [rule.fixation, rule.decision]:
+            if period not in self.start_t:
+                self.start_t[period] = np.full(self.num_envs, np.nan)
+                self.end_t[period] = np.full(self.num_envs, np.nan)
+        for i, (batch, j) in zip(ind, trials):
+            length = batch.lengths[j]
+            self.ob[i, :length] = batch.ob[j, :length]
+            self.ob[i, length:] = 0
+            self.gt[i, :length] = batch.gt[j, :length]
+            self.gt[i, length:] = 0
+            self.lengths[i] = length
+            for period in self.start_t:
+                self.start_t[period][i] = batch.start_t[period][j] \
+                    if period in batch.start_t else np.nan
+                self.end_t[period][i] = batch.end_t[period][j] \
+                    if period in batch.end_t else np.nan
+        self.t_ind[ind] = 0
+        self.performance[ind] = 0
+
+    def in_period(self, period):
+        """Boolean array (num_envs,), True if copy is currently in period."""
+        t = self.t_ind * self._tasks[0].dt
+        return (self.start_t[period] <= t) & (t < self.end_t[period])
+
+    def reset(self):
+        """Start new trials in all copies and return the first observation.
+
+        For vectorized tasks, the first step is taken with the fixation
+        action.
+        """
+        if not self.vectorized:
+            return np.array([env.reset() for env in self.envs])
+        self._new_trials(np.arange(self.num_envs))
+        ob, _, _, _ = self.step(np.zeros(self.num_envs, dtype=int))
+        return ob
+
+    def step(self, action):
+        """Step all copies with action, array-like (num_envs,)."""
+        if not self.vectorized:
+            return self._step_each(action)
+
+        task = self._tasks[0]
+        rule = task.rule
+        action = np.asarray(action)
+        index = np.arange(self.num_envs)
+        gt = self.gt[index, self.t_ind]
+
+        reward, new_trial, correct = rule.evaluate(
+            task, action, gt, self.in_period(rule.fixation),
+            self.in_period(rule.decision))
+        self.performance[correct] = 1
+
+        self.t_ind += 1
+        timeout = (self.t_ind >= self.lengths) & ~new_trial
+        reward[timeout] += task.r_tmax
+        new_trial |= timeout
+
+        info = {'new_trial': new_trial, 'gt': gt,
+                'performance': self.performance.copy()}
+        ind = np.flatnonzero(new_trial)
+        if len(ind) > 0:
+            self._new_trials(ind)
+        ob = self.ob[index, self.t_ind]
+        return ob, reward, np.zeros(self.num_envs, dtype=bool), info
+
+    def _step_each(self, action):
+        """Step each copy in turn, for tasks that can't be vectorized."""
+        obs, rewards, dones = list(), list(), list()
+        info = {'new_trial': np.zeros(self.num_envs, dtype=bool),
+                'gt': np.zeros((self.num_envs,) + self.action_space.shape,
+                               dtype=self.action_space.dtype),
+                'performance': np.zeros(self.num_envs)}
+        for i, env in enumerate(self.envs):
+            ob, reward, done, env_info = env.step(action[i])
+            obs.append(ob)
+            rewards.append(reward)
+            dones.append(done)
+            for key in info:
+                info[key][i] = env_info.get(key, 0)
+        return np.array(obs), np.array(rewards), np.array(dones), info
@@ -1,6 +1,6 @@
 from gym import spaces
 import neurogym as ngym
-from neurogym.core import TrialWrapper
+from neurogym.core import TrialWrapper, _merge_batches
 import numpy as np
 
 
@@ -69,9 +69,24 @@ def _have_equal_shape(envs):
                 ' and ' + str(env_act_shape) + ' for ' + str(envs[0]))
 
 
+def _add_ob_channels(envs, n, owner):
+    """Add n observation channels of owner to all envs, at the same index.
+
+    Envs appearing several times in envs get the channels once.
+    """
+    _have_equal_shape(envs)
+    starts = [env.add_ob_channels(n, owner) for env in envs]
+    if len(set(starts)) > 1:
+        raise ValueError('Envs have different observation channels, got '
+                         'first added channel ' + str(starts))
+    return starts[0]
+
+
 class MultiEnvs(TrialWrapper):
     """Wrap multiple environments.
 
+    Trials hold the index of their env in envs in trial['i_env'].
+
     Args:
         envs: list of env object
         env_input: bool, if True, add scalar inputs indicating current
@@ -90,7 +105,7 @@ class MultiEnvs(TrialWrapper):
             if len(env_shape) > 1:
                 raise ValueError('Env must have 1-D Box shape',
                                  'Instead got ' + str(env_shape))
-            _have_equal_shape(envs)
+            self._env_channel = _add_ob_channels(envs, len(envs), self)
             self.observation_space = spaces.Box(
                 -np.inf, np.inf, shape=(env_shape[0] + len(self.envs),),
                 dtype=self.observation_space.dtype
@@ -112,24 +127,37 @@ class MultiEnvs(TrialWrapper):
         self.i_env = i
         self.env = self.envs[self.i_env]
 
+    def add_ob_channels(self, n, owner):
+        """Add n observation channels to all envs."""
+        return _add_ob_channels(self.envs, n, owner)
+
+    def remove_ob_channels(self, owner):
+        """Release the observation channels of owner in all envs."""
+        tasks = {id(env.unwrapped): env for env in self.envs}
+        for env in tasks.values():
+            env.remove_ob_channels(owner)
+
+    def set_info_mode(self, info_mode):
+        """Set the info mode of all envs, see TrialEnv.set_info_mode."""
+        for env in self.envs:
+            env.set_info_mode(info_mode)
+
     def new_trial(self, **kwargs):
-        if not self.env_input:
-            return self.env.new_trial(**kwargs)
-        else:
-            trial = self.env.new_trial(**kwargs)
-            # Expand observation
-            env_ob = np.zeros((self.unwrapped.ob.shape[0], len(self.envs)),
-                              dtype=self.unwrapped.ob.dtype)
-            env_ob[:, self.i_env] = 1.
-            self.unwrapped.ob = np.concatenate(
-                (self.unwrapped.ob, env_ob), axis=-1)
-            return trial
+        trial = self.env.new_trial(**kwargs)
+        if self.env_input:
+            # Channels allocated in the trial observation by the task
+            self.unwrapped.ob[:, self._env_channel + self.i_env] = 1.
+        trial['i_env'] = self.i_env
+        return trial
 
 
 # TODO: EnvsWrapper or MultiEnvWrapper
 class ScheduleEnvs(TrialWrapper):
     """Schedule environments.
 
+    Trials hold the index of their env in envs in trial['i_env'], an array
+    of indices for the batches of new_trials.
+
     Args:
         envs: list of env object
         schedule: utils.scheduler.BaseSchedule object
@@ -150,7 +178,7 @@ class ScheduleEnvs(TrialWrapper):
             if len(env_shape) > 1:
                 raise ValueError('Env must have 1-D Box shape',
                                  'Instead got ' + str(env_shape))
-            _have_equal_shape(envs)
+            self._env_channel = _add_ob_channels(envs, len(envs), self)
             self.observation_space = spaces.Box(
                 -np.inf, np.inf, shape=(env_shape[0] + len(self.envs),),
                 dtype=self.observation_space.dtype
@@ -194,22 +222,62 @@ class ScheduleEnvs(TrialWrapper):
         self.i_env = self.next_i_env
         self.env = self.envs[self.i_env]
 
-        if not self.env_input:
-            trial = self.env.new_trial(**kwargs)
-        else:
-            trial = self.env.new_trial(**kwargs)
-            # Expand observation
-            env_ob = np.zeros((self.unwrapped.ob.shape[0], len(self.envs)),
-                              dtype=self.unwrapped.ob.dtype)
-            env_ob[:, self.i_env] = 1.
-            self.unwrapped.ob = np.concatenate(
-                (self.unwrapped.ob, env_ob), axis=-1)
+        trial = self.env.new_trial(**kwargs)
+        if self.env_input:
+            # Channels allocated in the trial observation by the task
+            self.unwrapped.ob[:, self._env_channel + self.i_env] = 1.
+
+        trial['i_env'] = self.i_env
 
         # want self.ob to refer to the ob of the new trial, so can't change self.env here => use next_i_env
         self.next_i_env = self.schedule()
         assert self.env == self.envs[self.i_env]
         return trial
 
+    def new_trials(self, n, **kwargs):
+        """Generate n new trials, each env generating its share at once.
+
+        Envs are scheduled as with new_trial, and the trials of each env are
+        generated by a single call to its new_trials.
+        """
+        i_envs = np.zeros(n, dtype=int)
+        i_envs[0] = self.next_i_env
+        for i in range(1, n):
+            i_envs[i] = self.schedule()
+        self.next_i_env = self.schedule()
+        self.i_env = i_envs[-1]
+        self.env = self.envs[self.i_env]
+
+        index = [np.flatnonzero(i_envs == i) for i in range(len(self.envs))]
+        batches = [env.new_trials(len(ind), **kwargs) if len(ind) > 0 else None
+                   for env, ind in zip(self.envs, index)]
+        batch = _merge_batches(self, batches, index)
+        if self.env_input:
+            trial_ind, t_ind = np.nonzero(batch.period_mask())
+            batch.ob[trial_ind, t_ind,
+                     self._env_channel + i_envs[trial_ind]] = 1.
+        batch.trial['i_env'] = i_envs
+        return batch
+
+    @property
+    def batched_trials(self):
+        return all(env.batched_trials for env in self.envs)
+
+    def add_ob_channels(self, n, owner):
+        """Add n observation channels to all envs."""
+        return _add_ob_channels(self.envs, n, owner)
+
+    def remove_ob_channels(self, owner):
+        """Release the observation channels of owner in all envs."""
+        tasks = {id(env.unwrapped): env for env in self.envs}
+        for env in tasks.values():
+            env.remove_ob_channels(owner)
+
+    def set_info_mode(self, info_mode):
+        """Set the info mode of all envs, see TrialEnv.set_info_mode."""
+        for env in self.envs:
+            env.set_info_mode(info_mode)
+
     def set_i(self, i):
         """Set the current environment to the i-th environment in the list envs."""
         self.i_env = i
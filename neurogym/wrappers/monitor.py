@@ -4,14 +4,14 @@
 from gym import Wrapper
 import os
 import numpy as np
-from neurogym.utils.plotting import fig_
 
 
 class Monitor(Wrapper):
     """Monitor task.
 
     Saves relevant behavioral information: rewards,actions, observations,
-    new trial, ground truth.
+    new trial, ground truth. Only the info keys provided by the env are
+    saved, see TrialEnv.set_info_mode.
 
     Args:
         folder: Folder where the data will be saved. (def: None, str)
@@ -113,7 +113,7 @@ class Monitor(Wrapper):
 
     def store_data(self, obs, action, rew, info):
         if self.stp_counter <= self.num_stps_sv_fig:
-            self.ob_mat.append(obs)
+            self.ob_mat.append(np.array(obs))
             self.act_mat.append(action)
             self.rew_mat.append(rew)
             if 'gt' in info.keys():
@@ -127,6 +127,7 @@ class Monitor(Wrapper):
             self.stp_counter += 1
         elif len(self.rew_mat) > 0:
             fname = self.sv_name + 'task_{0:06d}.'.format(self.num_tr)+self.fig_type
+            from neurogym.utils.plotting import fig_  # imports matplotlib
             obs_mat = np.array(self.ob_mat)
             act_mat = np.array(self.act_mat)
             fig_(ob=obs_mat, actions=act_mat,
@@ -9,8 +9,11 @@ Created on Thu Feb 28 15:07:21 2019
 # -*- coding: utf-8 -*-
 
 
+import numpy as np
 import gym
 
+from neurogym.core import _ObBuffer
+
 
 class Noise(gym.Wrapper):
     """Add Gaussian noise to the observations.
@@ -34,6 +37,9 @@ class Noise(gym.Wrapper):
         super().__init__(env)
         self.env = env
         self.std_noise = std_noise
+        # Output buffer, so that the env's trial observations are not changed
+        self._ob = _ObBuffer(env.observation_space.shape,
+                             env.observation_space.dtype)
 
     def reset(self, step_fn=None):
         if step_fn is None:
@@ -43,6 +49,7 @@ class Noise(gym.Wrapper):
     def step(self, action):
         obs, reward, done, info = self.env.step(action)
         # add noise
-        obs += self.env.rng.normal(loc=0, scale=self.std_noise,
-                                   size=obs.shape)
-        return obs, reward, done, info
+        np.add(obs, self.env.rng.normal(loc=0, scale=self.std_noise,
+                                        size=obs.shape), out=self._ob.array)
+        copy_obs = getattr(self.unwrapped, 'copy_obs', False)  # TrialEnv
+        return self._ob.output(copy_obs), reward, done, info
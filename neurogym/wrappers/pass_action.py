@@ -5,6 +5,8 @@ import numpy as np
 from gym import Wrapper
 from gym import spaces
 
+from neurogym.core import _ObBuffer, _stepped_tasks
+
 
 class PassAction(Wrapper):
     """Modifies observation by adding the previous action."""
@@ -22,12 +24,34 @@ class PassAction(Wrapper):
         self.observation_space = spaces.Box(-np.inf, np.inf,
                                             shape=(env_oss+1,),
                                             dtype=np.float32)
+        # If the env step returns the trial observation of its tasks, the
+        # previous action is written in a channel of it, otherwise in an
+        # output buffer
+        self._ob_channel = None
+        if _stepped_tasks(env, ob_channels=True) is not None:
+            try:
+                self._ob_channel = env.add_ob_channels(1, self)
+            except ValueError:  # envs with different observation shapes
+                pass
+        self._ob = _ObBuffer(self.observation_space.shape,
+                             self.observation_space.dtype)
+
     def reset(self, step_fn=None):
         if step_fn is None:
             step_fn = self.step
         return self.env.reset(step_fn=step_fn)
 
     def step(self, action):
+        task = self.unwrapped  # task stepped, before any new trial
         obs, reward, done, info = self.env.step(action)
-        obs = np.concatenate((obs, np.array([action])))
-        return obs, reward, done, info
+        channel = self._ob_channel
+        if channel is not None and obs.shape[-1] > channel:
+            # obs is the current time step of the trial observation of task
+            task.ob[task.t_ind, channel] = action
+            if task.copy_obs:
+                obs[channel] = action
+            return obs, reward, done, info
+        self._ob.array[:-1] = obs
+        self._ob.array[-1] = action
+        copy_obs = getattr(self.unwrapped, 'copy_obs', False)  # TrialEnv
+        return self._ob.output(copy_obs), reward, done, info
@@ -8,6 +8,7 @@ Created on Thu Feb 28 15:07:21 2019
 
 # !/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import numpy as np
 import gym
 
 
@@ -51,8 +52,9 @@ class ReactionTime(gym.Wrapper):  # TODO: Make this a trial wrapper instead?
                 self.env.gt[self.start_ind[dec]]
         obs, reward, done, info = self.env.step(action)
         if info['new_trial']:
-            info['tr_dur'] = self.tr_dur
-            obs *= 0
+            if getattr(self.env, 'info_mode', 'full') == 'full':
+                info['tr_dur'] = self.tr_dur
+            obs = np.zeros_like(obs)
         else:
             self.tr_dur = self.env.t_ind
         reward += self.urgency